@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class RoleModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's Profile (and Student / Teacher
+    record) in the same query as the session's user, so role checks and
+    ``request.user.student`` / ``.teacher`` cost nothing extra.
+
+    The role is read with the user on every request, so there is no
+    separate copy to invalidate: a changed Profile applies from the
+    user's next request.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related(
+                "profile", "student", "teacher"
+            ).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await UserModel._default_manager.select_related(
+                "profile", "student", "teacher"
+            ).aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,40 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect
+
+
+def get_role(user):
+    """The user's Profile role, or ``None`` for anonymous / profile-less users."""
+    profile = getattr(user, "profile", None)
+    return profile.role if profile is not None else None
+
+
+def role_required(*roles):
+    """
+    Require a logged-in user whose Profile role is one of ``roles``;
+    anyone else is sent back to the login page. Works on sync and async
+    views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                # swap the lazy request.user for the one login_required
+                # already loaded, so templates never query synchronously
+                request.user = await request.auser()
+                if get_role(request.user) not in roles:
+                    return redirect("login")
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if get_role(request.user) not in roles:
+                    return redirect("login")
+                return view(request, *args, **kwargs)
+
+        return login_required(wrapper)
+
+    return decorator
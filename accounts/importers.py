@@ -0,0 +1,150 @@
+"""
+Streaming CSV import of student / teacher accounts.
+
+Rows are read and validated in chunks. Uniqueness of username, roll_no and
+employee_id is checked against in-memory sets loaded once up front, the
+PBKDF2 hashing is spread over a process pool, and each chunk goes in
+through ``services.bulk_create_accounts``.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from students.models import Student
+from teachers.models import Teacher
+from .services import USER_FIELDS, bulk_create_accounts
+
+
+IMPORT_ROLES = {
+    "STUDENT": {
+        "model": Student,
+        "unique": "roll_no",
+        "fields": ("roll_no", "class_name"),
+    },
+    "TEACHER": {
+        "model": Teacher,
+        "unique": "employee_id",
+        "fields": ("employee_id", "department"),
+    },
+}
+
+
+def _setup_worker():
+    # spawned (non-forked) workers start without an app registry
+    django.setup()
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    @property
+    def processed(self):
+        return self.created + self.failed
+
+
+class AccountImporter:
+    def __init__(self, role, chunk_size=500, workers=None, error_file=None,
+                 progress=None, keep_errors=0):
+        self.role = role
+        self.spec = IMPORT_ROLES[role]
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.progress = progress
+        self.keep_errors = keep_errors
+        self.error_writer = None
+        if error_file is not None:
+            self.error_writer = csv.writer(error_file)
+            self.error_writer.writerow(
+                ("line", "username", self.spec["unique"], "error")
+            )
+
+    def run(self, csv_file):
+        """Import every row of ``csv_file`` (a text file with a header row)."""
+        reader = csv.DictReader(csv_file)
+        required = USER_FIELDS + self.spec["fields"]
+        missing = [f for f in required if f not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+
+        self.usernames = set(
+            User.objects.values_list("username", flat=True).iterator()
+        )
+        self.unique_values = set(
+            self.spec["model"].objects
+            .values_list(self.spec["unique"], flat=True).iterator()
+        )
+
+        result = ImportResult()
+        rows = enumerate(reader, start=2)
+        pool = None
+        if self.workers != 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_setup_worker)
+        try:
+            while chunk := list(islice(rows, self.chunk_size)):
+                valid = self.validate(chunk, result)
+                if valid:
+                    self.insert(valid, pool)
+                    result.created += len(valid)
+                if self.progress:
+                    self.progress(result)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return result
+
+    def validate(self, chunk, result):
+        valid = []
+        unique = self.spec["unique"]
+        for line, row in chunk:
+            row = {key: (value or "").strip() for key, value in row.items() if key}
+            error = None
+
+            blank = [f for f in USER_FIELDS[:2] + self.spec["fields"] if not row.get(f)]
+            if blank:
+                error = f"Missing {', '.join(blank)}"
+            elif row["username"] in self.usernames:
+                error = "Username already exists"
+            elif row[unique] in self.unique_values:
+                error = f"{unique} already exists"
+
+            if error:
+                result.failed += 1
+                self.report(line, row, error, result)
+                continue
+
+            self.usernames.add(row["username"])
+            self.unique_values.add(row[unique])
+            valid.append(row)
+        return valid
+
+    def report(self, line, row, error, result):
+        values = (line, row.get("username", ""), row.get(self.spec["unique"], ""), error)
+        if self.error_writer is not None:
+            self.error_writer.writerow(values)
+        if len(result.errors) < self.keep_errors:
+            result.errors.append(values)
+
+    def insert(self, rows, pool):
+        passwords = [row["password"] for row in rows]
+        if pool is None:
+            hashes = list(map(make_password, passwords))
+        else:
+            hashes = list(pool.map(
+                make_password, passwords,
+                chunksize=max(1, len(passwords) // (self.workers * 4)),
+            ))
+
+        fields = USER_FIELDS + self.spec["fields"]
+        accounts = [
+            {**{field: row[field] for field in fields}, "password": hashed}
+            for row, hashed in zip(rows, hashes)
+        ]
+        bulk_create_accounts(self.role, accounts, hashed=True)
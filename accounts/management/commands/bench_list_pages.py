@@ -0,0 +1,116 @@
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.management.seeded import throwaway_database
+from accounts.services import create_account
+from courses.models import Course
+from students.models import Student
+from teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the big admin list pages (the course list and "
+        "?per_page=all student list) rendered whole and streamed, plain and "
+        "gzipped: time to first byte, total time, bytes sent and peak traced "
+        "memory, on synthetic data in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=5000)
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, courses, students, repeat, host, **options):
+        with throwaway_database():
+            self.seed(courses, students)
+            admin = create_account("ADMIN", username="bench-admin", password="bench")
+            client = Client(HTTP_HOST=host)
+            client.force_login(admin)
+
+            pages = (
+                (f"course_list ({courses})", reverse("course_list"), {}),
+                (f"student_list ({students})", reverse("student_list"), {"per_page": "all"}),
+            )
+            for label, url, params in pages:
+                self.stdout.write(label)
+                for streamed in (False, True):
+                    for encoding in ("identity", "gzip"):
+                        with override_settings(STREAM_LIST_PAGES=streamed):
+                            result = self.measure(client, url, params, encoding, repeat)
+                        self.stdout.write(
+                            f"  {'streamed' if streamed else 'whole':<8} {encoding:<8} "
+                            f"ttfb {result['ttfb'] * 1000:7.1f} ms, "
+                            f"total {result['total'] * 1000:7.1f} ms, "
+                            f"{result['bytes'] / 1024:8.0f} KiB sent, "
+                            f"peak {result['peak'] / 1024 / 1024:6.1f} MiB traced"
+                        )
+
+    def seed(self, courses, students):
+        users = User.objects.bulk_create(
+            User(username=f"bench-s{i}", first_name="Student", last_name=str(i))
+            for i in range(students)
+        )
+        Student.objects.bulk_create(
+            Student(user=user, roll_no=f"B{i:06}", class_name=f"C{i % 20}")
+            for i, user in enumerate(users)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"bench-t{i}", first_name="Teacher", last_name=str(i))
+            for i in range(50)
+        )
+        teachers = Teacher.objects.bulk_create(
+            Teacher(user=user, employee_id=f"E{i:05}", department=f"Dept {i % 8}")
+            for i, user in enumerate(users)
+        )
+        Course.objects.bulk_create(
+            Course(
+                name=f"Bench course {i}", code=f"BENCH{i:05}",
+                teacher=teachers[i % len(teachers)], total_lectures=40,
+            )
+            for i in range(courses)
+        )
+
+    def fetch(self, client, url, params, encoding):
+        """
+        ``(ttfb, total, bytes)`` of one request, its body consumed and
+        dropped chunk by chunk as a server writing to a socket would.
+        """
+        began = time.perf_counter()
+        response = client.get(url, params, headers={"accept-encoding": encoding})
+        assert response.status_code == 200, response.status_code
+        if not response.streaming:
+            return (time.perf_counter() - began,) * 2 + (len(response.content),)
+
+        size = 0
+        ttfb = None
+        for chunk in response.streaming_content:
+            if ttfb is None:
+                ttfb = time.perf_counter() - began
+            size += len(chunk)
+        response.close()
+        return ttfb, time.perf_counter() - began, size
+
+    def measure(self, client, url, params, encoding, repeat):
+        self.fetch(client, url, params, encoding)  # warm up
+        runs = [self.fetch(client, url, params, encoding) for _ in range(repeat)]
+
+        # separately: tracing slows everything down
+        tracemalloc.start()
+        self.fetch(client, url, params, encoding)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "ttfb": statistics.median(run[0] for run in runs),
+            "total": statistics.median(run[1] for run in runs),
+            "bytes": runs[-1][2],
+            "peak": peak,
+        }
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.management.seeded import seeded_database, seeded_users
+from config.asgi import application as asgi_application
+from config.wsgi import application as wsgi_application
+
+
+SCENARIOS = [
+    ("student_dashboard", "student"),
+    ("teacher_dashboard", "teacher"),
+    ("course_list", "admin"),
+    ("student_list", "admin"),
+    ("teacher_list", "admin"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent GETs at the read-heavy views through the WSGI "
+        "application (a thread per in-flight request, like a threaded WSGI "
+        "server) and through the ASGI application (one event loop, async "
+        "views), in process, and compare throughput and latency. Use --seed "
+        "to run against a throwaway SQLite file filled by seed_school."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=200, help="Per view and path.")
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument(
+            "--uncached", action="store_true",
+            help="Disable the dashboard cache so every request hits the database.",
+        )
+        parser.add_argument("--seed", action="store_true")
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--days", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive.")
+
+        timeout = 0 if options["uncached"] else settings.DASHBOARD_CACHE_TIMEOUT
+        with override_settings(DASHBOARD_CACHE_TIMEOUT=timeout):
+            if not options["seed"]:
+                return self.run(options)
+
+            # a file, not the in-memory test database: every worker thread
+            # opens its own connection, as it would in production
+            with seeded_database(
+                self.stderr,
+                on_disk=True,
+                students=options["students"],
+                courses=options["courses"],
+                days=options["days"],
+                prefix=options["prefix"],
+            ):
+                return self.run(options)
+
+    def run(self, options):
+        users = seeded_users(options["prefix"])
+        cookies = {}
+        for role, user in users.items():
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            cookies[role] = f"{settings.SESSION_COOKIE_NAME}={session}"
+
+        self.stdout.write(
+            f"{options['requests']} requests per view, {options['concurrency']} in flight"
+        )
+        for name, role in SCENARIOS:
+            path = reverse(name)
+            wsgi = self.measure_wsgi(path, cookies[role], options)
+            asgi = asyncio.run(self.measure_asgi(path, cookies[role], options))
+            change = (asgi["throughput_rps"] / wsgi["throughput_rps"] - 1) * 100
+            self.stdout.write(
+                f"{name:<18} WSGI {wsgi['throughput_rps']:7.1f} req/s "
+                f"p95 {wsgi['p95_ms']:7.1f} ms | ASGI {asgi['throughput_rps']:7.1f} req/s "
+                f"p95 {asgi['p95_ms']:7.1f} ms ({change:+.1f}%)"
+            )
+
+    def measure_wsgi(self, path, cookie, options):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": options["host"],
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": options["host"],
+            "HTTP_COOKIE": cookie,
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+        }
+
+        def request():
+            statuses = []
+            began = time.perf_counter()
+            response = wsgi_application(
+                {**environ, "wsgi.input": io.BytesIO()},
+                lambda status, headers, exc_info=None: statuses.append(status),
+            )
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+            return int(statuses[0].split()[0]), time.perf_counter() - began
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            results = list(pool.map(lambda _: request(), range(options["requests"])))
+        return self.summarize(path, results, time.perf_counter() - started)
+
+    async def measure_asgi(self, path, cookie, options):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", options["host"].encode()),
+                (b"cookie", cookie.encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (options["host"], 80),
+        }
+        in_flight = asyncio.Semaphore(options["concurrency"])
+
+        async def request():
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+            status = None
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # the client never disconnects; Django cancels this wait
+                await asyncio.Event().wait()
+
+            async def send(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+
+            async with in_flight:
+                began = time.perf_counter()
+                await asgi_application(dict(scope), receive, send)
+                return status, time.perf_counter() - began
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(options["requests"])))
+        return self.summarize(path, results, time.perf_counter() - started)
+
+    def summarize(self, path, results, elapsed):
+        failed = [status for status, _ in results if status != 200]
+        if failed:
+            raise CommandError(f"{path} returned {failed[0]}")
+
+        latencies = [latency for _, latency in results]
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "p50_ms": cuts[49] * 1000,
+            "p95_ms": cuts[94] * 1000,
+            "throughput_rps": len(results) / elapsed,
+        }
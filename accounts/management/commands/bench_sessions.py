@@ -0,0 +1,179 @@
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.management.seeded import seeded_database
+from attendance.models import attendance_store
+from courses.models import Course
+
+PROFILES = {
+    "db": {"SESSION_ENGINE": "django.contrib.sessions.backends.db"},
+    "cached": {"SESSION_ENGINE": "config.sessions", "SESSION_CACHE_ALIAS": "sessions"},
+    "cookie": {"SESSION_ENGINE": "django.contrib.sessions.backends.signed_cookies"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Have logged-in teachers poll their dashboards at a fixed rate while others keep "
+        "correcting attendance, from parallel threads against a throwaway "
+        "SQLite file, once per session profile (db, cached, cookie), each "
+        "with the settings it has in production. Reports dashboard "
+        "throughput, django_session statements (count and time spent, "
+        "waits for the write lock included) and attendance write "
+        "latency and lock errors. Uses the current DATABASES OPTIONS "
+        "(e.g. DJANGO_DB_PROFILE=production)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=16)
+        parser.add_argument(
+            "--rate", type=float, default=10,
+            help="Dashboard requests per second per reader (0: as fast as possible).",
+        )
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--roster", type=int, default=40)
+        parser.add_argument(
+            "--profile", choices=[*PROFILES, "all"], default="all"
+        )
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, profile, **options):
+        profiles = list(PROFILES) if profile == "all" else [profile]
+        for name in profiles:
+            with override_settings(**PROFILES[name]):
+                result = self.run(options)
+
+            reads = sorted(result["reads"]) or [0]
+            writes = sorted(result["writes"]) or [0]
+            statements = result["session_sql"]
+            self.stdout.write(
+                f"{name:>6}: dashboards {len(result['reads']) / options['seconds']:6.0f} req/s "
+                f"p95 {self.p95(reads) * 1000:5.1f} ms | django_session "
+                f"{statements['SELECT']} reads, "
+                f"{sum(statements.values()) - statements['SELECT']} writes, "
+                f"{result['session_seconds']:5.2f} s | "
+                f"attendance {len(result['writes'])} saves, "
+                f"p50 {statistics.median(writes) * 1000:5.1f} ms, "
+                f"p95 {self.p95(writes) * 1000:5.1f} ms, "
+                f"max {writes[-1] * 1000:5.0f} ms, "
+                f"{result['locked']} 'database is locked'"
+            )
+
+    def p95(self, latencies):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def run(self, options):
+        readers, writers = options["readers"], options["writers"]
+        with seeded_database(
+            on_disk=True, students=options["roster"] * 2, teachers=readers + writers,
+            courses=readers + writers, per_course=options["roster"], days=0,
+            prefix="bench",
+        ):
+            cache.clear()
+            caches["sessions"].clear()
+            return self.contend(options)
+
+    def contend(self, options):
+        readers, writers = options["readers"], options["writers"]
+        courses = list(
+            Course.objects.filter(code__startswith="BENCH-")
+            .select_related("teacher__user").order_by("id")
+        )
+        rosters = {
+            course.id: list(course.students.values_list("id", flat=True))
+            for course in courses
+        }
+
+        lock = threading.Lock()
+        result = {
+            "reads": [], "writes": [], "locked": 0,
+            "session_sql": Counter(), "session_seconds": 0.0,
+        }
+        deadline = [None]
+        # every thread logs in first; only the contended part is timed
+        barrier = threading.Barrier(
+            readers + writers,
+            action=lambda: deadline.__setitem__(0, time.perf_counter() + options["seconds"]),
+        )
+
+        def count_session_sql(execute, sql, params, many, context):
+            if "django_session" not in sql:
+                return execute(sql, params, many, context)
+            # includes any wait for the write lock held by attendance saves
+            began = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                with lock:
+                    result["session_sql"][sql.split()[0].upper()] += 1
+                    result["session_seconds"] += time.perf_counter() - began
+
+        def read(course):
+            client = Client(HTTP_HOST=options["host"])
+            client.force_login(course.teacher.user)
+            url = reverse("teacher_dashboard")
+            interval = 1 / options["rate"] if options["rate"] else 0
+            latencies = []
+            barrier.wait()
+            # a fixed request rate keeps the offered load the same for
+            # every profile, whatever each request costs
+            next_request = time.perf_counter()
+            with connection.execute_wrapper(count_session_sql):
+                while next_request < deadline[0]:
+                    time.sleep(max(0, next_request - time.perf_counter()))
+                    began = time.perf_counter()
+                    response = client.get(url)
+                    assert response.status_code == 200, response.status_code
+                    latencies.append(time.perf_counter() - began)
+                    next_request += interval
+            with lock:
+                result["reads"].extend(latencies)
+
+        def write(course):
+            store = attendance_store()
+            roster = rosters[course.id]
+            latencies, locked, n = [], 0, 0
+            barrier.wait()
+            while time.perf_counter() < deadline[0]:
+                day = date.today() - timedelta(days=n % 30)
+                began = time.perf_counter()
+                try:
+                    store.upsert_marks(course, roster, roster[n % 2::2], day)
+                    latencies.append(time.perf_counter() - began)
+                except OperationalError as exc:
+                    if "locked" not in str(exc):
+                        raise
+                    locked += 1
+                n += 1
+            with lock:
+                result["writes"].extend(latencies)
+                result["locked"] += locked
+
+        def worker(target, course):
+            try:
+                target(course)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(read, course))
+            for course in courses[:readers]
+        ] + [
+            threading.Thread(target=worker, args=(write, course))
+            for course in courses[readers:]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,157 @@
+import json
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.management.seeded import seeded_database, seeded_users
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the login, dashboard, attendance and list views through the "
+        "Django test client and report latency percentiles, queries per "
+        "request and throughput. Use --seed to run against a throwaway "
+        "database filled by seed_school."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--password", default="seed-pass")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Print deltas against an earlier JSON file.")
+        parser.add_argument(
+            "--seed", action="store_true",
+            help="Seed a throwaway test database (extra options go to seed_school).",
+        )
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        if not options["seed"]:
+            return self.run(options)
+
+        with seeded_database(
+            self.stderr,
+            students=options["students"],
+            courses=options["courses"],
+            days=options["days"],
+            prefix=options["prefix"],
+            password=options["password"],
+        ):
+            return self.run(options)
+
+    def run(self, options):
+        users = seeded_users(options["prefix"])
+        course = Course.objects.filter(teacher__user=users["teacher"]).first()
+
+        scenarios = [
+            ("login_view", None, "post", reverse("login"), {
+                "username": users["student"].username,
+                "password": options["password"],
+            }),
+            ("student_dashboard", "student", "get", reverse("student_dashboard"), None),
+            ("teacher_dashboard", "teacher", "get", reverse("teacher_dashboard"), None),
+            ("take_attendance", "teacher", "get",
+             reverse("take_attendance", args=[course.id]), None),
+            ("course_list", "admin", "get", reverse("course_list"), None),
+            ("student_list", "admin", "get", reverse("student_list"), None),
+            ("teacher_list", "admin", "get", reverse("teacher_list"), None),
+        ]
+
+        results = {}
+        for name, role, method, url, data in scenarios:
+            client = Client(HTTP_HOST=options["host"])
+            if role:
+                client.force_login(users[role])
+            results[name] = self.measure(
+                client, method, url, data, options["requests"], options["warmup"]
+            )
+            self.report(name, results[name])
+
+        payload = {
+            "commit": self.git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "requests": options["requests"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(payload, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def measure(self, client, method, url, data, requests, warmup):
+        send = getattr(client, method)
+        for _ in range(warmup):
+            response = send(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                began = time.perf_counter()
+                response = send(url, data)
+                # streamed pages (course_list) read and render their rows
+                # as the body is consumed
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                latencies.append(time.perf_counter() - began)
+            queries.append(len(captured))
+            if response.status_code >= 400:
+                raise CommandError(f"{url} returned {response.status_code}")
+        elapsed = time.perf_counter() - started
+
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "status": response.status_code,
+            "p50_ms": cuts[49] * 1000,
+            "p95_ms": cuts[94] * 1000,
+            "p99_ms": cuts[98] * 1000,
+            "queries": max(queries),
+            "throughput_rps": requests / elapsed,
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<18} p50 {result['p50_ms']:8.2f} ms  "
+            f"p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+            f"{result['queries']:3d} queries  {result['throughput_rps']:8.1f} req/s"
+        )
+
+    def compare(self, path, results):
+        with open(path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f"\nAgainst {baseline.get('commit') or path}:")
+        for name, result in results.items():
+            before = baseline["results"].get(name)
+            if before is None:
+                continue
+            change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            self.stdout.write(
+                f"{name:<18} p50 {before['p50_ms']:8.2f} -> {result['p50_ms']:8.2f} ms "
+                f"({change:+.1f}%)  queries {before['queries']} -> {result['queries']}"
+            )
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
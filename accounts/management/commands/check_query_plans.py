@@ -0,0 +1,138 @@
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.management.seeded import seeded_database, seeded_users
+from courses.models import Course
+
+
+# "SCAN <table>" reads every row, in index order too ("USING [COVERING]
+# INDEX"); only SEARCH is a bounded lookup. A "VIRTUAL TABLE" scan is a
+# lookup in the full-text index
+FULL_SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)(\w+)\b(?! VIRTUAL TABLE)")
+
+# Pages that read a whole table (or index) on purpose
+EXPECTED_SCANS = {
+    "course_list": {"courses_course", "teachers_teacher"},
+    # the first page walks the roll_no / employee_id index until LIMIT
+    # stops it; ?per_page=all reads it all
+    "student_list": {"students_student"},
+    "teacher_list": {"teachers_teacher"},
+    # the teacher dropdown and the distinct class names (a covering index
+    # scan); students are searched, not listed
+    "course_edit": {"teachers_teacher", "students_student"},
+    # the whole-school report reads every summary; the newest rollup run
+    # is a rowid scan from the end that LIMIT 1 stops after one row; the
+    # class and course filter dropdowns
+    "defaulter_report": {
+        "attendance_attendancesummary", "attendance_rolluprun",
+        "students_student", "courses_course",
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request each view, run EXPLAIN QUERY PLAN over every SELECT it "
+        "issues and fail if any of them does a full table scan. Use --seed "
+        "to run against a throwaway database filled by seed_school."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--seed", action="store_true")
+        parser.add_argument(
+            "--verbose-plans", action="store_true",
+            help="Print the plan of every query, not just the failing ones.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("check_query_plans reads SQLite query plans.")
+        if not options["seed"]:
+            return self.check_plans(options)
+
+        with seeded_database(
+            self.stderr, students=200, teachers=10, courses=20,
+            days=5, prefix=options["prefix"],
+        ):
+            return self.check_plans(options)
+
+    def scenarios(self, prefix):
+        users = seeded_users(prefix)
+        course = Course.objects.filter(teacher__user=users["teacher"]).first()
+        student = users["student"].student
+        today = date.today().isoformat()
+
+        return [
+            ("student_dashboard", "student", reverse("student_dashboard"), {}),
+            ("teacher_dashboard", "teacher", reverse("teacher_dashboard"), {}),
+            ("take_attendance", "teacher", reverse("take_attendance", args=[course.id]), {}),
+            ("session_history", "teacher", reverse("session_history", args=[course.id]), {}),
+            ("attendance_register", "teacher",
+             reverse("attendance_register", args=[course.id]), {}),
+            ("course_list", "admin", reverse("course_list"), {}),
+            ("course_list", "admin", reverse("course_list"),
+             {"teacher": course.teacher_id, "code": course.code[:3]}),
+            ("student_list", "admin", reverse("student_list"), {}),
+            ("student_list", "admin", reverse("student_list"), {"after": student.roll_no}),
+            ("student_list", "admin", reverse("student_list"), {"per_page": "all"}),
+            ("teacher_list", "admin", reverse("teacher_list"), {}),
+            ("course_edit", "admin", reverse("course_edit", args=[course.id]), {}),
+            ("student_search", "admin", reverse("student_search"), {"q": student.roll_no[:4]}),
+            ("student_search", "admin", reverse("student_search"),
+             {"q": student.user.first_name[:2], "class_name": student.class_name}),
+            ("export_course_attendance", "teacher",
+             reverse("export_course_attendance", args=[course.id]), {"start": today}),
+            ("export_class_attendance", "admin",
+             reverse("export_class_attendance", args=[student.class_name]), {}),
+            ("global_search", "admin", reverse("global_search"), {"q": student.roll_no[:6]}),
+            ("defaulter_report", "admin", reverse("defaulter_report"), {}),
+            ("defaulter_report", "admin", reverse("defaulter_report"),
+             {"class_name": student.class_name, "course": course.id}),
+        ], users
+
+    def check_plans(self, options):
+        scenarios, users = self.scenarios(options["prefix"])
+        failures = 0
+
+        for name, role, url, params in scenarios:
+            client = Client(HTTP_HOST=options["host"])
+            client.force_login(users[role])
+            # check the queries behind cached dashboards too
+            with override_settings(DASHBOARD_CACHE_TIMEOUT=0), \
+                    CaptureQueriesContext(connection) as captured:
+                response = client.get(url, params)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+
+            for query in captured:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = self.explain(sql)
+                scans = set(FULL_SCAN.findall(plan)) - EXPECTED_SCANS.get(name, set())
+                if scans:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"{name}: full scan of {', '.join(sorted(scans))}"
+                    ))
+                if scans or options["verbose_plans"]:
+                    self.stdout.write(f"  {sql}\n{plan}\n")
+
+            self.stdout.write(f"{name}: {len(captured)} queries checked")
+
+        if failures:
+            raise CommandError(f"{failures} queries do full table scans.")
+        self.stdout.write(self.style.SUCCESS("No unexpected full table scans."))
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return "\n".join(f"    {row[-1]}" for row in cursor.fetchall())
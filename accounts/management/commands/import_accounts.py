@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importers import IMPORT_ROLES, AccountImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import student or teacher accounts from a CSV file with columns "
+        "username,password,first_name,last_name and roll_no,class_name "
+        "(students) or employee_id,department (teachers)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("role", choices=[r.lower() for r in IMPORT_ROLES])
+        parser.add_argument("csv_path")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Password hashing processes (default: CPU count, 1 = no pool).",
+        )
+        parser.add_argument(
+            "--errors", default=None,
+            help="Write rejected rows to this CSV file.",
+        )
+
+    def handle(self, *args, role, csv_path, chunk_size, workers, errors, **options):
+        error_file = open(errors, "w", newline="") if errors else None
+
+        def progress(result):
+            self.stderr.write(
+                f"{result.processed} rows: {result.created} created, "
+                f"{result.failed} rejected"
+            )
+
+        try:
+            with open(csv_path, newline="", encoding="utf-8-sig") as csv_file:
+                importer = AccountImporter(
+                    role.upper(),
+                    chunk_size=chunk_size,
+                    workers=workers,
+                    error_file=error_file,
+                    progress=progress,
+                )
+                result = importer.run(csv_file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        finally:
+            if error_file is not None:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} {role} accounts, "
+            f"rejected {result.failed}."
+        ))
+        if result.failed and errors:
+            self.stdout.write(f"Rejected rows written to {errors}")
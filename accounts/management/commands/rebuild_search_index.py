@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Repopulate the full-text search index of students, teachers and "
+        "courses from their tables, e.g. after rows were changed with "
+        "queryset.update() or raw SQL, which the index signals do not see."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {rows} rows in {time.perf_counter() - started:.2f}s."
+        ))
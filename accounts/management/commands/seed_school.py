@@ -0,0 +1,98 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import search
+from accounts.services import bulk_create_accounts, create_account
+from attendance.models import attendance_store
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic school: students, teachers, courses with "
+        "enrollments and past days of attendance. All accounts share one "
+        "password and are prefixed so they can be told apart from real data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--teachers", type=int, default=50)
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--per-course", type=int, default=60)
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--classes", type=int, default=20)
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--password", default="seed-pass")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        hashed = make_password(options["password"])
+
+        with transaction.atomic():
+            create_account(
+                "ADMIN", username=f"{prefix}-admin", password=options["password"]
+            )
+            teachers = bulk_create_accounts("TEACHER", [
+                {
+                    "username": f"{prefix}-t{i}",
+                    "password": hashed,
+                    "first_name": "Teacher",
+                    "last_name": str(i),
+                    "employee_id": f"{prefix.upper()}-E{i:05}",
+                    "department": f"Dept {i % 8}",
+                }
+                for i in range(options["teachers"])
+            ], hashed=True)
+            students = bulk_create_accounts("STUDENT", [
+                {
+                    "username": f"{prefix}-s{i}",
+                    "password": hashed,
+                    "first_name": "Student",
+                    "last_name": str(i),
+                    "roll_no": f"{prefix.upper()}-R{i:06}",
+                    "class_name": f"{prefix.upper()}-{i % options['classes']}",
+                }
+                for i in range(options["students"])
+            ], hashed=True)
+
+            student_ids = [user.student.id for user in students]
+            courses = Course.objects.bulk_create(
+                Course(
+                    name=f"Course {i}",
+                    code=f"{prefix.upper()}-C{i:04}",
+                    teacher=teachers[i % len(teachers)].teacher if teachers else None,
+                    total_lectures=options["days"],
+                )
+                for i in range(options["courses"])
+            )
+            search.index_objects("course", [course.id for course in courses], new=True)
+            per_course = min(options["per_course"], len(student_ids))
+            rosters = {
+                course.id: rng.sample(student_ids, per_course) for course in courses
+            }
+            Course.students.through.objects.bulk_create(
+                Course.students.through(course_id=course_id, student_id=student_id)
+                for course_id, roster in rosters.items()
+                for student_id in roster
+            )
+
+        store = attendance_store()
+        today = date.today()
+        for n in range(1, options["days"] + 1):
+            day = today - timedelta(days=n)
+            for course in courses:
+                roster = rosters[course.id]
+                present = [sid for sid in roster if rng.random() < 0.85]
+                store.bulk_mark(course, roster, present, day)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(students)} students, {len(teachers)} teachers, "
+            f"{len(courses)} courses and {options['days']} days of attendance "
+            f"(login: {prefix}-admin / {prefix}-t0 / {prefix}-s0)."
+        ))
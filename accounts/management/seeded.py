@@ -0,0 +1,79 @@
+"""
+Throwaway databases and seeded accounts for the bench and check commands.
+
+``throwaway_database`` swaps the default database for a fresh test
+database for the length of a ``with`` block, ``seeded_database`` also
+fills it with ``seed_school``, and ``seeded_users`` finds the accounts
+``seed_school`` creates, whether in a throwaway or in the real database.
+"""
+import io
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+# seed_school usernames (after "<prefix>-") of the accounts the commands log in as
+SEEDED_USERS = {"admin": "admin", "teacher": "t0", "student": "s0"}
+
+
+@contextmanager
+def throwaway_database(on_disk=False, options=None):
+    """
+    Run the block against a new, migrated test database and destroy it
+    afterwards. ``on_disk`` puts it in a temporary file instead of memory,
+    so that every thread opens its own connection as it would in
+    production; ``options`` replaces the DATABASES OPTIONS meanwhile.
+    """
+    settings_dict = connection.settings_dict
+    old_name = settings_dict["NAME"]
+    old_test_name = settings_dict["TEST"]["NAME"]
+    old_options = settings_dict.get("OPTIONS", {})
+
+    with ExitStack() as stack:
+        if on_disk:
+            tmp = stack.enter_context(tempfile.TemporaryDirectory())
+            settings_dict["TEST"]["NAME"] = os.path.join(tmp, "throwaway.sqlite3")
+        if options is not None:
+            settings_dict["OPTIONS"] = options
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                yield
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            settings_dict["OPTIONS"] = old_options
+            settings_dict["TEST"]["NAME"] = old_test_name
+
+
+@contextmanager
+def seeded_database(stdout=None, on_disk=False, options=None, **seed_options):
+    """
+    ``throwaway_database`` filled by ``seed_school`` (``seed_options`` are
+    its options; its output goes to ``stdout``, or nowhere).
+    """
+    with throwaway_database(on_disk=on_disk, options=options):
+        call_command("seed_school", stdout=stdout or io.StringIO(), **seed_options)
+        yield
+
+
+def seeded_users(prefix):
+    """
+    The seeded admin, first teacher and first student by role; a
+    CommandError if any of them is missing.
+    """
+    users = {
+        role: User.objects.filter(username=f"{prefix}-{suffix}").first()
+        for role, suffix in SEEDED_USERS.items()
+    }
+    missing = [role for role, user in users.items() if user is None]
+    if missing:
+        raise CommandError(
+            f"No seeded {', '.join(missing)} account; run seed_school "
+            f"or pass --seed."
+        )
+    return users
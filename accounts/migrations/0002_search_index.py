@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def build_index(apps, schema_editor):
+    from accounts.search import rebuild_index
+
+    rebuild_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('courses', '0004_course_lectures_held'),
+        ('students', '0002_query_indexes'),
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE search_index USING fts5("
+                "title, detail, tokenize = 'unicode61 remove_diacritics 2', "
+                "prefix = '1 2 3')",
+                # rank by bm25 with a name match worth more than a detail match
+                "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 4.0)')",
+            ],
+            reverse_sql="DROP TABLE search_index",
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from config.sessions import record_activity
+from . import search
+
 class Profile(models.Model):
     ROLE_CHOICES = (
         ('ADMIN', 'Admin'),
@@ -17,9 +21,45 @@ class Profile(models.Model):
         return f"{self.user.username} - {self.role}"
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+    # accounts.services creates the Profile itself with the right role
+    if created and not getattr(instance, "_skip_default_profile", False):
         from .models import Profile
         Profile.objects.create(user=instance, role="STUDENT")
 
 
+# =====================================================
+# SEARCH INDEX (accounts.search)
+# =====================================================
+SEARCHED_USER_FIELDS = {"username", "first_name", "last_name"}
+
+
+@receiver(post_save, sender=User)
+def reindex_user(sender, instance, created, update_fields=None, **kwargs):
+    # a new user has no student / teacher yet; logins only touch last_login
+    if created or (update_fields is not None and not SEARCHED_USER_FIELDS & set(update_fields)):
+        return
+    search.index_user(instance.pk)
+
+
+@receiver(post_save, sender="students.Student")
+@receiver(post_save, sender="teachers.Teacher")
+@receiver(post_save, sender="courses.Course")
+def reindex_object(sender, instance, created, **kwargs):
+    search.index_objects(sender._meta.model_name, [instance.pk], new=created)
+
+
+@receiver(post_delete, sender="students.Student")
+@receiver(post_delete, sender="teachers.Teacher")
+@receiver(post_delete, sender="courses.Course")
+def unindex_object(sender, instance, **kwargs):
+    search.unindex_object(sender._meta.model_name, instance.pk)
+
 
+# =====================================================
+# SESSION ACTIVITY (config.sessions)
+# =====================================================
+@receiver(user_logged_in)
+def record_login_activity(sender, request, user, **kwargs):
+    # cached sessions only; saved with the login itself, so the next
+    # requests have nothing to record
+    record_activity(request.session)
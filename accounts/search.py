@@ -0,0 +1,127 @@
+"""
+Full-text search over students, teachers and courses.
+
+``search_index`` is an SQLite FTS5 table (created by migration
+``accounts.0002_search_index``) with one row per Student, Teacher and
+Course: a ``title`` (the person's name or the course name) and a
+``detail`` line (username, roll number and class; username, employee ID
+and department; course code). The rowid encodes the object, ``id * 4 +
+kind``, so a row is replaced or dropped by key, without a scan.
+
+The receivers in ``accounts.models`` keep it in step with saves and
+deletes; bulk inserts (``bulk_create_accounts``, ``seed_school``) index
+their rows themselves, and ``manage.py rebuild_search_index`` starts
+over from the tables.
+"""
+from django.conf import settings
+from django.db import connection
+
+KINDS = {"student": 1, "teacher": 2, "course": 3}
+
+# The indexed text of each kind; ``o`` is the object's own table
+SOURCES = {
+    "student": (
+        "SELECT o.id * 4 + 1, trim(u.first_name || ' ' || u.last_name), "
+        "u.username || ' ' || o.roll_no || ' ' || o.class_name "
+        "FROM students_student o JOIN auth_user u ON u.id = o.user_id"
+    ),
+    "teacher": (
+        "SELECT o.id * 4 + 2, trim(u.first_name || ' ' || u.last_name), "
+        "u.username || ' ' || o.employee_id || ' ' || o.department "
+        "FROM teachers_teacher o JOIN auth_user u ON u.id = o.user_id"
+    ),
+    "course": "SELECT o.id * 4 + 3, o.name, o.code FROM courses_course o",
+}
+
+TABLES = {
+    "student": "students_student",
+    "teacher": "teachers_teacher",
+    "course": "courses_course",
+}
+
+
+def _reindex(kind, where, params, new=False):
+    """Replace the index rows of the ``kind`` objects matching ``where``."""
+    with connection.cursor() as cursor:
+        if not new:
+            cursor.execute(
+                f"DELETE FROM search_index WHERE rowid IN "
+                f"(SELECT o.id * 4 + {KINDS[kind]} FROM {TABLES[kind]} o WHERE {where})",
+                params,
+            )
+        cursor.execute(
+            f"INSERT INTO search_index (rowid, title, detail) "
+            f"{SOURCES[kind]} WHERE {where}",
+            params,
+        )
+
+
+def index_objects(kind, ids, new=False):
+    """
+    (Re)index the ``kind`` ("student", "teacher", "course") objects
+    ``ids``; ``new`` objects have no rows to replace yet.
+    """
+    ids = list(ids)
+    if ids:
+        _reindex(kind, f"o.id IN ({', '.join(['%s'] * len(ids))})", ids, new=new)
+
+
+def index_user(user_id):
+    """Reindex the student or teacher behind ``user_id`` (a renamed user)."""
+    for kind in ("student", "teacher"):
+        _reindex(kind, "o.user_id = %s", [user_id])
+
+
+def unindex_object(kind, object_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM search_index WHERE rowid = %s",
+            [object_id * 4 + KINDS[kind]],
+        )
+
+
+def rebuild_index():
+    """Empty the index and fill it again from the tables; returns the row count."""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM search_index")
+        for source in SOURCES.values():
+            cursor.execute(f"INSERT INTO search_index (rowid, title, detail) {source}")
+        # merge the freshly written segments into one
+        cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        cursor.execute("SELECT count(*) FROM search_index")
+        return cursor.fetchone()[0]
+
+
+def match_expression(query):
+    """
+    Every word of ``query`` as a quoted prefix phrase, so "jo sm" finds
+    John Smith and "seed-r00" the roll numbers starting with it, and FTS5
+    syntax typed by the user is never interpreted.
+    """
+    return " ".join(
+        '"{}"*'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def search(query, limit=None):
+    """
+    The best ``limit`` (default ``SEARCH_RESULTS_LIMIT``) matches for
+    ``query``, best first, as dicts of kind, id, title and detail.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+
+    kinds = {code: kind for kind, code in KINDS.items()}
+    with connection.cursor() as cursor:
+        # rank is bm25 with the title weighted over the detail line (see
+        # the migration)
+        cursor.execute(
+            "SELECT rowid, title, detail FROM search_index "
+            "WHERE search_index MATCH %s ORDER BY rank LIMIT %s",
+            [expression, limit or settings.SEARCH_RESULTS_LIMIT],
+        )
+        return [
+            {"kind": kinds[rowid % 4], "id": rowid // 4, "title": title, "detail": detail}
+            for rowid, title, detail in cursor.fetchall()
+        ]
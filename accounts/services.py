@@ -0,0 +1,84 @@
+"""
+Account creation.
+
+``create_account`` / ``bulk_create_accounts`` write the User, its Profile
+with the final role and the Student / Teacher record in one transaction,
+one INSERT per table. The ``post_save`` profile signal is told to stand
+aside so it does not insert a default STUDENT profile first; bulk
+inserts add their Student / Teacher rows to the search index
+themselves.
+"""
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from config.db import retry_on_locked
+from students.models import Student
+from teachers.models import Teacher
+from . import search
+from .models import Profile
+
+
+ROLE_MODELS = {
+    "ADMIN": None,
+    "STUDENT": Student,
+    "TEACHER": Teacher,
+}
+
+USER_FIELDS = ("username", "password", "first_name", "last_name")
+
+
+@retry_on_locked
+def create_account(role, username, password, first_name="", last_name="", **fields):
+    """
+    Create a user with ``role``; ``fields`` go to the Student / Teacher
+    record (e.g. ``roll_no`` and ``class_name`` for students).
+    """
+    model = ROLE_MODELS[role]
+    user = User(username=username, first_name=first_name, last_name=last_name)
+    user.set_password(password)
+    user._skip_default_profile = True
+
+    with transaction.atomic():
+        user.save()
+        user.profile = Profile.objects.create(user=user, role=role)
+        if model is not None:
+            model.objects.create(user=user, **fields)
+    return user
+
+
+@retry_on_locked
+def bulk_create_accounts(role, rows, hashed=False):
+    """
+    Create one account per dict in ``rows`` with a single bulk INSERT per
+    table. Each row holds ``username`` and ``password`` (already hashed if
+    ``hashed``), optional ``first_name`` / ``last_name`` and the
+    Student / Teacher fields.
+    """
+    model = ROLE_MODELS[role]
+    users = [
+        User(
+            username=row["username"],
+            first_name=row.get("first_name", ""),
+            last_name=row.get("last_name", ""),
+            password=row["password"] if hashed else make_password(row["password"]),
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        Profile.objects.bulk_create([Profile(user=user, role=role) for user in users])
+        if model is not None:
+            records = model.objects.bulk_create([
+                model(user=user, **{
+                    key: value for key, value in row.items()
+                    if key not in USER_FIELDS
+                })
+                for row, user in zip(rows, users)
+            ])
+            # bulk_create sends no post_save for the search index receivers
+            search.index_objects(
+                model._meta.model_name, [record.pk for record in records], new=True
+            )
+    return users
@@ -1,3 +1,395 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Course
+from students.models import Student
+from teachers.models import Teacher
+from .importers import AccountImporter
+from .management.commands.check_query_plans import FULL_SCAN
+from .models import Profile
+from .search import rebuild_index, search
+from .services import bulk_create_accounts, create_account
+
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def make_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+STUDENT_HEADER = ["username", "password", "first_name", "last_name", "roll_no", "class_name"]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AccountImporterTests(TestCase):
+    def setUp(self):
+        existing = User.objects.create_user(username="taken")
+        Student.objects.create(user=existing, roll_no="R0", class_name="9A")
+
+    def rows(self):
+        return [
+            ["amy", "pw1", "Amy", "A", "R1", "10A"],
+            ["taken", "pw2", "Dup", "User", "R2", "10A"],
+            ["bob", "pw3", "Bob", "B", "R0", "10A"],
+            ["amy", "pw4", "Amy", "Again", "R4", "10A"],
+            ["cat", "", "Cat", "C", "R5", "10A"],
+            ["dan", "pw6", "Dan", "D", "R6", "10B"],
+            ["eve", "pw7", "Eve", "E", "R7", "10B"],
+        ]
+
+    def test_import_students_in_chunks(self):
+        errors = io.StringIO()
+        seen = []
+        importer = AccountImporter(
+            "STUDENT", chunk_size=3, workers=1,
+            error_file=errors, progress=lambda r: seen.append(r.processed),
+        )
+
+        result = importer.run(make_csv(STUDENT_HEADER, self.rows()))
+
+        self.assertEqual((result.created, result.failed), (3, 4))
+        self.assertEqual(seen, [3, 6, 7])
+        self.assertEqual(
+            set(Student.objects.values_list("roll_no", flat=True)),
+            {"R0", "R1", "R6", "R7"},
+        )
+        amy = User.objects.get(username="amy")
+        self.assertEqual(amy.profile.role, "STUDENT")
+        self.assertEqual(amy.last_name, "A")
+        self.assertTrue(amy.check_password("pw1"))
+
+        lines = list(csv.reader(io.StringIO(errors.getvalue())))
+        self.assertEqual(lines[0], ["line", "username", "roll_no", "error"])
+        self.assertEqual([line[0] for line in lines[1:]], ["3", "4", "5", "6"])
+
+    def test_import_teachers_with_process_pool(self):
+        header = ["username", "password", "first_name", "last_name", "employee_id", "department"]
+        rows = [[f"t{i}", f"pw{i}", "T", str(i), f"E{i}", "Maths"] for i in range(6)]
+
+        result = AccountImporter("TEACHER", chunk_size=4, workers=2).run(
+            make_csv(header, rows)
+        )
+
+        self.assertEqual(result.created, 6)
+        teacher = Teacher.objects.select_related("user__profile").get(employee_id="E5")
+        self.assertEqual(teacher.user.profile.role, "TEACHER")
+        self.assertTrue(teacher.user.check_password("pw5"))
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            AccountImporter("STUDENT", workers=1).run(make_csv(["username"], []))
+
+    def test_command_writes_error_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "students.csv")
+            error_path = os.path.join(tmp, "errors.csv")
+            with open(source, "w", newline="") as f:
+                f.write(make_csv(STUDENT_HEADER, self.rows()).getvalue())
+
+            out = io.StringIO()
+            call_command(
+                "import_accounts", "student", source, "--workers", "1",
+                "--errors", error_path, stdout=out, stderr=io.StringIO(),
+            )
+
+            self.assertIn("Imported 3 student accounts, rejected 4.", out.getvalue())
+            with open(error_path) as f:
+                self.assertEqual(len(f.readlines()), 5)
+
+    def upload(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile(
+            "students.csv",
+            make_csv(STUDENT_HEADER, self.rows()).getvalue().encode(),
+            content_type="text/csv",
+        )
+        return self.client.post(
+            reverse("account_import"), {"role": "STUDENT", "file": upload}
+        )
+
+    def test_admin_upload(self):
+        response = self.upload()
+
+        self.assertContains(response, "Imported 3 accounts, rejected 4.")
+        self.assertEqual(len(response.context["result"].errors), 4)
+        lines = list(csv.reader(io.StringIO(
+            base64.b64decode(response.context["error_csv"]).decode()
+        )))
+        self.assertEqual(lines[0], ["line", "username", "roll_no", "error"])
+        self.assertEqual([line[0] for line in lines[1:]], ["3", "4", "5", "6"])
+        self.assertContains(response, 'download="import-errors.csv"')
+
+    @override_settings(ACCOUNT_IMPORT_MAX_ROWS=6)
+    def test_large_uploads_are_sent_to_the_command(self):
+        response = self.upload()
+
+        self.assertNotIn("result", response.context)
+        self.assertContains(response, "The file has 7 rows; uploads take at most 6.")
+        self.assertContains(response, "python manage.py import_accounts student")
+        self.assertFalse(User.objects.filter(username="amy").exists())
+
+
+class RoleRequiredTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="student")
+
+    def test_anonymous_user_is_sent_to_login(self):
+        response = self.client.get(reverse("student_list"))
+
+        self.assertRedirects(
+            response, reverse("login") + "?next=" + reverse("student_list")
+        )
+
+    def test_wrong_role_is_sent_to_login(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("student_list"))
+
+        self.assertRedirects(response, reverse("login"))
+
+    def test_role_is_loaded_with_the_user(self):
+        self.client.force_login(self.user)
+
+        # session, user joined with profile / student / teacher
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("teacher_list"))
+        self.assertRedirects(response, reverse("login"))
+
+    def test_role_change_applies_on_next_request(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("course_list")).status_code, 302)
+
+        self.user.profile.role = "ADMIN"
+        self.user.profile.save()
+
+        self.assertEqual(self.client.get(reverse("course_list")).status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AccountServiceTests(TestCase):
+    def test_create_teacher_in_three_inserts(self):
+        # savepoint, user, profile, teacher, search index row, release
+        with self.assertNumQueries(6):
+            user = create_account(
+                "TEACHER", username="t1", password="pw",
+                first_name="Tess", last_name="T",
+                employee_id="E1", department="Maths",
+            )
+
+        user = User.objects.select_related("profile", "teacher").get(pk=user.pk)
+        self.assertEqual(user.profile.role, "TEACHER")
+        self.assertEqual(user.teacher.employee_id, "E1")
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+        self.assertTrue(user.check_password("pw"))
+
+    def test_create_admin_has_no_record(self):
+        user = create_account("ADMIN", username="boss", password="pw")
+
+        self.assertEqual(user.profile.role, "ADMIN")
+        self.assertFalse(Student.objects.exists() or Teacher.objects.exists())
+
+    def test_failure_rolls_back_everything(self):
+        create_account("STUDENT", username="s1", password="pw", roll_no="R1", class_name="A")
+
+        with self.assertRaises(IntegrityError):
+            create_account("STUDENT", username="s2", password="pw", roll_no="R1", class_name="A")
+
+        self.assertFalse(User.objects.filter(username="s2").exists())
+
+    def test_bulk_create_students(self):
+        rows = [
+            {"username": f"s{i}", "password": "pw", "roll_no": f"R{i}", "class_name": "10A"}
+            for i in range(5)
+        ]
+
+        # savepoint, users, profiles, students, search index rows, release
+        with self.assertNumQueries(6):
+            users = bulk_create_accounts("STUDENT", rows)
+
+        self.assertEqual(Profile.objects.filter(role="STUDENT").count(), 5)
+        student = Student.objects.select_related("user").get(roll_no="R3")
+        self.assertEqual(student.user, users[3])
+        self.assertTrue(student.user.check_password("pw"))
+
+    def test_plain_user_still_gets_default_profile(self):
+        user = User.objects.create_user(username="plain")
+
+        self.assertEqual(user.profile.role, "STUDENT")
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SyntheticLoadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_and_benchmark(self):
+        call_command(
+            "seed_school", students=30, teachers=3, courses=4, per_course=10,
+            days=3, classes=2, stdout=io.StringIO(),
+        )
+
+        self.assertEqual(Student.objects.filter(roll_no__startswith="SEED-").count(), 30)
+        self.assertEqual(Course.students.through.objects.count(), 40)
+        self.assertEqual(Teacher.objects.get(employee_id="SEED-E00000").user.profile.role, "TEACHER")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            call_command(
+                "bench_views", requests=3, warmup=0, host="testserver", output=output,
+                stdout=io.StringIO(),
+            )
+            with open(output) as f:
+                results = json.load(f)["results"]
+
+        self.assertEqual(
+            set(results),
+            {"login_view", "student_dashboard", "teacher_dashboard",
+             "take_attendance", "course_list", "student_list", "teacher_list"},
+        )
+        self.assertEqual(results["student_dashboard"]["queries"], 3)
+        # the streamed course rows are counted too
+        self.assertEqual(results["course_list"]["queries"], 4)
+        self.assertGreater(results["course_list"]["throughput_rps"], 0)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class QueryPlanTests(TestCase):
+    def test_views_do_not_scan_whole_tables(self):
+        call_command(
+            "seed_school", students=30, teachers=3, courses=4, per_course=10,
+            days=2, classes=2, stdout=io.StringIO(),
+        )
+        out = io.StringIO()
+
+        call_command("check_query_plans", host="testserver", stdout=out)
+
+        self.assertIn("No unexpected full table scans.", out.getvalue())
+
+    def test_missing_seeded_accounts(self):
+        User.objects.create_user(username="seed-admin")
+
+        with self.assertRaisesMessage(CommandError, "No seeded teacher, student account"):
+            call_command("check_query_plans", stdout=io.StringIO())
+
+    def test_index_scans_count_as_full_scans(self):
+        for plan, tables in [
+            ("SCAN students_student", ["students_student"]),
+            ("SCAN students_student USING INDEX sqlite_autoindex_students_student_1",
+             ["students_student"]),
+            ("SCAN students_student USING COVERING INDEX students_class_name",
+             ["students_student"]),
+            ("SEARCH students_student USING INTEGER PRIMARY KEY (rowid=?)", []),
+            ("SCAN search_index VIRTUAL TABLE INDEX 0:M2", []),
+            ("SCAN CONSTANT ROW", []),
+        ]:
+            with self.subTest(plan):
+                self.assertEqual(FULL_SCAN.findall(plan), tables)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.admin = create_account("ADMIN", username="admin", password="pw")
+        self.john = create_account(
+            "STUDENT", username="jsmith", password="pw", first_name="John",
+            last_name="Smith", roll_no="R-1001", class_name="10A",
+        )
+        bulk_create_accounts("STUDENT", [
+            {"username": "mjones", "password": "pw", "first_name": "Mary",
+             "last_name": "Jones", "roll_no": "R-1002", "class_name": "10B"},
+        ])
+        self.teacher = create_account(
+            "TEACHER", username="ateach", password="pw", first_name="Ann",
+            last_name="Smithers", employee_id="EMP-7", department="Physics",
+        )
+        self.course = Course.objects.create(name="Physics", code="PHY-101", total_lectures=10)
+
+    def titles(self, query):
+        return [result["title"] for result in search(query)]
+
+    def test_prefix_search_across_kinds(self):
+        self.assertEqual(self.titles("joh"), ["John Smith"])
+        self.assertEqual(self.titles("r-100"), ["John Smith", "Mary Jones"])
+        self.assertEqual(self.titles("emp-7"), ["Ann Smithers"])
+        self.assertEqual(self.titles("10b"), ["Mary Jones"])
+        self.assertEqual(self.titles("jo sm"), ["John Smith"])
+
+        results = search("phy")
+        # the course name outranks the teacher's department
+        self.assertEqual(
+            [(r["kind"], r["id"]) for r in results],
+            [("course", self.course.id), ("teacher", self.teacher.teacher.id)],
+        )
+
+    def test_user_input_is_not_fts_syntax(self):
+        for query in ['"', "jo AND", "NEAR(", "*", "a:b"]:
+            search(query)
+        self.assertEqual(search("   "), [])
+
+    def test_signals_keep_the_index_in_step(self):
+        self.john.first_name = "Jonathan"
+        self.john.save()
+        self.assertEqual(self.titles("jonat"), ["Jonathan Smith"])
+
+        self.course.code = "SCI-9"
+        self.course.save()
+        self.assertEqual(self.titles("sci"), ["Physics"])
+        self.assertEqual(self.titles("phy-1"), [])
+
+        self.john.delete()
+        self.course.delete()
+        self.assertEqual(self.titles("smith"), ["Ann Smithers"])
+
+    def test_login_does_not_reindex(self):
+        with self.assertNumQueries(1):
+            self.john.save(update_fields=["last_login"])
+
+    def test_rebuild(self):
+        Student.objects.update(class_name="11C")
+        self.assertEqual(self.titles("11c"), [])
+
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 4 rows", out.getvalue())
+        self.assertEqual(self.titles("11c"), ["John Smith", "Mary Jones"])
+        self.assertEqual(rebuild_index(), 4)
+
+    def test_search_page(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse("global_search"), {"q": "smith"})
+
+        self.assertEqual(
+            [r["url"] for r in response.context["results"]],
+            [
+                reverse("student_edit", args=[self.john.student.id]),
+                reverse("teacher_edit", args=[self.teacher.teacher.id]),
+            ],
+        )
+        self.assertContains(response, 'action="%s"' % reverse("global_search"))
+
+        self.client.force_login(self.john)
+        response = self.client.get(reverse("global_search"), {"q": "smith"})
+        self.assertRedirects(response, reverse("login"), fetch_redirect_response=False)
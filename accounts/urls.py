@@ -6,6 +6,8 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
 
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('import/', views.account_import, name='account_import'),
+    path('search/', views.global_search, name='global_search'),
     path('teacher-dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
     path('student-dashboard/', views.student_dashboard, name='student_dashboard'),
 ]
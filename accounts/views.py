@@ -1,7 +1,17 @@
+import base64
+import csv
+import io
+
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 
+from .decorators import role_required
+from .importers import IMPORT_ROLES, AccountImporter
+from .search import search
+
 def login_view(request):
     if request.method == "POST":
         username = request.POST.get('username')
@@ -32,16 +42,73 @@ def logout_view(request):
     return redirect('login')
 
 
-@login_required
+@role_required("ADMIN")
 def admin_dashboard(request):
     return render(request, 'admin/dashboard.html')
 
 
-@login_required
+@role_required("TEACHER")
 def teacher_dashboard(request):
     return render(request, 'teacher/dashboard.html')
 
 
-@login_required
+@role_required("STUDENT")
 def student_dashboard(request):
     return render(request, 'student/dashboard.html')
+
+
+@role_required("ADMIN")
+def account_import(request):
+    max_rows = settings.ACCOUNT_IMPORT_MAX_ROWS
+    context = {"max_rows": max_rows}
+
+    if request.method == "POST":
+        role = request.POST.get("role")
+        upload = request.FILES.get("file")
+
+        if role not in IMPORT_ROLES or upload is None:
+            context["error"] = "Choose a role and a CSV file."
+            return render(request, "admin/accounts/import.html", context)
+
+        csv_file = io.TextIOWrapper(upload, encoding="utf-8-sig")
+        errors = io.StringIO()
+        # hashed here in the request: no process pool forked from the server
+        importer = AccountImporter(role, workers=1, error_file=errors, keep_errors=max_rows)
+        try:
+            rows = sum(1 for _ in csv.reader(csv_file)) - 1
+            if rows > max_rows:
+                raise ValueError(
+                    f"The file has {rows} rows; uploads take at most {max_rows}. "
+                    f"Import it with: python manage.py import_accounts "
+                    f"{role.lower()} <file> --errors <errors.csv>"
+                )
+            csv_file.seek(0)
+            result = importer.run(csv_file)
+        except (UnicodeDecodeError, ValueError) as exc:
+            context["error"] = str(exc)
+        else:
+            context["result"] = result
+            if result.failed:
+                context["error_csv"] = base64.b64encode(errors.getvalue().encode()).decode()
+
+    return render(request, "admin/accounts/import.html", context)
+
+
+SEARCH_RESULT_URLS = {
+    "student": "student_edit",
+    "teacher": "teacher_edit",
+    "course": "course_edit",
+}
+
+
+@role_required("ADMIN")
+def global_search(request):
+    query = request.GET.get("q", "").strip()
+    results = search(query)
+    for result in results:
+        result["url"] = reverse(SEARCH_RESULT_URLS[result["kind"]], args=[result["id"]])
+
+    return render(request, "admin/accounts/search.html", {
+        "query": query,
+        "results": results,
+    })
@@ -0,0 +1,38 @@
+"""
+Packed bitsets for the ``bitmap`` attendance storage mode.
+
+Bit ``n`` of a register belongs to the student holding roster position
+``n`` in that course (see ``RosterSlot``). Positions are assigned once and
+never reused, so old registers stay readable when the roster changes.
+"""
+
+
+def pack(positions):
+    """Pack an iterable of bit positions into little-endian bytes."""
+    positions = list(positions)
+    if not positions:
+        return b""
+    data = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return bytes(data)
+
+
+def unpack(data):
+    """Return the set of bit positions that are set in ``data``."""
+    positions = set()
+    for index, byte in enumerate(bytes(data)):
+        while byte:
+            low = byte & -byte
+            positions.add(index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+def has_bit(data, position):
+    index = position >> 3
+    return index < len(data) and bool(data[index] >> (position & 7) & 1)
+
+
+def count(data):
+    return int.from_bytes(bytes(data), "little").bit_count()
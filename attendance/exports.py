@@ -0,0 +1,136 @@
+"""
+Streaming export of attendance registers.
+
+Rows come from a chunked server-side iterator and are encoded in small
+batches, so memory use stays flat however large the register is.
+"""
+import csv
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import Attendance, AttendanceBitmap, RosterSlot
+from . import bitmap
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is optional
+    Workbook = None
+
+
+EXPORT_HEADER = (
+    "date", "course_code", "course_name",
+    "roll_no", "username", "class_name", "status",
+)
+
+CHUNK_SIZE = 2000
+
+
+def register_rows(course=None, class_name=None, start=None, end=None):
+    """Yield one ``EXPORT_HEADER`` tuple per attendance mark."""
+    if settings.ATTENDANCE_STORAGE == "bitmap":
+        yield from _bitmap_rows(course, class_name, start, end)
+        return
+
+    marks = Attendance.objects.all()
+    if course is not None:
+        marks = marks.filter(course=course)
+    if class_name:
+        marks = marks.filter(student__class_name=class_name)
+    if start:
+        marks = marks.filter(date__gte=start)
+    if end:
+        marks = marks.filter(date__lte=end)
+
+    marks = marks.order_by("date", "course_id", "student_id").values_list(
+        "date", "course__code", "course__name",
+        "student__roll_no", "student__user__username", "student__class_name",
+        "is_present",
+    )
+    for *row, is_present in marks.iterator(chunk_size=CHUNK_SIZE):
+        row[0] = row[0].isoformat()
+        row.append("Present" if is_present else "Absent")
+        yield row
+
+
+def _bitmap_rows(course, class_name, start, end):
+    registers = AttendanceBitmap.objects.all()
+    if course is not None:
+        registers = registers.filter(course=course)
+    if start:
+        registers = registers.filter(date__gte=start)
+    if end:
+        registers = registers.filter(date__lte=end)
+
+    registers = registers.order_by("date", "course_id").values_list(
+        "course_id", "course__code", "course__name", "date", "marked", "present",
+    )
+    rosters = {}
+    for course_id, code, name, day, marked, present in registers.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        if course_id not in rosters:
+            slots = RosterSlot.objects.filter(course_id=course_id)
+            if class_name:
+                slots = slots.filter(student__class_name=class_name)
+            rosters[course_id] = list(slots.order_by("student_id").values_list(
+                "position", "student__roll_no",
+                "student__user__username", "student__class_name",
+            ))
+        for position, roll_no, username, student_class in rosters[course_id]:
+            if bitmap.has_bit(marked, position):
+                yield [
+                    day.isoformat(), code, name, roll_no, username, student_class,
+                    "Present" if bitmap.has_bit(present, position) else "Absent",
+                ]
+
+
+class Echo:
+    """File-like object whose ``write`` hands the encoded line back."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows, batch_size=500, header=EXPORT_HEADER):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def csv_response(rows, filename, header=EXPORT_HEADER):
+    return StreamingHttpResponse(
+        csv_chunks(rows, header=header),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+    )
+
+
+def xlsx_response(rows, filename):
+    """
+    XLSX is a zip archive, so it cannot be streamed row by row; the
+    write-only workbook spools rows to disk instead of holding them.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Attendance")
+    sheet.append(EXPORT_HEADER)
+    for row in rows:
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
@@ -0,0 +1,96 @@
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.management.seeded import throwaway_database
+from attendance.exports import csv_response, register_rows
+from attendance.models import Attendance
+from courses.models import Course
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure CSV export throughput and peak memory on a synthetic "
+        "register built in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--courses", type=int, default=20)
+        parser.add_argument("--students", type=int, default=250)
+
+    def handle(self, *args, rows, courses, students, **options):
+        with throwaway_database():
+            days = self.seed(rows, courses, students)
+            total = self.run_export()
+            self.stdout.write(
+                f"{total['rows']} rows, {total['bytes'] / 1024 / 1024:.1f} MiB "
+                f"in {total['seconds']:.2f}s "
+                f"({total['rows'] / total['seconds']:,.0f} rows/s)"
+            )
+
+            # peak memory for a tenth of the register vs all of it
+            first_days = date.today() - timedelta(days=days - max(1, days // 10))
+            small = self.run_export(end=first_days, trace=True)
+            full = self.run_export(trace=True)
+            for label, result in (("10% export", small), ("full export", full)):
+                self.stdout.write(
+                    f"{label}: {result['rows']} rows, "
+                    f"peak {result['peak'] / 1024:.0f} KiB traced"
+                )
+
+    def seed(self, rows, courses, students):
+        days = max(1, rows // (courses * students))
+        users = User.objects.bulk_create(
+            User(username=f"bench{i}") for i in range(students)
+        )
+        roster = Student.objects.bulk_create(
+            Student(user=user, roll_no=f"B{i:06}", class_name=f"C{i % 8}")
+            for i, user in enumerate(users)
+        )
+        course_list = Course.objects.bulk_create(
+            Course(name=f"Bench {i}", code=f"BENCH{i}", total_lectures=days)
+            for i in range(courses)
+        )
+
+        today = date.today()
+        batch = []
+        for n in range(days):
+            day = today - timedelta(days=n)
+            for course in course_list:
+                for student in roster:
+                    present = (student.id + n) % 7 != 0
+                    batch.append(Attendance(
+                        course=course, student=student, date=day,
+                        is_present=present, is_absent=not present,
+                    ))
+            if len(batch) >= 20_000:
+                Attendance.objects.bulk_create(batch)
+                batch = []
+        Attendance.objects.bulk_create(batch)
+        return days
+
+    def run_export(self, end=None, trace=False):
+        if trace:
+            tracemalloc.start()
+        began = time.perf_counter()
+
+        response = csv_response(register_rows(end=end), "bench")
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+
+        result = {
+            "rows": lines - 1,
+            "bytes": size,
+            "seconds": time.perf_counter() - began,
+        }
+        if trace:
+            result["peak"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return result
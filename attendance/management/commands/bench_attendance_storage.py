@@ -0,0 +1,181 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from attendance import bitmap
+
+
+ROWS_SCHEMA = """
+CREATE TABLE attendance_attendance (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    date date NOT NULL,
+    is_present bool NOT NULL,
+    course_id bigint NOT NULL,
+    student_id bigint NOT NULL,
+    is_absent bool NOT NULL
+);
+CREATE UNIQUE INDEX attendance_unique
+    ON attendance_attendance (course_id, student_id, date);
+CREATE INDEX attendance_course ON attendance_attendance (course_id);
+CREATE INDEX attendance_student ON attendance_attendance (student_id);
+"""
+
+BITMAP_SCHEMA = """
+CREATE TABLE attendance_rosterslot (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    position integer unsigned NOT NULL,
+    course_id bigint NOT NULL,
+    student_id bigint NOT NULL
+);
+CREATE UNIQUE INDEX rosterslot_student ON attendance_rosterslot (course_id, student_id);
+CREATE UNIQUE INDEX rosterslot_position ON attendance_rosterslot (course_id, position);
+CREATE INDEX rosterslot_course ON attendance_rosterslot (course_id);
+CREATE INDEX rosterslot_by_student ON attendance_rosterslot (student_id);
+CREATE TABLE attendance_attendancebitmap (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    date date NOT NULL,
+    marked BLOB NOT NULL,
+    present BLOB NOT NULL,
+    course_id bigint NOT NULL
+);
+CREATE UNIQUE INDEX attendancebitmap_unique
+    ON attendance_attendancebitmap (course_id, date);
+CREATE INDEX attendancebitmap_course ON attendance_attendancebitmap (course_id);
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare database size and per-student query time of row-per-mark "
+        "and bitmap attendance storage on a synthetic register."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--per-course", type=int, default=60)
+        parser.add_argument("--days", type=int, default=180)
+        parser.add_argument("--lookups", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rosters = {
+            course_id: rng.sample(range(1, options["students"] + 1), options["per_course"])
+            for course_id in range(1, options["courses"] + 1)
+        }
+        start = date.today() - timedelta(days=options["days"])
+        days = [(start + timedelta(days=n)).isoformat() for n in range(options["days"])]
+        register = {
+            (course_id, day): {sid for sid in roster if rng.random() < 0.85}
+            for course_id, roster in rosters.items()
+            for day in days
+        }
+        lookups = [rng.randint(1, options["students"]) for _ in range(options["lookups"])]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            results = {}
+            for name, build, query in (
+                ("rows", self.build_rows, self.query_rows),
+                ("bitmap", self.build_bitmap, self.query_bitmap),
+            ):
+                path = os.path.join(tmp, f"{name}.sqlite3")
+                conn = sqlite3.connect(path)
+                build(conn, rosters, register)
+                conn.execute("VACUUM")
+                conn.close()
+
+                conn = sqlite3.connect(path)
+                began = time.perf_counter()
+                answers = [query(conn, student_id) for student_id in lookups]
+                elapsed = time.perf_counter() - began
+                conn.close()
+
+                results[name] = (os.path.getsize(path), elapsed, answers)
+
+        if results["rows"][2] != results["bitmap"][2]:
+            self.stderr.write(self.style.ERROR("Storage modes disagree!"))
+
+        marks = sum(len(roster) for roster in rosters.values()) * len(days)
+        self.stdout.write(f"{marks} marks, {len(register)} course-days, "
+                          f"{len(lookups)} per-student lookups")
+        for name, (size, elapsed, _) in results.items():
+            self.stdout.write(
+                f"{name:>7}: {size / 1024 / 1024:8.2f} MiB  "
+                f"{elapsed * 1000 / len(lookups):8.3f} ms/lookup"
+            )
+
+    def build_rows(self, conn, rosters, register):
+        conn.executescript(ROWS_SCHEMA)
+        conn.executemany(
+            "INSERT INTO attendance_attendance "
+            "(course_id, student_id, date, is_present, is_absent) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (course_id, sid, day, sid in present, sid not in present)
+                for (course_id, day), present in register.items()
+                for sid in rosters[course_id]
+            ),
+        )
+        conn.commit()
+
+    def query_rows(self, conn, student_id):
+        return dict(conn.execute(
+            "SELECT course_id, COUNT(*) FROM attendance_attendance "
+            "WHERE student_id = ? AND is_present GROUP BY course_id",
+            (student_id,),
+        ).fetchall())
+
+    def build_bitmap(self, conn, rosters, register):
+        conn.executescript(BITMAP_SCHEMA)
+        positions = {
+            course_id: {sid: n for n, sid in enumerate(roster)}
+            for course_id, roster in rosters.items()
+        }
+        conn.executemany(
+            "INSERT INTO attendance_rosterslot (course_id, student_id, position) "
+            "VALUES (?, ?, ?)",
+            (
+                (course_id, sid, n)
+                for course_id, slots in positions.items()
+                for sid, n in slots.items()
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO attendance_attendancebitmap "
+            "(course_id, date, marked, present) VALUES (?, ?, ?, ?)",
+            (
+                (
+                    course_id,
+                    day,
+                    bitmap.pack(positions[course_id].values()),
+                    bitmap.pack(positions[course_id][sid] for sid in present),
+                )
+                for (course_id, day), present in register.items()
+            ),
+        )
+        conn.commit()
+
+    def query_bitmap(self, conn, student_id):
+        slots = dict(conn.execute(
+            "SELECT course_id, position FROM attendance_rosterslot "
+            "WHERE student_id = ?",
+            (student_id,),
+        ).fetchall())
+        if not slots:
+            return {}
+        counts = dict.fromkeys(slots, 0)
+        rows = conn.execute(
+            "SELECT course_id, present FROM attendance_attendancebitmap "
+            f"WHERE course_id IN ({', '.join('?' * len(slots))})",
+            list(slots),
+        )
+        for course_id, present in rows:
+            if bitmap.has_bit(present, slots[course_id]):
+                counts[course_id] += 1
+        return {course_id: n for course_id, n in counts.items() if n}
@@ -0,0 +1,82 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from accounts.management.seeded import throwaway_database
+from accounts.services import create_account
+from attendance.models import attendance_store
+from attendance.register import build_register
+from courses.models import Course
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the attendance register grid (build, HTML page and CSV "
+        "export) for one course on a synthetic term in a throwaway test "
+        "database. Honours ATTENDANCE_STORAGE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=300)
+        parser.add_argument("--days", type=int, default=180)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, students, days, repeat, host, **options):
+        with throwaway_database():
+            course, start, end = self.seed(students, days)
+            admin = create_account("ADMIN", username="bench-admin", password="bench")
+            client = Client(HTTP_HOST=host)
+            client.force_login(admin)
+            url = reverse("attendance_register", args=[course.id])
+            params = {"start": start.isoformat(), "end": end.isoformat()}
+
+            def page():
+                response = client.get(url, params)
+                assert response.status_code == 200, response.status_code
+
+            def export():
+                response = client.get(url, {**params, "format": "csv"})
+                b"".join(response.streaming_content)
+
+            self.stdout.write(f"{students} students x {days} lectures")
+            for label, run in (
+                ("build", lambda: build_register(course, start, end)),
+                ("page", page),
+                ("csv", export),
+            ):
+                timings = []
+                for _ in range(repeat):
+                    began = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - began)
+                self.stdout.write(
+                    f"{label:<6} median {statistics.median(timings) * 1000:7.1f} ms, "
+                    f"best {min(timings) * 1000:7.1f} ms"
+                )
+
+    def seed(self, students, days):
+        users = User.objects.bulk_create(
+            User(username=f"bench{i}", first_name="Bench", last_name=str(i))
+            for i in range(students)
+        )
+        roster = Student.objects.bulk_create(
+            Student(user=user, roll_no=f"B{i:06}", class_name="BENCH")
+            for i, user in enumerate(users)
+        )
+        course = Course.objects.create(name="Bench", code="BENCH", total_lectures=days)
+        course.students.set(roster)
+
+        store = attendance_store()
+        ids = [student.id for student in roster]
+        end = date.today()
+        for n in range(days):
+            present = [pk for pk in ids if (pk + n) % 7]
+            store.bulk_mark(course, ids, present, end - timedelta(days=n))
+        return course, end - timedelta(days=days - 1), end
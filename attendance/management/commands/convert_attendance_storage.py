@@ -0,0 +1,109 @@
+from collections import defaultdict
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from attendance import bitmap
+from attendance.models import Attendance, AttendanceBitmap, RosterSlot
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert row-per-mark Attendance into AttendanceBitmap registers. "
+        "Course-days that already have a register are skipped and reported, "
+        "and their rows are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--delete-rows", action="store_true",
+            help="Delete the converted Attendance rows afterwards.",
+        )
+
+    def handle(self, *args, batch_size, delete_rows, **options):
+        marks = (
+            Attendance.objects.order_by("course_id", "date")
+            .values_list("course_id", "date", "student_id", "is_present")
+            .iterator(chunk_size=5000)
+        )
+        registers = 0
+        # course id -> dates converted / skipped because a register exists
+        converted = defaultdict(list)
+        skipped = defaultdict(list)
+
+        with transaction.atomic():
+            pending = []
+            for course_id, course_marks in groupby(marks, key=lambda m: m[0]):
+                slots = dict(
+                    RosterSlot.objects.filter(course_id=course_id)
+                    .values_list("student_id", "position")
+                )
+                existing = set(
+                    AttendanceBitmap.objects.filter(course_id=course_id)
+                    .values_list("date", flat=True)
+                )
+                next_position = max(slots.values(), default=-1) + 1
+                new_slots = []
+
+                for day, day_marks in groupby(course_marks, key=lambda m: m[1]):
+                    if day in existing:
+                        skipped[course_id].append(day)
+                        continue
+
+                    marked, present = [], []
+                    for _, _, student_id, is_present in day_marks:
+                        if student_id not in slots:
+                            slots[student_id] = next_position
+                            new_slots.append(RosterSlot(
+                                course_id=course_id,
+                                student_id=student_id,
+                                position=next_position,
+                            ))
+                            next_position += 1
+                        marked.append(slots[student_id])
+                        if is_present:
+                            present.append(slots[student_id])
+
+                    pending.append(AttendanceBitmap(
+                        course_id=course_id,
+                        date=day,
+                        marked=bitmap.pack(marked),
+                        present=bitmap.pack(present),
+                    ))
+                    converted[course_id].append(day)
+
+                RosterSlot.objects.bulk_create(new_slots)
+                if len(pending) >= batch_size:
+                    registers += self.flush(pending)
+
+            registers += self.flush(pending)
+
+            if delete_rows:
+                # only the rows now held in a register; skipped days keep theirs
+                deleted = 0
+                for course_id, days in converted.items():
+                    deleted += Attendance.objects.filter(
+                        course_id=course_id, date__in=days
+                    ).delete()[0]
+                self.stdout.write(f"Deleted {deleted} attendance rows.")
+
+        for course_id, days in skipped.items():
+            self.stderr.write(self.style.WARNING(
+                f"Course {course_id}: skipped {len(days)} course-day(s) that "
+                f"already have a register, rows kept: "
+                + ", ".join(day.isoformat() for day in days)
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted {registers} course-day registers"
+            f" ({sum(map(len, skipped.values()))} skipped)."
+        ))
+
+    def flush(self, pending):
+        # course-days that already have a register were skipped above, so a
+        # conflict here is a concurrent write: fail rather than drop it
+        AttendanceBitmap.objects.bulk_create(pending)
+        written = len(pending)
+        pending.clear()
+        return written
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from attendance.rollups import last_rollup, rollup_attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Add attendance marked since the last run to the per-enrolment "
+        "summaries behind the defaulter report. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--through", help="Last date to include (YYYY-MM-DD); default yesterday.",
+        )
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Drop the summaries and roll up every mark again.",
+        )
+
+    def handle(self, *args, through, rebuild, **options):
+        if through is not None:
+            try:
+                through = parse_date(through)
+            except ValueError:
+                through = None
+            if through is None:
+                raise CommandError("--through must be a date (YYYY-MM-DD).")
+
+        run = rollup_attendance(through=through, rebuild=rebuild)
+        if run is None:
+            self.stdout.write(f"Already rolled up through {last_rollup().through}.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {run.marks} marks through {run.through}."
+        ))
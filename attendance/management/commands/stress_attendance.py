@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import Client
+from django.urls import reverse
+
+from accounts.management.seeded import seeded_database
+from attendance.models import Attendance
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Have many teachers submit attendance at the same instant from "
+        "parallel threads against a throwaway SQLite file, and report lock "
+        "errors and latency. --profile compares the plain SQLite settings "
+        "with the current DATABASES OPTIONS (e.g. DJANGO_DB_PROFILE=production)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--roster", type=int, default=60)
+        parser.add_argument(
+            "--profile", choices=["plain", "configured", "both"], default="both"
+        )
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, threads, roster, profile, host, **options):
+        configured = dict(settings.DATABASES["default"].get("OPTIONS", {}))
+        profiles = {"plain": {}, "configured": configured}
+        if profile != "both":
+            profiles = {profile: profiles[profile]}
+
+        for name, db_options in profiles.items():
+            result = self.run(db_options, threads, roster, host)
+            latencies = sorted(result["latencies"]) or [0]
+            self.stdout.write(
+                f"{name:>10}: {result['saved']}/{threads} submissions saved, "
+                f"{result['locked']} 'database is locked', "
+                f"{result['other']} other errors, "
+                f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                f"max {latencies[-1] * 1000:.0f} ms, "
+                f"{result['rows']} rows written"
+            )
+
+    def run(self, db_options, threads, roster, host):
+        with seeded_database(
+            on_disk=True, options=db_options, students=max(roster, 1) * 2,
+            teachers=threads, courses=threads, per_course=roster, days=0,
+            prefix="stress",
+        ):
+            return self.submit_all(host)
+
+    def submit_all(self, host):
+        courses = list(
+            Course.objects.filter(code__startswith="STRESS-")
+            .select_related("teacher__user").order_by("id")
+        )
+        rosters = {
+            course.id: list(course.students.values_list("id", flat=True))
+            for course in courses
+        }
+
+        barrier = threading.Barrier(len(courses))
+        lock = threading.Lock()
+        result = {"saved": 0, "locked": 0, "other": 0, "latencies": []}
+
+        def submit(course):
+            try:
+                client = Client(HTTP_HOST=host)
+                client.force_login(course.teacher.user)
+                url = reverse("take_attendance", args=[course.id])
+                present = rosters[course.id][::2]
+                barrier.wait()
+
+                started = time.perf_counter()
+                try:
+                    response = client.post(url, {"students": present})
+                    outcome = "saved" if response.status_code == 302 else "other"
+                except OperationalError as exc:
+                    outcome = "locked" if "locked" in str(exc) else "other"
+                except Exception:
+                    outcome = "other"
+                elapsed = time.perf_counter() - started
+
+                with lock:
+                    result[outcome] += 1
+                    result["latencies"].append(elapsed)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=submit, args=(c,)) for c in courses]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        result["rows"] = Attendance.objects.count()
+        return result
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_query_indexes'),
+        ('courses', '0003_student_course_index'),
+        ('students', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('through', models.DateField()),
+                ('marks', models.PositiveIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.student'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesummary',
+            index=models.Index(fields=['course', 'attended'], name='summary_course_attended_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancesummary',
+            unique_together={('student', 'course')},
+        ),
+    ]
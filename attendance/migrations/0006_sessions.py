@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:48
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from attendance import bitmap
+
+
+def backfill_sessions(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceBitmap = apps.get_model('attendance', 'AttendanceBitmap')
+    AttendanceSession = apps.get_model('attendance', 'AttendanceSession')
+    Course = apps.get_model('courses', 'Course')
+
+    sessions = {}
+    totals = Attendance.objects.values('course_id', 'date').annotate(
+        enrolled=models.Count('id'),
+        present=models.Count('id', filter=models.Q(is_present=True)),
+    )
+    for row in totals.iterator():
+        sessions[row['course_id'], row['date']] = (row['enrolled'], row['present'])
+    registers = AttendanceBitmap.objects.values_list('course_id', 'date', 'marked', 'present')
+    for course_id, date, marked, present in registers.iterator():
+        sessions[course_id, date] = (bitmap.count(marked), bitmap.count(present))
+
+    AttendanceSession.objects.bulk_create(
+        (
+            AttendanceSession(
+                course_id=course_id, date=date,
+                enrolled=enrolled, present=present, absent=enrolled - present,
+            )
+            for (course_id, date), (enrolled, present) in sessions.items()
+        ),
+        batch_size=1000,
+    )
+    held = Counter(course_id for course_id, _ in sessions)
+    for course_id, count in held.items():
+        Course.objects.filter(pk=course_id).update(lectures_held=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_rollups'),
+        ('courses', '0004_course_lectures_held'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+            ],
+            options={
+                'unique_together': {('course', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_sessions, migrations.RunPython.noop),
+    ]
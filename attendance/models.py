@@ -1,7 +1,177 @@
-from django.db import models
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from config.cache import invalidate_dashboards
+from config.db import retry_on_locked
 from courses.models import Course
 from students.models import Student
 
+from . import bitmap
+from .signals import attendance_marked
+
+
+class GroupConcat(models.Aggregate):
+    """SQLite's ``group_concat``: the values joined with commas."""
+    function = "GROUP_CONCAT"
+    output_field = models.TextField()
+
+
+class AttendanceSessionQuerySet(models.QuerySet):
+    def record(self, course, date, enrolled, present):
+        """
+        Upsert the (course, date) session and recount ``Course.lectures_held``
+        from the sessions. Called by the attendance writers inside their
+        transaction, so marks, session and counter commit together. The
+        counter is written with ``update()``, which sends no signal, so the
+        teacher's dashboard (which shows it) is dropped here.
+        """
+        self.bulk_create(
+            [AttendanceSession(
+                course=course, date=date,
+                enrolled=enrolled, present=present, absent=enrolled - present,
+            )],
+            update_conflicts=True,
+            unique_fields=["course", "date"],
+            update_fields=["enrolled", "present", "absent"],
+        )
+        held = (
+            AttendanceSession.objects.filter(course=models.OuterRef("pk"))
+            .order_by().values("course").annotate(held=models.Count("id")).values("held")
+        )
+        Course.objects.filter(pk=course.pk).update(lectures_held=models.Subquery(held))
+        invalidate_dashboards("teacher", [course.teacher_id])
+
+
+class AttendanceSession(models.Model):
+    """One lecture: the head counts of a (course, date) register."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    date = models.DateField()
+    enrolled = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    objects = AttendanceSessionQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('course', 'date')
+
+    def __str__(self):
+        return f"{self.course} - {self.date}: {self.present}/{self.enrolled}"
+
+
+class AttendanceQuerySet(models.QuerySet):
+    @retry_on_locked
+    def bulk_mark(self, course, student_ids, present_ids, date):
+        """
+        Record one day of attendance for ``course`` with batched INSERTs in
+        a single transaction. If any mark for that day already exists the
+        whole batch is rolled back and ``IntegrityError`` is raised.
+        """
+        present_ids = set(present_ids)
+        marks = [
+            Attendance(
+                course=course,
+                student_id=student_id,
+                date=date,
+                is_present=student_id in present_ids,
+                is_absent=student_id not in present_ids,
+            )
+            for student_id in student_ids
+        ]
+        with transaction.atomic():
+            created = self.bulk_create(marks)
+            AttendanceSession.objects.record(
+                course, date, len(marks), sum(mark.is_present for mark in marks)
+            )
+            attendance_marked.send(
+                Attendance, course=course, student_ids=[mark.student_id for mark in marks]
+            )
+            return created
+
+    @retry_on_locked
+    def upsert_marks(self, course, student_ids, present_ids, date):
+        """
+        Create or correct one day of attendance for ``course``. Marks are
+        keyed on (course, student, date), so resubmitting the same roster
+        overwrites earlier marks instead of failing; students left out of
+        ``student_ids`` keep whatever they had.
+        """
+        present_ids = set(present_ids)
+        marks = [
+            Attendance(
+                course=course,
+                student_id=student_id,
+                date=date,
+                is_present=student_id in present_ids,
+                is_absent=student_id not in present_ids,
+            )
+            for student_id in student_ids
+        ]
+        with transaction.atomic():
+            saved = self.bulk_create(
+                marks,
+                update_conflicts=True,
+                unique_fields=["course", "student", "date"],
+                update_fields=["is_present", "is_absent"],
+            )
+            AttendanceSession.objects.record(
+                course, date, len(marks), sum(mark.is_present for mark in marks)
+            )
+            attendance_marked.send(
+                Attendance, course=course, student_ids=[mark.student_id for mark in marks]
+            )
+            return saved
+
+    def marks_for(self, course, date):
+        """``{student_id: is_present}`` for one day, or ``{}``."""
+        return dict(
+            self.filter(course=course, date=date)
+            .values_list("student_id", "is_present")
+        )
+
+    def register_columns(self, course, start, end):
+        """
+        ``{date: (present_ids, absent_ids)}`` for the lectures in
+        ``[start, end]``: one row per date and mark from the database, the
+        student ids joined by SQLite rather than sent a mark at a time.
+        """
+        groups = (
+            self.filter(course=course, date__gte=start, date__lte=end)
+            .values("date", "is_present")
+            .annotate(student_ids=GroupConcat("student_id"))
+            .order_by()
+        )
+        columns = {}
+        for row in groups:
+            column = columns.setdefault(row["date"], ([], []))
+            column[0 if row["is_present"] else 1].extend(
+                map(int, row["student_ids"].split(","))
+            )
+        return columns
+
+    def tally(self, after=None, through=None):
+        """
+        ``{(student_id, course_id): (marked, attended)}`` over the dates in
+        ``(after, through]``, either bound optional.
+        """
+        marks = self.all()
+        if after is not None:
+            marks = marks.filter(date__gt=after)
+        if through is not None:
+            marks = marks.filter(date__lte=through)
+        totals = marks.values("student_id", "course_id").annotate(
+            marked=models.Count("id"),
+            attended=models.Count("id", filter=models.Q(is_present=True)),
+        )
+        return {
+            (row["student_id"], row["course_id"]): (row["marked"], row["attended"])
+            for row in totals.iterator()
+        }
+
+
 class Attendance(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -9,8 +179,276 @@ class Attendance(models.Model):
     is_present = models.BooleanField(default=False)
     is_absent = models.BooleanField(default=True)
 
+    objects = AttendanceQuerySet.as_manager()
+
     class Meta:
         unique_together = ('course', 'student', 'date')
+        indexes = [
+            # student dashboard: present marks per (student, course)
+            models.Index(
+                fields=['student', 'course'],
+                condition=models.Q(is_present=True),
+                name='attendance_present_idx',
+            ),
+            # take_attendance: "already taken today?" check and edit mode
+            models.Index(fields=['course', 'date'], name='attendance_course_date_idx'),
+            # rollup_attendance: marks newer than the last run
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.course} - {self.date}"
+
+
+# =====================================================
+# BITMAP STORAGE (ATTENDANCE_STORAGE = "bitmap")
+# =====================================================
+class RosterSlot(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = [('course', 'student'), ('course', 'position')]
+
+    def __str__(self):
+        return f"{self.course} #{self.position} - {self.student}"
+
+
+class AttendanceBitmapQuerySet(models.QuerySet):
+    def assign_slots(self, course, student_ids):
+        """Return ``{student_id: position}``, creating slots for new students."""
+        slots = dict(
+            RosterSlot.objects.filter(course=course)
+            .values_list("student_id", "position")
+        )
+        next_position = max(slots.values(), default=-1) + 1
+        new_slots = []
+        for student_id in student_ids:
+            if student_id not in slots:
+                slots[student_id] = next_position
+                new_slots.append(RosterSlot(
+                    course=course, student_id=student_id, position=next_position
+                ))
+                next_position += 1
+        RosterSlot.objects.bulk_create(new_slots)
+        return slots
+
+    @retry_on_locked
+    def bulk_mark(self, course, student_ids, present_ids, date):
+        """
+        Same contract as ``AttendanceQuerySet.bulk_mark`` but stores the
+        whole day as a single register row.
+        """
+        student_ids = list(student_ids)
+        present_ids = set(present_ids)
+        with transaction.atomic():
+            slots = self.assign_slots(course, student_ids)
+            register = self.create(
+                course=course,
+                date=date,
+                marked=bitmap.pack(slots[sid] for sid in student_ids),
+                present=bitmap.pack(
+                    slots[sid] for sid in student_ids if sid in present_ids
+                ),
+            )
+            AttendanceSession.objects.record(
+                course, date, len(student_ids), len(present_ids.intersection(student_ids))
+            )
+            attendance_marked.send(
+                AttendanceBitmap, course=course, student_ids=student_ids
+            )
+            return register
+
+    @retry_on_locked
+    def upsert_marks(self, course, student_ids, present_ids, date):
+        """
+        Same contract as ``AttendanceQuerySet.upsert_marks``, except that
+        the register for ``date`` is replaced as a whole.
+        """
+        student_ids = list(student_ids)
+        present_ids = set(present_ids)
+        with transaction.atomic():
+            slots = self.assign_slots(course, student_ids)
+            register = AttendanceBitmap(
+                course=course,
+                date=date,
+                marked=bitmap.pack(slots[sid] for sid in student_ids),
+                present=bitmap.pack(
+                    slots[sid] for sid in student_ids if sid in present_ids
+                ),
+            )
+            self.bulk_create(
+                [register],
+                update_conflicts=True,
+                unique_fields=["course", "date"],
+                update_fields=["marked", "present"],
+            )
+            AttendanceSession.objects.record(
+                course, date, len(student_ids), len(present_ids.intersection(student_ids))
+            )
+            attendance_marked.send(
+                AttendanceBitmap, course=course, student_ids=student_ids
+            )
+            return register
+
+    def marks_for(self, course, date):
+        """``{student_id: is_present}`` for one register, or ``{}``."""
+        register = self.filter(course=course, date=date).first()
+        if register is None:
+            return {}
+        return {
+            student_id: bitmap.has_bit(register.present, position)
+            for student_id, position in RosterSlot.objects.filter(
+                course=course
+            ).values_list("student_id", "position")
+            if bitmap.has_bit(register.marked, position)
+        }
+
+    def register_columns(self, course, start, end):
+        """Same contract as ``AttendanceQuerySet.register_columns``."""
+        students = dict(
+            RosterSlot.objects.filter(course=course).values_list("position", "student_id")
+        )
+        registers = self.filter(
+            course=course, date__gte=start, date__lte=end
+        ).values_list("date", "marked", "present")
+
+        columns = {}
+        for day, marked, present in registers:
+            present = bitmap.unpack(present)
+            columns[day] = (
+                [students[position] for position in present],
+                [students[position] for position in bitmap.unpack(marked) - present],
+            )
+        return columns
+
+    def tally(self, after=None, through=None):
+        """Same contract as ``AttendanceQuerySet.tally``."""
+        registers = self.all()
+        if after is not None:
+            registers = registers.filter(date__gt=after)
+        if through is not None:
+            registers = registers.filter(date__lte=through)
+        registers = registers.values_list("course_id", "marked", "present")
+
+        students = {}
+        for course_id, position, student_id in RosterSlot.objects.filter(
+            course_id__in=registers.values("course_id")
+        ).values_list("course_id", "position", "student_id").iterator():
+            students.setdefault(course_id, {})[position] = student_id
+
+        marked_counts, attended_counts = Counter(), Counter()
+        for course_id, marked, present in registers.iterator():
+            roster = students[course_id]
+            marked_counts.update((roster[p], course_id) for p in bitmap.unpack(marked))
+            attended_counts.update((roster[p], course_id) for p in bitmap.unpack(present))
+        return {key: (count, attended_counts[key]) for key, count in marked_counts.items()}
+
+    def attended_counts(self, student, course_ids=None):
+        """``{course_id: present marks}`` for ``student``."""
+        slots = RosterSlot.objects.filter(student=student)
+        if course_ids is not None:
+            slots = slots.filter(course_id__in=course_ids)
+        positions = dict(slots.values_list("course_id", "position"))
+
+        counts = dict.fromkeys(positions, 0)
+        registers = self.filter(course_id__in=positions).values_list(
+            "course_id", "present"
+        )
+        for course_id, present in registers.iterator():
+            if bitmap.has_bit(present, positions[course_id]):
+                counts[course_id] += 1
+        return counts
+
+    def annotate_courses(self, courses, student):
+        """
+        Set ``attended``, ``percentage`` and ``status`` on each course the
+        way ``CourseQuerySet.with_attendance`` does for row storage.
+        """
+        courses = list(courses)
+        counts = self.attended_counts(student, [course.id for course in courses])
+        for course in courses:
+            total = course.total_lectures
+            held = course.lectures_held
+            course.attended = counts.get(course.id, 0)
+            course.percentage = (
+                round(course.attended * 100 / held, 2) if held > 0 else 0
+            )
+            course.status = (
+                "COMPLETED"
+                if total > 0 and course.attended >= total
+                else "IN PROGRESS"
+            )
+        return courses
+
+
+class AttendanceBitmap(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    date = models.DateField()
+    # roster positions that were enrolled / present on this date
+    marked = models.BinaryField()
+    present = models.BinaryField()
+
+    objects = AttendanceBitmapQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('course', 'date')
+
+    def __str__(self):
+        return f"{self.course} - {self.date}"
+
+
+# =====================================================
+# DASHBOARD CACHE INVALIDATION
+# =====================================================
+# Batched writes announce themselves with attendance_marked. There is no
+# post_delete receiver on purpose: it would stop the ORM from fast-deleting
+# marks when a course or student goes, and course_deleted already covers
+# that case.
+@receiver(attendance_marked)
+def marks_written(sender, course, student_ids, **kwargs):
+    invalidate_dashboards("student", student_ids)
+
+
+@receiver(post_save, sender=Attendance)
+def mark_saved(sender, instance, **kwargs):
+    invalidate_dashboards("student", [instance.student_id])
+
+
+# =====================================================
+# ROLLUPS (manage.py rollup_attendance)
+# =====================================================
+class AttendanceSummary(models.Model):
+    """Running attendance totals per enrolment, as of the last rollup."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    # lectures the student was on the register for / marked present at
+    marked = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'attended'], name='summary_course_attended_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.course}: {self.attended}/{self.marked}"
+
+
+class RollupRun(models.Model):
+    """One rollup_attendance run; the newest run's ``through`` is the watermark."""
+    through = models.DateField()
+    marks = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Rollup through {self.through}"
+
+
+def attendance_store():
+    """Manager that records attendance for the configured storage mode."""
+    if settings.ATTENDANCE_STORAGE == "bitmap":
+        return AttendanceBitmap.objects
+    return Attendance.objects
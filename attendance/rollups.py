@@ -0,0 +1,121 @@
+"""
+Incremental attendance rollups for the defaulter report.
+
+Each run adds the marks dated after the previous run's watermark, up to and
+including ``through``, onto the per-enrolment ``AttendanceSummary`` totals,
+so a nightly run only reads one day of attendance however long the term.
+``through`` defaults to yesterday: today's register can still be corrected
+from the take-attendance page.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, ExpressionWrapper, F, FloatField, OuterRef
+
+from courses.models import Course
+from .models import AttendanceSummary, RollupRun, attendance_store
+
+BATCH_SIZE = 1000
+
+
+def last_rollup():
+    """The most recent ``RollupRun``, or ``None`` before the first one."""
+    # watermarks only move forward, so the newest run has the latest one
+    return RollupRun.objects.order_by("-id").first()
+
+
+def rollup_attendance(through=None, rebuild=False):
+    """
+    Fold marks dated after the last run, up to ``through``, into the
+    summaries and return the new ``RollupRun`` (``None`` if already up to
+    date). ``rebuild`` starts again from the first mark.
+    """
+    through = through or date.today() - timedelta(days=1)
+
+    with transaction.atomic():
+        if rebuild:
+            AttendanceSummary.objects.all().delete()
+            RollupRun.objects.all().delete()
+
+        previous = last_rollup()
+        after = previous.through if previous else None
+        if after is not None and through <= after:
+            return None
+
+        # every enrolment gets a row, so students never marked present (or
+        # never marked at all) still show up at 0%
+        enrolments = Course.students.through.objects.values_list("student_id", "course_id")
+        AttendanceSummary.objects.bulk_create(
+            (
+                AttendanceSummary(student_id=student_id, course_id=course_id)
+                for student_id, course_id in enrolments.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+        tally = attendance_store().tally(after, through)
+        current = {
+            (summary.student_id, summary.course_id): summary
+            for summary in AttendanceSummary.objects.filter(
+                course_id__in={course_id for _, course_id in tally}
+            )
+        }
+        summaries = []
+        for (student_id, course_id), (marked, attended) in tally.items():
+            summary = current.get((student_id, course_id)) or AttendanceSummary(
+                student_id=student_id, course_id=course_id
+            )
+            summary.marked += marked
+            summary.attended += attended
+            summaries.append(summary)
+
+        AttendanceSummary.objects.bulk_create(
+            summaries,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["student", "course"],
+            update_fields=["marked", "attended"],
+        )
+        return RollupRun.objects.create(
+            through=through, marks=sum(marked for marked, _ in tally.values())
+        )
+
+
+def defaulters(threshold, class_name=None, course=None):
+    """
+    Current enrolments whose attendance, against the lectures they have
+    been marked for so far, is below ``threshold`` percent, lowest first,
+    as flat dicts (no model instances: the whole-school report has
+    thousands of rows). Enrolments with nothing marked yet are left out.
+    """
+    enrolled = Course.students.through.objects.filter(
+        student_id=OuterRef("student_id"), course_id=OuterRef("course_id")
+    )
+    summaries = (
+        AttendanceSummary.objects
+        .filter(marked__gt=0)
+        # attended / marked < threshold%, without a division per row
+        .filter(attended__lt=F("marked") * threshold / 100.0)
+        .filter(Exists(enrolled))
+    )
+    if class_name:
+        summaries = summaries.filter(student__class_name=class_name)
+    if course is not None:
+        summaries = summaries.filter(course=course)
+
+    return summaries.values(
+        "attended",
+        "marked",
+        class_name=F("student__class_name"),
+        roll_no=F("student__roll_no"),
+        username=F("student__user__username"),
+        first_name=F("student__user__first_name"),
+        last_name=F("student__user__last_name"),
+        course_code=F("course__code"),
+        course_name=F("course__name"),
+        percentage=ExpressionWrapper(
+            F("attended") * 100.0 / F("marked"),
+            output_field=FloatField(),
+        ),
+    ).order_by("percentage", "course_code", "roll_no")
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after a batch of marks is written with bulk_create, which skips
+# post_save. Arguments: ``course`` and ``student_ids``.
+attendance_marked = Signal()
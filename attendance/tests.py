@@ -1,3 +1,643 @@
-from django.test import TestCase
+import csv
+import io
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Course
+from students.models import Student
+from teachers.models import Teacher
+from . import bitmap
+from .exports import EXPORT_HEADER
+from .models import (
+    Attendance, AttendanceBitmap, AttendanceSession, AttendanceSummary, RollupRun, RosterSlot,
+    attendance_store,
+)
+from .register import ABSENT, PRESENT, UNMARKED
+from .rollups import rollup_attendance
+
+
+class TakeAttendanceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_user = User.objects.create_user(username="teacher")
+        self.teacher_user.profile.role = "TEACHER"
+        self.teacher_user.profile.save()
+        teacher = Teacher.objects.create(
+            user=self.teacher_user, employee_id="T1", department="Science"
+        )
+
+        self.course = Course.objects.create(
+            name="Physics", code="PHY", teacher=teacher, total_lectures=10
+        )
+        self.students = []
+        for i in range(5):
+            user = User.objects.create_user(username=f"student{i}")
+            self.students.append(
+                Student.objects.create(user=user, roll_no=f"R{i}", class_name="10A")
+            )
+        self.course.students.set(self.students)
+
+        self.client.force_login(self.teacher_user)
+        self.url = reverse("take_attendance", args=[self.course.id])
+
+    def test_submit_marks_every_enrolled_student(self):
+        present = [self.students[0].id, self.students[2].id]
+
+        response = self.client.post(self.url, {"students": present})
+
+        self.assertRedirects(response, reverse("teacher_dashboard"))
+        marks = Attendance.objects.filter(course=self.course, date=date.today())
+        self.assertEqual(marks.count(), 5)
+        self.assertEqual(
+            set(marks.filter(is_present=True).values_list("student_id", flat=True)),
+            set(present),
+        )
+        self.assertFalse(marks.filter(is_present=True, is_absent=True).exists())
+
+    def test_submit_query_count_does_not_grow_with_roster(self):
+        # session, user (with profile and teacher), course, edit-mode check,
+        # roster ids, savepoint + batched upsert + session upsert +
+        # lectures-held recount + release
+        with self.assertNumQueries(10):
+            self.client.post(self.url, {"students": []})
+
+    def test_conflicting_batch_is_rolled_back(self):
+        Attendance.objects.create(
+            course=self.course, student=self.students[3], date=date.today()
+        )
+        student_ids = [student.id for student in self.students]
+
+        with self.assertRaises(IntegrityError):
+            Attendance.objects.bulk_mark(self.course, student_ids, set(), date.today())
+
+        self.assertEqual(Attendance.objects.filter(course=self.course).count(), 1)
+
+    def test_upsert_corrects_marks_in_place(self):
+        student_ids = [student.id for student in self.students]
+        Attendance.objects.bulk_mark(self.course, student_ids[:3], [], date.today())
+        first = Attendance.objects.get(student_id=student_ids[0])
+
+        Attendance.objects.upsert_marks(
+            self.course, student_ids, student_ids[:1], date.today()
+        )
+
+        marks = Attendance.objects.filter(course=self.course)
+        self.assertEqual(marks.count(), 5)
+        self.assertTrue(marks.get(pk=first.pk).is_present)
+        self.assertEqual(marks.filter(is_present=True).count(), 1)
+
+    def test_resubmit_corrects_the_day(self):
+        self.client.post(self.url, {"students": [self.students[0].id]})
+
+        response = self.client.post(self.url, {"students": [self.students[1].id]})
+
+        self.assertRedirects(response, reverse("teacher_dashboard"))
+        marks = attendance_store().marks_for(self.course, date.today())
+        self.assertEqual(marks, {
+            student.id: student == self.students[1] for student in self.students
+        })
+
+    def test_edit_mode_prefills_todays_marks(self):
+        self.client.post(self.url, {"students": [self.students[2].id]})
+
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.context["editing"])
+        self.assertEqual(
+            [student.mark for student in response.context["students"]],
+            [student == self.students[2] for student in self.students],
+        )
+        self.assertContains(response, "Update Attendance")
+
+
+    def test_sessions_and_lectures_held_follow_the_writes(self):
+        first, second, *_ = [student.id for student in self.students]
+        yesterday = date.today() - timedelta(days=1)
+        store = attendance_store()
+
+        store.bulk_mark(self.course, [first, second], [first], yesterday)
+        self.client.post(self.url, {"students": []})
+        self.client.post(self.url, {"students": [first, second]})
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.lectures_held, 2)
+        self.assertEqual(
+            list(AttendanceSession.objects.filter(course=self.course).order_by("date")
+                 .values_list("enrolled", "present", "absent")),
+            [(2, 1, 1), (5, 2, 3)],
+        )
+
+    def test_teacher_dashboard_shows_new_lectures_held(self):
+        dashboard = reverse("teacher_dashboard")
+        self.assertContains(self.client.get(dashboard), "Lectures Held: 0 / 10")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"students": [self.students[0].id]})
+
+        self.assertContains(self.client.get(dashboard), "Lectures Held: 1 / 10")
+
+    def test_session_history(self):
+        for day in range(3):
+            attendance_store().bulk_mark(
+                self.course, [s.id for s in self.students], [self.students[0].id],
+                date.today() - timedelta(days=day + 1),
+            )
+        url = reverse("session_history", args=[self.course.id])
+
+        # session, user, course, sessions
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+
+        self.assertEqual(
+            [session.date for session in response.context["sessions"]],
+            [date.today() - timedelta(days=day + 1) for day in range(3)],
+        )
+        self.assertContains(response, "20%")
+
+        other = User.objects.create_user(username="other")
+        other.profile.role = "TEACHER"
+        other.profile.save()
+        Teacher.objects.create(user=other, employee_id="T2", department="Maths")
+        self.client.force_login(other)
+        self.assertRedirects(self.client.get(url), reverse("login"), fetch_redirect_response=False)
+
+
+class BitmapTests(TestCase):
+    def test_pack_roundtrip(self):
+        positions = {0, 3, 7, 8, 64, 301}
+        data = bitmap.pack(positions)
+
+        self.assertEqual(bitmap.unpack(data), positions)
+        self.assertEqual(bitmap.count(data), len(positions))
+        self.assertTrue(bitmap.has_bit(data, 301))
+        self.assertFalse(bitmap.has_bit(data, 302))
+        self.assertFalse(bitmap.has_bit(data, 10_000))
+        self.assertEqual(bitmap.pack([]), b"")
+
+
+@override_settings(ATTENDANCE_STORAGE="bitmap")
+class BitmapStorageTests(TakeAttendanceTests):
+    def test_submit_marks_every_enrolled_student(self):
+        present = [self.students[0].id, self.students[2].id]
+
+        self.client.post(self.url, {"students": present})
+
+        self.assertFalse(Attendance.objects.exists())
+        marks = AttendanceBitmap.objects.marks_for(self.course, date.today())
+        self.assertEqual(marks, {
+            student.id: student.id in present for student in self.students
+        })
+
+    def test_submit_query_count_does_not_grow_with_roster(self):
+        # ... edit-mode check, roster ids, savepoint, slots read + insert,
+        # register upsert, session upsert, lectures-held recount, release
+        with self.assertNumQueries(12):
+            self.client.post(self.url, {"students": []})
+
+    def test_conflicting_batch_is_rolled_back(self):
+        student_ids = [student.id for student in self.students]
+        AttendanceBitmap.objects.bulk_mark(self.course, student_ids[:2], [], date.today())
+
+        with self.assertRaises(IntegrityError):
+            AttendanceBitmap.objects.bulk_mark(
+                self.course, student_ids, student_ids, date.today()
+            )
+
+        self.assertEqual(RosterSlot.objects.filter(course=self.course).count(), 2)
+
+    def test_upsert_corrects_marks_in_place(self):
+        student_ids = [student.id for student in self.students]
+        register = AttendanceBitmap.objects.bulk_mark(
+            self.course, student_ids[:3], [], date.today()
+        )
+
+        AttendanceBitmap.objects.upsert_marks(
+            self.course, student_ids, student_ids[:1], date.today()
+        )
+
+        self.assertEqual(
+            list(AttendanceBitmap.objects.values_list("pk", flat=True)),
+            [register.pk],
+        )
+        self.assertEqual(
+            AttendanceBitmap.objects.marks_for(self.course, date.today()),
+            {sid: sid == student_ids[0] for sid in student_ids},
+        )
+
+    def test_roster_changes_keep_old_registers(self):
+        first, second, *rest = [student.id for student in self.students]
+        yesterday = date.today() - timedelta(days=1)
+        AttendanceBitmap.objects.bulk_mark(self.course, [first, second], [second], yesterday)
+        AttendanceBitmap.objects.bulk_mark(self.course, [second, *rest], rest, date.today())
+
+        self.assertEqual(
+            AttendanceBitmap.objects.marks_for(self.course, yesterday),
+            {first: False, second: True},
+        )
+        self.assertEqual(
+            AttendanceBitmap.objects.attended_counts(self.students[1]),
+            {self.course.id: 1},
+        )
+
+    def test_student_dashboard_reads_registers(self):
+        student = self.students[0]
+        for day in range(3):
+            AttendanceBitmap.objects.bulk_mark(
+                self.course, [student.id], [student.id] if day else [],
+                date.today() - timedelta(days=day),
+            )
+        self.client.force_login(student.user)
+
+        response = self.client.get(reverse("student_dashboard"))
+
+        row = response.context["dashboard_data"][0]
+        self.assertEqual(row["attended"], 2)
+        self.assertEqual(row["held"], 3)
+        self.assertEqual(row["percentage"], 66.67)
+        self.assertEqual(row["status"], "IN PROGRESS")
+
+
+class ConvertAttendanceStorageTests(TestCase):
+    def test_rows_become_registers(self):
+        course = Course.objects.create(name="Maths", code="MAT")
+        students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A",
+            )
+            for i in range(4)
+        ]
+        ids = [student.id for student in students]
+        today = date.today()
+        Attendance.objects.bulk_mark(course, ids, ids[:2], today - timedelta(days=1))
+        Attendance.objects.bulk_mark(course, ids[1:], ids[3:], today)
+
+        call_command("convert_attendance_storage", "--delete-rows", stdout=io.StringIO())
+        call_command("convert_attendance_storage", stdout=io.StringIO())
+
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(AttendanceBitmap.objects.count(), 2)
+        self.assertEqual(
+            AttendanceBitmap.objects.marks_for(course, today),
+            {ids[1]: False, ids[2]: False, ids[3]: True},
+        )
+        self.assertEqual(
+            AttendanceBitmap.objects.attended_counts(students[1]), {course.id: 1}
+        )
+
+    def test_existing_registers_are_skipped_and_their_rows_kept(self):
+        course = Course.objects.create(name="Maths", code="MAT")
+        ids = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A",
+            ).id
+            for i in range(3)
+        ]
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        Attendance.objects.bulk_mark(course, ids, ids[:1], yesterday)
+        Attendance.objects.bulk_mark(course, ids, ids, today)
+        AttendanceBitmap.objects.bulk_mark(course, ids, ids[2:], today)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            "convert_attendance_storage", "--delete-rows", stdout=stdout, stderr=stderr
+        )
+
+        self.assertIn("Converted 1 course-day registers (1 skipped)", stdout.getvalue())
+        self.assertIn(today.isoformat(), stderr.getvalue())
+        self.assertEqual(
+            AttendanceBitmap.objects.marks_for(course, today),
+            {ids[0]: False, ids[1]: False, ids[2]: True},
+        )
+        self.assertEqual(
+            AttendanceBitmap.objects.marks_for(course, yesterday),
+            {ids[0]: True, ids[1]: False, ids[2]: False},
+        )
+        self.assertEqual(
+            set(Attendance.objects.values_list("date", flat=True)), {today}
+        )
+
+
+class ExportAttendanceTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin")
+        self.admin.profile.role = "ADMIN"
+        self.admin.profile.save()
+
+        self.course = Course.objects.create(name="Physics", code="PHY")
+        self.other = Course.objects.create(name="Maths", code="MAT")
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A" if i < 2 else "10B",
+            )
+            for i in range(3)
+        ]
+        ids = [student.id for student in self.students]
+        self.today = date.today()
+        self.yesterday = self.today - timedelta(days=1)
+        for course in (self.course, self.other):
+            store = attendance_store()
+            store.bulk_mark(course, ids, ids[:1], self.yesterday)
+            store.bulk_mark(course, ids, ids[1:], self.today)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_course_export(self):
+        self.client.force_login(self.admin)
+
+        rows = self.export(reverse("export_course_attendance", args=[self.course.id]))
+
+        self.assertEqual(rows[0], list(EXPORT_HEADER))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(
+            rows[1],
+            [self.yesterday.isoformat(), "PHY", "Physics", "R0", "s0", "10A", "Present"],
+        )
+        self.assertEqual({row[1] for row in rows[1:]}, {"PHY"})
+
+    def test_class_and_date_range_export(self):
+        self.client.force_login(self.admin)
+
+        rows = self.export(
+            reverse("export_class_attendance", args=["10A"]),
+            start=self.today.isoformat(),
+        )
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row[0] for row in rows[1:]}, {self.today.isoformat()})
+        self.assertEqual({row[3] for row in rows[1:]}, {"R0", "R1"})
+
+    def test_invalid_date(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse("export_attendance"), {"start": "2024-13-40"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_teacher_limited_to_own_course(self):
+        user = User.objects.create_user(username="teacher")
+        user.profile.role = "TEACHER"
+        user.profile.save()
+        teacher = Teacher.objects.create(user=user, employee_id="T1", department="Sci")
+        self.course.teacher = teacher
+        self.course.save()
+        self.client.force_login(user)
+
+        rows = self.export(reverse("export_course_attendance", args=[self.course.id]))
+        self.assertEqual(len(rows), 7)
+
+        for url in (
+            reverse("export_course_attendance", args=[self.other.id]),
+            reverse("export_attendance"),
+        ):
+            self.assertRedirects(
+                self.client.get(url), reverse("login"), fetch_redirect_response=False
+            )
+
+
+@override_settings(ATTENDANCE_STORAGE="bitmap")
+class BitmapExportAttendanceTests(ExportAttendanceTests):
+    pass
+
+
+class RegisterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin")
+        self.admin.profile.role = "ADMIN"
+        self.admin.profile.save()
+        self.client.force_login(self.admin)
+
+        self.course = Course.objects.create(name="Physics", code="PHY", total_lectures=10)
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}", first_name=f"S{i}"),
+                roll_no=f"R{i}", class_name="10A",
+            )
+            for i in range(4)
+        ]
+        s0, s1, s2, s3 = self.students
+        self.course.students.set([s0, s1, s2])
+        self.today = date.today()
+        self.days = [self.today - timedelta(days=n) for n in (40, 2, 1)]
+        store = attendance_store()
+        store.bulk_mark(self.course, [s0.id, s1.id, s2.id], [s0.id], self.days[0])
+        store.bulk_mark(self.course, [s0.id, s1.id, s2.id], [s0.id, s1.id], self.days[1])
+        store.bulk_mark(self.course, [s0.id, s1.id], [s1.id], self.days[2])
+        # s2 leaves, s3 joins after the last lecture
+        self.course.students.remove(s2)
+        self.course.students.add(s3)
+        self.url = reverse("attendance_register", args=[self.course.id])
+
+    def test_grid_and_totals(self):
+        response = self.client.get(self.url)
+
+        register = response.context["register"]
+        self.assertEqual(register.dates, self.days[1:])
+        self.assertEqual(
+            [(student.roll_no, list(row), present, marked, percentage)
+             for student, row, present, marked, percentage in register],
+            [
+                ("R0", [PRESENT, ABSENT], 1, 2, 50.0),
+                ("R1", [PRESENT, PRESENT], 2, 2, 100.0),
+                ("R2", [ABSENT, UNMARKED], 0, 1, 0.0),
+                ("R3", [UNMARKED, UNMARKED], 0, 0, 0),
+            ],
+        )
+        self.assertEqual(
+            register.date_totals,
+            [(self.days[1], 2, 3, 66.67), (self.days[2], 1, 2, 50.0)],
+        )
+        self.assertContains(response, '<td class="text-success">P</td><td class="text-danger">A</td>')
+
+    def test_date_range_and_csv(self):
+        response = self.client.get(self.url, {
+            "start": self.days[0].isoformat(), "end": self.days[1].isoformat(),
+            "format": "csv",
+        })
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+        self.assertEqual(
+            rows[0],
+            ["roll_no", "first_name", "last_name", self.days[0].isoformat(),
+             self.days[1].isoformat(), "present", "marked", "percentage"],
+        )
+        self.assertEqual(rows[1], ["R0", "S0", "", "P", "P", "2", "2", "100.0"])
+        self.assertEqual(rows[3], ["R2", "S2", "", "A", "A", "0", "2", "0.0"])
+        self.assertEqual(rows[-2], ["", "", "present", "1", "2", "", "", ""])
+        self.assertEqual(rows[-1], ["", "", "marked", "3", "3", "", "", ""])
+
+        response = self.client.get(self.url, {"start": "2024-13-40"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_with_the_grid(self):
+        store = attendance_store()
+        ids = [student.id for student in self.students]
+        for n in range(3, 30):
+            store.bulk_mark(self.course, ids, ids[::2], self.today - timedelta(days=n))
+
+        # session, user, course, marks, roster, students (+ roster slots for bitmaps)
+        queries = 7 if store.model is AttendanceBitmap else 6
+        with self.assertNumQueries(queries):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["register"].dates), 29)
+
+
+@override_settings(ATTENDANCE_STORAGE="bitmap")
+class BitmapRegisterTests(RegisterTests):
+    pass
+
+
+class RollupFixture:
+    def setUp(self):
+        self.course = Course.objects.create(name="Physics", code="PHY", total_lectures=4)
+        self.students = []
+        for i, class_name in enumerate(["10A", "10A", "10B"]):
+            user = User.objects.create_user(username=f"student{i}")
+            self.students.append(
+                Student.objects.create(user=user, roll_no=f"R{i}", class_name=class_name)
+            )
+        self.course.students.set(self.students)
+        self.ids = [student.id for student in self.students]
+        self.day1 = date.today() - timedelta(days=3)
+        self.day2 = date.today() - timedelta(days=2)
+        store = attendance_store()
+        store.bulk_mark(self.course, self.ids, self.ids, self.day1)
+        store.bulk_mark(self.course, self.ids, self.ids[:1], self.day2)
+
+    def totals(self):
+        return {
+            summary.student_id: (summary.marked, summary.attended)
+            for summary in AttendanceSummary.objects.filter(course=self.course)
+        }
+
+
+class RollupTests(RollupFixture, TestCase):
+    def test_runs_only_add_marks_after_the_watermark(self):
+        first, second, third = self.ids
+
+        run = rollup_attendance(through=self.day1)
+        self.assertEqual(run.marks, 3)
+        self.assertEqual(self.totals(), {first: (1, 1), second: (1, 1), third: (1, 1)})
+
+        run = rollup_attendance()
+        self.assertEqual((run.through, run.marks), (date.today() - timedelta(days=1), 3))
+        self.assertEqual(self.totals(), {first: (2, 2), second: (2, 1), third: (2, 1)})
+
+        self.assertIsNone(rollup_attendance())
+        self.assertEqual(self.totals(), {first: (2, 2), second: (2, 1), third: (2, 1)})
+
+    def test_todays_register_waits_for_the_next_run(self):
+        attendance_store().upsert_marks(self.course, self.ids, self.ids, date.today())
+
+        rollup_attendance()
+
+        self.assertEqual(sum(marked for marked, _ in self.totals().values()), 6)
+
+    def test_rebuild_matches_incremental_runs(self):
+        rollup_attendance(through=self.day1)
+        rollup_attendance()
+        incremental = self.totals()
+
+        rollup_attendance(rebuild=True)
+
+        self.assertEqual(self.totals(), incremental)
+        self.assertEqual(RollupRun.objects.count(), 1)
+
+    def test_enrolments_without_marks_are_summarised(self):
+        late = Student.objects.create(
+            user=User.objects.create_user(username="late"), roll_no="R9", class_name="10B"
+        )
+        self.course.students.add(late)
+
+        rollup_attendance()
+
+        self.assertEqual(self.totals()[late.id], (0, 0))
+
+    def test_command(self):
+        out = io.StringIO()
+
+        call_command("rollup_attendance", through=self.day1.isoformat(), stdout=out)
+        call_command("rollup_attendance", through=self.day1.isoformat(), stdout=out)
+
+        self.assertIn(f"Rolled up 3 marks through {self.day1}.", out.getvalue())
+        self.assertIn(f"Already rolled up through {self.day1}.", out.getvalue())
+
+
+@override_settings(ATTENDANCE_STORAGE="bitmap")
+class BitmapRollupTests(RollupTests):
+    pass
+
+
+class DefaulterReportTests(RollupFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        rollup_attendance()
+        self.admin = User.objects.create_user(username="admin")
+        self.admin.profile.role = "ADMIN"
+        self.admin.profile.save()
+        self.client.force_login(self.admin)
+        self.url = reverse("defaulter_report")
+
+    def roll_nos(self, **params):
+        response = self.client.get(self.url, params)
+        return [row["roll_no"] for row in response.context["rows"]]
+
+    def test_lists_enrolments_below_the_threshold(self):
+        # against the 2 lectures held so far, not the 4 of the whole term:
+        # 1 of 2 attended is 50%, 2 of 2 is 100%
+        self.assertEqual(self.roll_nos(), ["R1", "R2"])
+        self.assertEqual(self.roll_nos(threshold=100), ["R1", "R2"])
+        self.assertEqual(self.roll_nos(threshold=50), [])
+
+    def test_enrolments_with_nothing_marked_are_left_out(self):
+        other = Course.objects.create(name="Maths", code="MAT", total_lectures=2)
+        other.students.add(self.students[0])
+        rollup_attendance(rebuild=True)
+
+        self.assertEqual(self.roll_nos(), ["R1", "R2"])
+
+    def test_class_and_course_filters(self):
+        other = Course.objects.create(name="Maths", code="MAT", total_lectures=2)
+        other.students.add(self.students[2])
+        attendance_store().bulk_mark(other, [self.ids[2]], [], self.day1)
+        rollup_attendance(rebuild=True)
+
+        self.assertEqual(self.roll_nos(class_name="10B"), ["R2", "R2"])
+        self.assertEqual(self.roll_nos(class_name="10B", course=other.id), ["R2"])
+
+    def test_unenrolled_students_are_left_out(self):
+        self.course.students.remove(self.students[1])
+
+        self.assertEqual(self.roll_nos(), ["R2"])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # session, user, rollup, defaulters, class names, courses
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {"format": "csv"})
+
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ["class_name", "roll_no", "username"])
+        self.assertEqual(rows[0][-3:], ["attended", "marked", "percentage"])
+        self.assertEqual([row[1] for row in rows[1:]], ["R1", "R2"])
+        self.assertEqual(rows[1][-3:], ["1", "2", "50.00"])
+
+    def test_invalid_threshold(self):
+        response = self.client.get(self.url, {"threshold": "lots"})
+
+        self.assertEqual(response.status_code, 400)
@@ -3,4 +3,14 @@ from . import views
 
 urlpatterns = [
     path('take/<int:course_id>/', views.take_attendance, name='take_attendance'),
+    path('history/<int:course_id>/', views.session_history, name='session_history'),
+    path('register/<int:course_id>/', views.attendance_register, name='attendance_register'),
+
+    # REGISTER EXPORT (?start=&end=&format=csv|xlsx)
+    path('export/', views.export_attendance, name='export_attendance'),
+    path('export/course/<int:course_id>/', views.export_attendance, name='export_course_attendance'),
+    path('export/class/<str:class_name>/', views.export_attendance, name='export_class_attendance'),
+
+    # LOW-ATTENDANCE REPORT (?threshold=&class_name=&course=&format=csv)
+    path('report/defaulters/', views.defaulter_report, name='defaulter_report'),
 ]
@@ -1,47 +1,222 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import date
+from django.http import HttpResponseBadRequest
+from django.utils.dateparse import parse_date
+from django.utils.safestring import mark_safe
+from datetime import date, timedelta
 
-from .models import Attendance
+from accounts.decorators import get_role, role_required
+from .exports import Workbook, csv_response, register_rows, xlsx_response
+from .models import AttendanceSession, attendance_store
+from .register import ABSENT, PRESENT, UNMARKED, build_register
+from .rollups import defaulters, last_rollup
 from courses.models import Course
+from students.models import Student
 
-@login_required
+@role_required("TEACHER")
 def take_attendance(request, course_id):
-    if request.user.profile.role != "TEACHER":
-        return redirect("login")
-
     course = get_object_or_404(Course, id=course_id)
 
     # security
-    if course.teacher != request.user.teacher:
+    if course.teacher_id != request.user.teacher.id:
         return redirect("login")
 
-    students = course.students.all()
+    students = course.students.select_related("user")
     today = date.today()
+    store = attendance_store()
 
-    # prevent duplicate attendance
-    if Attendance.objects.filter(course=course, date=today).exists():
-        messages.warning(request, "Attendance already taken for today.")
-        return redirect("teacher_dashboard")
+    # a second submission for the day corrects the first one
+    editing = store.filter(course=course, date=today).exists()
 
     if request.method == "POST":
-        present_students = request.POST.getlist("students")
+        present_ids = {
+            int(pk) for pk in request.POST.getlist("students") if pk.isdigit()
+        }
+        student_ids = course.students.values_list("id", flat=True)
 
-        for student in students:
-            Attendance.objects.create(
-                course=course,
-                student=student,
-                date=today,
-                is_present=str(student.id) in present_students,
-                is_absent=str(student.id) not in present_students,
-            )
-
-        messages.success(request, "Attendance saved successfully.")
+        # one set-based upsert; concurrent submits both land, last one wins
+        store.upsert_marks(course, student_ids, present_ids, today)
+
+        if editing:
+            messages.success(request, "Attendance updated successfully.")
+        else:
+            messages.success(request, "Attendance saved successfully.")
         return redirect("teacher_dashboard")
 
+    if editing:
+        marks = store.marks_for(course, today)
+        students = list(students)
+        for student in students:
+            student.mark = marks.get(student.id)
+
     return render(request, "teacher/attendance/take.html", {
         "course": course,
         "students": students,
-        "today": today
+        "today": today,
+        "editing": editing,
+    })
+
+
+# =====================================================
+# SESSION HISTORY (ADMIN, OR TEACHER FOR OWN COURSE)
+# =====================================================
+@role_required("ADMIN", "TEACHER")
+def session_history(request, course_id):
+    course = get_object_or_404(Course, id=course_id)
+
+    if get_role(request.user) == "TEACHER" and course.teacher_id != request.user.teacher.id:
+        return redirect("login")
+
+    # head counts only; the marks themselves are never read here
+    sessions = AttendanceSession.objects.filter(course=course).order_by("-date")
+
+    return render(request, "teacher/attendance/history.html", {
+        "course": course,
+        "sessions": sessions,
+    })
+
+
+# =====================================================
+# REGISTER GRID (ADMIN, OR TEACHER FOR OWN COURSE)
+# =====================================================
+REGISTER_CELLS = {
+    UNMARKED: "<td></td>",
+    ABSENT: '<td class="text-danger">A</td>',
+    PRESENT: '<td class="text-success">P</td>',
+}
+REGISTER_CSV_CELLS = {UNMARKED: "", ABSENT: "A", PRESENT: "P"}
+
+
+@role_required("ADMIN", "TEACHER")
+def attendance_register(request, course_id):
+    course = get_object_or_404(Course, id=course_id)
+
+    if get_role(request.user) == "TEACHER" and course.teacher_id != request.user.teacher.id:
+        return redirect("login")
+
+    try:
+        end = parse_date(request.GET.get("end", "")) or date.today()
+        start = parse_date(request.GET.get("start", "")) or end - timedelta(days=29)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date.")
+    if start > end:
+        return HttpResponseBadRequest("Start date is after end date.")
+
+    register = build_register(course, start, end)
+
+    if request.GET.get("format") == "csv":
+        header = (
+            "roll_no", "first_name", "last_name",
+            *(day.isoformat() for day in register.dates),
+            "present", "marked", "percentage",
+        )
+        lines = [
+            [
+                student.roll_no, student.user.first_name, student.user.last_name,
+                *(REGISTER_CSV_CELLS[cell] for cell in row),
+                present, marked, percentage,
+            ]
+            for student, row, present, marked, percentage in register
+        ]
+        lines.append(["", "", "present", *register.present_by_date, "", "", ""])
+        lines.append(["", "", "marked", *register.marked_by_date, "", "", ""])
+        return csv_response(
+            lines, f"register-{course.code}-{start}_{end}", header=header
+        )
+
+    # the cells are fixed markup, joined here rather than by a template
+    # loop over every one of them
+    rows = [
+        (student, mark_safe("".join(REGISTER_CELLS[cell] for cell in row)),
+         present, marked, percentage)
+        for student, row, present, marked, percentage in register
+    ]
+    return render(request, "teacher/attendance/register.html", {
+        "course": course,
+        "register": register,
+        "rows": rows,
+    })
+
+
+# =====================================================
+# EXPORT REGISTER (ADMIN, OR TEACHER FOR OWN COURSE)
+# =====================================================
+@role_required("ADMIN", "TEACHER")
+def export_attendance(request, course_id=None, class_name=None):
+    course = None
+
+    if course_id is not None:
+        course = get_object_or_404(Course, id=course_id)
+
+    if get_role(request.user) == "TEACHER":
+        if course is None or course.teacher_id != request.user.teacher.id:
+            return redirect("login")
+
+    try:
+        start = parse_date(request.GET.get("start", ""))
+        end = parse_date(request.GET.get("end", ""))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date.")
+
+    export_format = request.GET.get("format", "csv")
+    if export_format == "xlsx" and Workbook is None:
+        return HttpResponseBadRequest("XLSX export requires openpyxl.")
+
+    filename = "attendance"
+    if course is not None:
+        filename += f"-{course.code}"
+    if class_name:
+        filename += f"-{class_name}"
+    if start or end:
+        filename += f"-{start or ''}_{end or ''}"
+
+    rows = register_rows(course=course, class_name=class_name, start=start, end=end)
+    if export_format == "xlsx":
+        return xlsx_response(rows, filename)
+    return csv_response(rows, filename)
+
+
+# =====================================================
+# DEFAULTER REPORT (ADMIN ONLY), READ FROM THE ROLLUPS
+# =====================================================
+DEFAULTER_HEADER = (
+    "class_name", "roll_no", "username", "course_code", "course_name",
+    "attended", "marked", "percentage",
+)
+
+
+@role_required("ADMIN")
+def defaulter_report(request):
+    try:
+        threshold = float(request.GET.get("threshold") or settings.DEFAULTER_THRESHOLD)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid threshold.")
+    if not 0 < threshold <= 100:
+        return HttpResponseBadRequest("Threshold must be between 0 and 100.")
+
+    class_name = request.GET.get("class_name", "")
+    course_id = request.GET.get("course", "")
+    course = None
+    if course_id.isdigit():
+        course = get_object_or_404(Course, id=course_id)
+
+    rows = defaulters(threshold, class_name=class_name, course=course)
+
+    if request.GET.get("format") == "csv":
+        lines = (
+            [row[field] for field in DEFAULTER_HEADER[:-1]] + [f"{row['percentage']:.2f}"]
+            for row in rows.iterator(chunk_size=2000)
+        )
+        return csv_response(lines, "defaulters", header=DEFAULTER_HEADER)
+
+    return render(request, "admin/attendance/defaulters.html", {
+        "rows": rows,
+        "threshold": threshold,
+        "class_name": class_name,
+        "course_id": course_id,
+        "class_names": Student.objects.order_by("class_name")
+            .values_list("class_name", flat=True).distinct(),
+        "courses": Course.objects.order_by("code").only("code", "name"),
+        "rollup": last_rollup(),
     })
@@ -2,6 +2,8 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through ASYNC_ROOT_URLCONF, where the read-heavy views
+are async; see "Async serving" in README.md for the server setup.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -9,8 +11,22 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# read by the production database profile: no persistent connections
+os.environ.setdefault('DJANGO_ASGI', '1')
 
-application = get_asgi_application()
+
+class AsyncURLConfHandler(ASGIHandler):
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = AsyncURLConfHandler()
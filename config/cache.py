@@ -0,0 +1,71 @@
+"""
+Per-user dashboard cache.
+
+Dashboard payloads are cached under ``dashboard:<name>:<owner id>`` and
+dropped by signal receivers (see ``courses.models`` and
+``attendance.models``) when the data behind them changes, so the timeout
+is only a safety net. Invalidation waits for the surrounding transaction
+to commit; deleting earlier would let a concurrent request re-cache the
+old data.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import registry
+
+registry.counter("dashboard_cache_requests_total", "Dashboard cache lookups by result.")
+registry.counter("dashboard_cache_invalidations_total", "Dashboard cache entries dropped.")
+
+
+def dashboard_key(dashboard, owner_id):
+    return f"dashboard:{dashboard}:{owner_id}"
+
+
+def cached_dashboard(dashboard, owner_id, build):
+    """Return the cached payload for ``owner_id``, calling ``build()`` on a miss."""
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    if not timeout:
+        return build()
+
+    key = dashboard_key(dashboard, owner_id)
+    payload = cache.get(key)
+    if payload is not None:
+        registry.inc("dashboard_cache_requests_total", dashboard=dashboard, result="hit")
+        return payload
+
+    registry.inc("dashboard_cache_requests_total", dashboard=dashboard, result="miss")
+    payload = build()
+    cache.set(key, payload, timeout)
+    return payload
+
+
+async def acached_dashboard(dashboard, owner_id, build):
+    """Async version of ``cached_dashboard``; ``build`` is a coroutine function."""
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    if not timeout:
+        return await build()
+
+    key = dashboard_key(dashboard, owner_id)
+    payload = await cache.aget(key)
+    if payload is not None:
+        registry.inc("dashboard_cache_requests_total", dashboard=dashboard, result="hit")
+        return payload
+
+    registry.inc("dashboard_cache_requests_total", dashboard=dashboard, result="miss")
+    payload = await build()
+    await cache.aset(key, payload, timeout)
+    return payload
+
+
+def invalidate_dashboards(dashboard, owner_ids):
+    """Drop the cached payloads of ``owner_ids`` once the transaction commits."""
+    keys = [dashboard_key(dashboard, owner_id) for owner_id in set(owner_ids) if owner_id]
+    if not keys:
+        return
+
+    def drop():
+        cache.delete_many(keys)
+        registry.inc("dashboard_cache_invalidations_total", len(keys), dashboard=dashboard)
+
+    transaction.on_commit(drop)
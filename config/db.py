@@ -0,0 +1,55 @@
+"""
+Retrying SQLite write transactions.
+
+With WAL and a busy timeout most lock waits are absorbed by SQLite itself,
+but a writer can still get "database is locked" under a burst of concurrent
+submissions. ``retry_on_locked`` re-runs the whole transaction with
+exponential backoff and jitter instead of failing the request.
+"""
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+logger = logging.getLogger(__name__)
+
+LOCKED_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc) for message in LOCKED_MESSAGES
+    )
+
+
+def retry_on_locked(func):
+    """
+    Retry ``func`` (which should open its own ``transaction.atomic()``)
+    up to ``DB_WRITE_RETRIES`` times while SQLite reports a lock. Inside an
+    outer transaction a retry cannot help, so the error is raised at once.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = settings.DB_WRITE_RETRY_DELAY
+        for attempt in range(settings.DB_WRITE_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if (
+                    not is_locked_error(exc)
+                    or connection.in_atomic_block
+                    or attempt == settings.DB_WRITE_RETRIES
+                ):
+                    raise
+                pause = delay * random.uniform(0.5, 1.5)
+                logger.info(
+                    "%s: %s, retry %d in %.3fs",
+                    func.__qualname__, exc, attempt + 1, pause,
+                )
+                time.sleep(pause)
+                delay *= 2
+
+    return wrapper
@@ -0,0 +1,287 @@
+"""
+Per-request performance metrics.
+
+``MetricsMiddleware`` records, per URL name, the request latency, SQL query
+count and time, template render time and response size into in-process
+histograms; streamed responses are recorded once their body has been sent. ``metrics_view`` exposes them in the Prometheus text format.
+Numbers are per worker process; Prometheus sums them across workers.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = Lock()
+        self._metrics = {}
+
+    def histogram(self, name, help_text, buckets):
+        self._metrics[name] = ("histogram", help_text, buckets, {})
+
+    def counter(self, name, help_text):
+        self._metrics[name] = ("counter", help_text, None, {})
+
+    def observe(self, name, value, **labels):
+        _, _, buckets, series = self._metrics[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        series = self._metrics[name][3]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series[key] = series.get(key, 0) + amount
+
+    def value(self, name, **labels):
+        return self._metrics[name][3].get(tuple(sorted(labels.items())))
+
+    def reset(self):
+        with self._lock:
+            for _, _, _, series in self._metrics.values():
+                series.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets, series) in self._metrics.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, metric in sorted(series.items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(key)} {metric}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets, metric.counts):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_labels(key, le=bound)} {cumulative}"
+                        )
+                    lines.append(f'{name}_bucket{_labels(key, le="+Inf")} {metric.count}')
+                    lines.append(f"{name}_sum{_labels(key)} {metric.sum:g}")
+                    lines.append(f"{name}_count{_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (label, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for label, value in pairs
+    )
+    return "{" + ",".join(f'{label}="{value}"' for label, value in escaped) + "}"
+
+
+registry = Registry()
+registry.counter("http_requests_total", "Requests by view and status code.")
+registry.histogram("http_request_duration_seconds", "Request latency.", LATENCY_BUCKETS)
+registry.histogram("http_request_queries", "SQL queries per request.", QUERY_BUCKETS)
+registry.histogram("http_request_sql_seconds", "SQL time per request.", LATENCY_BUCKETS)
+registry.histogram("http_template_render_seconds", "Template render time per request.", LATENCY_BUCKETS)
+registry.histogram("http_response_size_bytes", "Response body size.", SIZE_BUCKETS)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+_current = ContextVar("request_stats", default=None)
+_template_render = Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    stats = _current.get()
+    if stats is None or stats.rendering:
+        return _template_render(self, context, request)
+
+    stats.rendering = True
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context, request)
+    finally:
+        stats.render_time += time.perf_counter() - started
+        stats.rendering = False
+
+
+Template.render = _timed_render
+
+
+def _wrap_connections(stack, stats):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(stats))
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, stats)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if response.streaming:
+            # the body (and the queries behind it) is produced after this
+            # returns, so the request is recorded once it has been sent
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, stats, started
+            )
+        else:
+            self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # connections belong to the thread the async ORM runs queries in,
+        # so the wrappers are installed (and removed) from that thread
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, stats)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+
+        if response.streaming:
+            measure = self.ameasure_stream if response.is_async else self.measure_stream
+            response.streaming_content = measure(
+                request, response, response.streaming_content, stats, started
+            )
+        else:
+            self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def measure_stream(self, request, response, content, stats, started):
+        """
+        Yield ``content`` (the response's original body), counting the
+        queries and rendering each chunk takes, and record the request when it ends or is closed.
+        """
+        chunks = iter(content)
+        size = 0
+        try:
+            while True:
+                token = _current.set(stats)
+                try:
+                    with ExitStack() as stack:
+                        _wrap_connections(stack, stats)
+                        chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    _current.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record(request, response, stats, time.perf_counter() - started, size)
+
+    async def ameasure_stream(self, request, response, content, stats, started):
+        """Async version of ``measure_stream``."""
+        chunks = aiter(content)
+        size = 0
+        try:
+            while True:
+                token = _current.set(stats)
+                stack = ExitStack()
+                try:
+                    await sync_to_async(_wrap_connections)(stack, stats)
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    await sync_to_async(stack.close)()
+                    _current.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record(request, response, stats, time.perf_counter() - started, size)
+
+    def record(self, request, response, stats, elapsed, size=None):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "unresolved"
+
+        registry.inc("http_requests_total", view=view, status=response.status_code)
+        registry.observe("http_request_duration_seconds", elapsed, view=view)
+        registry.observe("http_request_queries", stats.queries, view=view)
+        registry.observe("http_request_sql_seconds", stats.sql_time, view=view)
+        registry.observe("http_template_render_seconds", stats.render_time, view=view)
+        if size is None:
+            size = len(response.content)
+        registry.observe("http_response_size_bytes", size, view=view)
+
+        if stats.queries > settings.METRICS_QUERY_BUDGET:
+            logger.warning(
+                "%s %s (%s) ran %d SQL queries, over the budget of %d",
+                request.method, request.path, view,
+                stats.queries, settings.METRICS_QUERY_BUDGET,
+            )
+
+
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,67 @@
+"""
+Keyset (cursor) pagination for the admin list pages.
+
+Pages are addressed by the value of a unique, indexed ordering column
+(``?after=<key>`` / ``?before=<key>``) instead of an OFFSET, so every page
+costs one indexed range scan no matter how deep the reader goes.
+"""
+from django.conf import settings
+
+
+class KeysetPage:
+    def __init__(self, object_list, key, has_next, has_previous, per_page):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+        self.next_cursor = getattr(object_list[-1], key) if self.has_next else None
+        self.previous_cursor = getattr(object_list[0], key) if self.has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def get_page_size(request):
+    """``?per_page=`` capped at LIST_PAGE_SIZE_MAX, else LIST_PAGE_SIZE."""
+    per_page = request.GET.get("per_page", "")
+    if not per_page.isdigit() or int(per_page) < 1:
+        return settings.LIST_PAGE_SIZE
+    return min(int(per_page), settings.LIST_PAGE_SIZE_MAX)
+
+
+def _page_window(request, queryset, key):
+    """The slice of ``queryset`` to fetch and a function turning it into a page."""
+    per_page = get_page_size(request)
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+
+    if before:
+        def make_page(rows):
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            return KeysetPage(rows, key, True, has_previous, per_page)
+
+        window = queryset.filter(**{f"{key}__lt": before}).order_by(f"-{key}")
+        return window[:per_page + 1], make_page
+
+    def make_page(rows):
+        return KeysetPage(rows[:per_page], key, len(rows) > per_page, bool(after), per_page)
+
+    if after:
+        queryset = queryset.filter(**{f"{key}__gt": after})
+    return queryset.order_by(key)[:per_page + 1], make_page
+
+
+def keyset_paginate(request, queryset, key):
+    """Return the requested ``KeysetPage`` of ``queryset`` ordered by ``key``."""
+    window, make_page = _page_window(request, queryset, key)
+    return make_page(list(window))
+
+
+async def akeyset_paginate(request, queryset, key):
+    """Async version of ``keyset_paginate``."""
+    window, make_page = _page_window(request, queryset, key)
+    return make_page([row async for row in window])
@@ -0,0 +1,128 @@
+"""
+Cached sessions with write-behind of activity updates.
+
+Used as ``SESSION_ENGINE = "config.sessions"`` (``DJANGO_SESSION_PROFILE=
+cached``). It is Django's ``cached_db`` store: sessions are read from the
+``SESSION_CACHE_ALIAS`` cache and only fall back to a ``django_session``
+SELECT on a miss. It differs in what it writes. A save that changes
+nothing but ``LAST_ACTIVITY_KEY`` goes to the cache alone, and the row is
+brought up to date at most every ``SESSION_WRITE_BEHIND`` seconds. Every
+other change (login, logout, messages, a new expiry) is written through
+to the database at once, so a cache miss or cull loses at most the
+latest activity time.
+
+``SessionActivityMiddleware`` (and a ``user_logged_in`` receiver in
+``accounts.models``) record that activity time, at most once per
+``SESSION_ACTIVITY_RESOLUTION`` seconds, which also slides the session
+and cookie expiry. Only this backend records it: with the database or
+cookie backends every recorded time would be a session write.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core.exceptions import MiddlewareNotUsed
+
+# when the user was last seen (epoch seconds)
+LAST_ACTIVITY_KEY = "_last_activity"
+
+# when this session's row was last written (epoch seconds)
+SYNCED_KEY = "_synced"
+
+
+def record_activity(session, now=None):
+    """
+    Set the session's last activity if it is older than the resolution;
+    only sessions of this backend keep one.
+    """
+    if not isinstance(session, SessionStore):
+        return
+    now = int(now if now is not None else time.time())
+    if now - session.get(LAST_ACTIVITY_KEY, 0) >= settings.SESSION_ACTIVITY_RESOLUTION:
+        session[LAST_ACTIVITY_KEY] = now
+
+
+class SessionStore(cached_db.SessionStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # the session as last loaded or written, to tell what a save changes
+        self._saved = None
+
+    def load(self):
+        data = super().load()
+        self._saved = dict(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._saved = dict(data)
+        return data
+
+    def _write_behind(self):
+        """
+        The cache timeout to save with if only the activity changed and
+        the row is recent enough to wait, else None.
+        """
+        if self._saved is None or self._session_key is None:
+            return None
+        if {k: v for k, v in self._session.items() if k != LAST_ACTIVITY_KEY} != {
+            k: v for k, v in self._saved.items() if k != LAST_ACTIVITY_KEY
+        }:
+            return None
+        behind = time.time() - self._session.get(SYNCED_KEY, 0)
+        if behind >= settings.SESSION_WRITE_BEHIND:
+            return None
+        # the row (and so the session) expires counting from its last write
+        return max(1, int(self.get_expiry_age() - behind))
+
+    def save(self, must_create=False):
+        timeout = None if must_create else self._write_behind()
+        if timeout is not None:
+            self._cache.set(self.cache_key, self._session, timeout)
+            return
+        self._session[SYNCED_KEY] = int(time.time())
+        super().save(must_create)
+        self._saved = dict(self._session)
+
+    async def asave(self, must_create=False):
+        timeout = None if must_create else self._write_behind()
+        if timeout is not None:
+            await self._cache.aset(await self.acache_key(), self._session, timeout)
+            return
+        self._session[SYNCED_KEY] = int(time.time())
+        await super().asave(must_create)
+        self._saved = dict(self._session)
+
+
+class SessionActivityMiddleware:
+    """
+    Record the last activity of logged-in sessions once the view has run
+    (after a login or logout it made) when the cached session backend is
+    in use; otherwise drop out of the stack. Goes after
+    AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.SESSION_ENGINE != __name__:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.session.get(SESSION_KEY) is not None:
+            record_activity(request.session)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if await request.session.aget(SESSION_KEY) is not None:
+            record_activity(request.session)
+        return response
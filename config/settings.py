@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,11 +48,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # answers /static/ itself under the production static profile
+    'config.staticfiles.StaticFilesMiddleware',
+    'config.metrics.MetricsMiddleware',
+    # compresses dynamic responses (streamed list pages chunk by chunk)
+    # for clients sending Accept-Encoding: gzip
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # records the last activity of logged-in sessions under the cached
+    # session profile (config.sessions)
+    'config.sessions.SessionActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,6 +91,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# config.asgi serves this URLconf: async dashboards and lists, the rest of
+# ROOT_URLCONF unchanged
+
+ASYNC_ROOT_URLCONF = 'config.urls_async'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -90,6 +107,120 @@ DATABASES = {
     }
 }
 
+# DJANGO_DB_PROFILE=production: WAL journaling, tuned pragmas and persistent
+# connections for many concurrent writers on one SQLite file
+
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'development')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        # persistent connections suit thread-per-request WSGI workers only:
+        # under ASGI (config/asgi.py sets DJANGO_ASGI) each request's ORM
+        # calls run on a thread of their own, and kept connections would
+        # never be reused or closed
+        'CONN_MAX_AGE': 0 if os.environ.get('DJANGO_ASGI') else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # sqlite3 busy timeout: seconds a writer waits for the lock
+            'timeout': 20,
+            # take the write lock at BEGIN instead of failing on upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    })
+
+# Write transactions that still hit "database is locked" are retried
+# (config.db.retry_on_locked) this many times with exponential backoff
+
+DB_WRITE_RETRIES = 4
+
+DB_WRITE_RETRY_DELAY = 0.05
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory is per process; the production profile shares a file cache
+# between workers so signal invalidation reaches all of them
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'attendance-system',
+    },
+    # sessions of the "cached" session profile, kept apart from the
+    # dashboards so clearing one leaves the other
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'attendance-system-sessions',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+if DB_PROFILE == 'production':
+    CACHE_DIR = Path(os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / '.cache'))
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    }
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+
+# Seconds a dashboard payload (config.cache) may live; 0 disables caching.
+# Signals drop entries as soon as the data changes, this is a safety net
+
+DASHBOARD_CACHE_TIMEOUT = 300
+
+
+# Sessions
+# DJANGO_SESSION_PROFILE picks the backend:
+# "db": Django's database sessions, a django_session read on every request
+# "cached": config.sessions, read from the 'sessions' cache; activity-only
+#   saves reach the database at most every SESSION_WRITE_BEHIND seconds.
+#   Needs a cache shared by all workers (the production profile's file cache)
+# "cookie": signed cookies, no server-side state; a logout cannot revoke a
+#   copied cookie before it expires
+
+SESSION_PROFILE = os.environ.get('DJANGO_SESSION_PROFILE', 'db')
+
+if SESSION_PROFILE == 'cached':
+    SESSION_ENGINE = 'config.sessions'
+    SESSION_CACHE_ALIAS = 'sessions'
+elif SESSION_PROFILE == 'cookie':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+# Cached sessions record their last activity (which slides their expiry)
+# at most once per SESSION_ACTIVITY_RESOLUTION seconds; the row catches up
+# every SESSION_WRITE_BEHIND seconds
+
+SESSION_ACTIVITY_RESOLUTION = 60
+
+SESSION_WRITE_BEHIND = 300
+
+
+# Authentication
+# RoleModelBackend loads the Profile / Student / Teacher with the user
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.RoleModelBackend',
+]
+
+LOGIN_URL = 'login'
+
+# Admin account import (upload page): rows are hashed in the request, in
+# the web process, at about half a second of PBKDF2 each, so bigger files
+# are refused in favour of manage.py import_accounts
+
+ACCOUNT_IMPORT_MAX_ROWS = 25
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,4 +258,88 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# DJANGO_STATIC_PROFILE=production: collectstatic writes content-hashed
+# copies with .gz (and .br, if brotli is installed) variants, and
+# config.staticfiles.StaticFilesMiddleware serves them from STATIC_ROOT.
+# It turns DEBUG off (with DEBUG on, {% static %} links the unhashed
+# names), so it needs the served host names in DJANGO_ALLOWED_HOSTS
+# (comma-separated)
+
+STATIC_PROFILE = os.environ.get('DJANGO_STATIC_PROFILE', 'development')
+
+SERVE_STATIC = STATIC_PROFILE == 'production'
+
+if SERVE_STATIC:
+    DEBUG = False
+    ALLOWED_HOSTS = [
+        host.strip()
+        for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+        if host.strip()
+    ]
+    if not ALLOWED_HOSTS:
+        raise ImproperlyConfigured(
+            'DJANGO_STATIC_PROFILE=production turns DEBUG off; set '
+            'DJANGO_ALLOWED_HOSTS to the host names this site is served on.'
+        )
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'config.staticfiles.CompressedManifestStaticFilesStorage',
+        },
+    }
+
+# Cache-Control max-age (seconds) of content-hashed files, sent as immutable
+
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+
+# Admin list pages (keyset pagination)
+# ?per_page= may ask for more rows, up to LIST_PAGE_SIZE_MAX
+
+LIST_PAGE_SIZE = 50
+
+LIST_PAGE_SIZE_MAX = 500
+
+# The course list and ?per_page=all lists stream their rows
+# (config.streaming), LIST_STREAM_CHUNK_SIZE rows per chunk; off renders
+# them whole
+
+STREAM_LIST_PAGES = True
+
+LIST_STREAM_CHUNK_SIZE = 200
+
+# Student search (course roster picker): ?limit= capped at the max
+
+STUDENT_SEARCH_LIMIT = 20
+
+STUDENT_SEARCH_LIMIT_MAX = 100
+
+# Global search box (accounts.search, SQLite FTS5): results shown
+
+SEARCH_RESULTS_LIMIT = 50
+
+
+# Request metrics (config.metrics, exposed at /metrics/)
+# Requests running more SQL queries than the budget are logged as warnings
+
+METRICS_QUERY_BUDGET = 30
+
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+
+# Attendance storage
+# "rows": one Attendance row per student per lecture (default)
+# "bitmap": one AttendanceBitmap register per course per lecture
+
+ATTENDANCE_STORAGE = 'rows'
+
+# Defaulter report: enrolments below this attendance percentage, read from
+# the summaries that manage.py rollup_attendance refreshes nightly
+
+DEFAULTER_THRESHOLD = 75
+
 
@@ -0,0 +1,204 @@
+"""
+Production static files, served by the application itself.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage
+(content-hashed copies, e.g. ``css/style.4f2a9c1b7e3d.css``, that
+``{% static %}`` links to) which also writes a ``.gz`` and, when the
+optional ``brotli`` package is installed, a ``.br`` variant of every
+text asset at collectstatic time, so nothing is compressed per request.
+
+``StaticFilesMiddleware`` answers ``STATIC_URL`` requests from
+``STATIC_ROOT`` before the rest of the stack (no session, no auth, no
+database), picking the smallest variant the client accepts. Hashed names
+never change content, so they are sent with a far-future ``immutable``
+Cache-Control and browsers stop revalidating them; anything else gets a
+short max-age and an ETag.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional
+    brotli = None
+
+
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".txt", ".html", ".json", ".xml", ".ico"}
+
+# A variant is only kept if it saves at least this fraction of the bytes
+MIN_SAVING = 0.05
+
+# Files up to this size are held in memory once read; larger ones stream
+MAX_CACHED_SIZE = 1024 * 1024
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data):
+    """``{suffix: bytes}`` of the variants worth keeping for ``data``."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {
+        suffix: compressed for suffix, compressed in variants.items()
+        if len(compressed) <= len(data) * (1 - MIN_SAVING)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            names.add(name)
+            if isinstance(hashed_name, str):
+                names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for name in names:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                self.write_variants(name)
+
+    def write_variants(self, name):
+        path = Path(self.path(name))
+        for suffix, data in compress(path.read_bytes()).items():
+            path.with_name(path.name + suffix).write_bytes(data)
+
+
+class StaticFile:
+    """One file under STATIC_ROOT and its precompressed variants."""
+
+    def __init__(self, path, immutable):
+        stat = path.stat()
+        self.path = path
+        self.size = stat.st_size
+        self.immutable = immutable
+        self.content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type in (
+            "application/javascript", "application/json", "image/svg+xml",
+        ):
+            self.content_type += "; charset=utf-8"
+        self.last_modified = http_date(stat.st_mtime)
+
+        # encoding -> (path, size, bytes or None when streamed from disk)
+        self.variants = {}
+        for encoding, suffix in (*ENCODINGS, ("identity", "")):
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                size = variant.stat().st_size
+                data = variant.read_bytes() if size <= MAX_CACHED_SIZE else None
+                self.variants[encoding] = (variant, size, data)
+
+        digest = hashlib.md5(usedforsecurity=False)
+        digest.update(f"{self.size}-{stat.st_mtime_ns}".encode())
+        self.etag = digest.hexdigest()[:16]
+
+    def response(self, request):
+        accepted = {
+            token.split(";")[0].strip()
+            for token in request.headers.get("Accept-Encoding", "").split(",")
+        }
+        encoding = next(
+            (name for name, _ in ENCODINGS if name in accepted and name in self.variants),
+            "identity",
+        )
+        path, size, data = self.variants[encoding]
+        etag = f'"{self.etag}-{encoding}"'
+
+        if etag in (
+            tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")
+        ):
+            response = HttpResponseNotModified()
+        elif request.method == "HEAD":
+            response = HttpResponse(content_type=self.content_type)
+        elif data is not None:
+            response = HttpResponse(data, content_type=self.content_type)
+        else:
+            response = FileResponse(path.open("rb"), content_type=self.content_type)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = self.last_modified
+        response["Vary"] = "Accept-Encoding"
+        if response.status_code == 200:
+            response["Content-Length"] = size
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+        if self.immutable:
+            response["Cache-Control"] = f"public, max-age={settings.STATIC_MAX_AGE}, immutable"
+        else:
+            response["Cache-Control"] = "public, max-age=60"
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Serve collected static files from STATIC_ROOT when SERVE_STATIC is on
+    (the production static profile); otherwise drop out of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        self.prefix = settings.STATIC_URL
+        if not self.prefix.startswith("/"):
+            self.prefix = "/" + self.prefix
+        self.root = Path(settings.STATIC_ROOT)
+        self.files = {}
+
+        manifest = self.root / ManifestStaticFilesStorage.manifest_name
+        try:
+            paths = json.loads(manifest.read_text())["paths"]
+        except (OSError, ValueError, KeyError):
+            paths = {}
+        self.hashed_names = set(paths.values())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def find(self, name):
+        static_file = self.files.get(name)
+        if static_file is None:
+            try:
+                path = Path(safe_join(self.root, name))
+            except SuspiciousFileOperation:
+                return None
+            if not path.is_file():
+                return None
+            static_file = self.files[name] = StaticFile(path, name in self.hashed_names)
+        return static_file
+
+    def serve(self, request):
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(self.prefix):
+            return None
+        static_file = self.find(request.path[len(self.prefix):])
+        return static_file.response(request) if static_file is not None else None
@@ -0,0 +1,97 @@
+"""
+Streamed rendering of the admin list pages.
+
+A list template renders its table rows from a separate rows template
+(``{% include "admin/students/rows.html" %}``). ``render_rows`` renders
+the page once with a marker in place of the rows, sends everything up to
+the marker straight away, then renders the rows in chunks of
+``LIST_STREAM_CHUNK_SIZE`` as a chunked cursor (``queryset.iterator()``)
+hands them over, then the rest of the page. The first bytes leave before
+the table is read, and only one chunk of rows is held at a time however
+long the list is. GZipMiddleware compresses the stream chunk by chunk.
+
+With ``STREAM_LIST_PAGES`` off the page is rendered whole, as before.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+# Escaped row text can never contain "<!--", so the split is unambiguous
+ROWS_MARKER = mark_safe("<!--streamed-rows-->")
+
+
+def _page_parts(request, template_name, context):
+    """The page rendered around the rows: ``(head, tail)``."""
+    page = render_to_string(
+        template_name, {**context, "streamed_rows": ROWS_MARKER}, request
+    )
+    head, _, tail = page.partition(ROWS_MARKER)
+    return head, tail
+
+
+def _response(content):
+    return StreamingHttpResponse(content, content_type="text/html; charset=utf-8")
+
+
+def render_rows(request, template_name, rows_template, context, name):
+    """
+    Render ``template_name`` with ``context[name]`` (a queryset) streamed
+    through ``rows_template`` when STREAM_LIST_PAGES is on.
+    """
+    if not settings.STREAM_LIST_PAGES:
+        return render(request, template_name, context)
+
+    # the page around the rows is rendered now, while the request
+    # (messages, CSRF token) is still being handled
+    head, tail = _page_parts(request, template_name, context)
+    rows = get_template(rows_template)
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+
+    def content():
+        yield head
+        chunk = []
+        sent = False
+        for row in context[name].iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield rows.render({name: chunk})
+                chunk = []
+                sent = True
+        if chunk or not sent:
+            # an empty list renders the template's {% empty %} row
+            yield rows.render({name: chunk})
+        yield tail
+
+    return _response(content())
+
+
+async def arender_rows(request, template_name, rows_template, context, name):
+    """
+    Async version of ``render_rows``. Everything in ``context`` but the
+    rows must already be evaluated.
+    """
+    if not settings.STREAM_LIST_PAGES:
+        context[name] = [row async for row in context[name]]
+        return render(request, template_name, context)
+
+    head, tail = _page_parts(request, template_name, context)
+    rows = get_template(rows_template)
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+
+    async def content():
+        yield head
+        chunk = []
+        sent = False
+        async for row in context[name].aiterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield rows.render({name: chunk})
+                chunk = []
+                sent = True
+        if chunk or not sent:
+            yield rows.render({name: chunk})
+        yield tail
+
+    return _response(content())
@@ -0,0 +1,617 @@
+import gzip
+import io
+import re
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.conf import settings
+from django.templatetags.static import static
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Profile
+from attendance.models import attendance_store
+from courses.models import Course
+from students.models import Student
+from teachers.models import Teacher
+from .asgi import AsyncURLConfHandler
+from .db import retry_on_locked
+from .metrics import registry
+from .sessions import LAST_ACTIVITY_KEY, SessionStore
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        teacher_user = User.objects.create_user(username="teacher")
+        teacher_user.profile.role = "TEACHER"
+        teacher_user.profile.save()
+        self.teacher = Teacher.objects.create(
+            user=teacher_user, employee_id="T1", department="Science"
+        )
+        self.course = Course.objects.create(
+            name="Physics", code="PHY", teacher=self.teacher, total_lectures=4
+        )
+        self.student = Student.objects.create(
+            user=User.objects.create_user(username="student"), roll_no="R1", class_name="10A"
+        )
+        self.course.students.add(self.student)
+
+    def student_row(self):
+        self.client.force_login(self.student.user)
+        return self.client.get(reverse("student_dashboard")).context["dashboard_data"][0]
+
+    def teacher_courses(self):
+        self.client.force_login(self.teacher.user)
+        return self.client.get(reverse("teacher_dashboard")).context["courses"]
+
+    def test_repeat_visit_is_served_from_cache(self):
+        self.student_row()
+        self.client.force_login(self.student.user)
+
+        # session, user with profile and student
+        with self.assertNumQueries(2):
+            self.client.get(reverse("student_dashboard"))
+        self.assertEqual(
+            registry.value("dashboard_cache_requests_total", dashboard="student", result="miss"), 1
+        )
+        self.assertEqual(
+            registry.value("dashboard_cache_requests_total", dashboard="student", result="hit"), 1
+        )
+        self.assertIn(
+            'dashboard_cache_requests_total{dashboard="student",result="hit"} 1',
+            self.client.get(reverse("metrics")).content.decode(),
+        )
+
+    def test_marking_attendance_drops_the_student_entry(self):
+        self.assertEqual(self.student_row()["attended"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance_store().upsert_marks(
+                self.course, [self.student.id], [self.student.id], date.today()
+            )
+
+        self.assertEqual(self.student_row()["attended"], 1)
+
+    def test_course_changes_drop_student_and_teacher_entries(self):
+        self.assertEqual(self.student_row()["total"], 4)
+        self.assertEqual(self.teacher_courses()[0].student_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.total_lectures = 8
+            self.course.save()
+            self.course.students.remove(self.student)
+
+        self.assertEqual(self.teacher_courses()[0].student_count, 0)
+        self.client.force_login(self.student.user)
+        self.assertEqual(
+            self.client.get(reverse("student_dashboard")).context["dashboard_data"], []
+        )
+
+    def test_reverse_enrolment_drops_the_teacher_entry(self):
+        self.teacher_courses()
+        other = Student.objects.create(
+            user=User.objects.create_user(username="other"), roll_no="R2", class_name="10A"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.course_set.add(self.course)
+
+        self.assertEqual(self.teacher_courses()[0].student_count, 2)
+
+    def test_nothing_is_dropped_before_commit(self):
+        self.student_row()
+
+        attendance_store().upsert_marks(
+            self.course, [self.student.id], [self.student.id], date.today()
+        )
+
+        self.assertEqual(self.student_row()["attended"], 0)
+
+
+@override_settings(ROOT_URLCONF="config.urls_async")
+class AsyncServingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user(username="teacher"),
+            employee_id="T1", department="Science",
+        )
+        self.teacher.user.profile.role = "TEACHER"
+        self.teacher.user.profile.save()
+        self.course = Course.objects.create(
+            name="Physics", code="PHY", teacher=self.teacher, total_lectures=4
+        )
+        self.student = Student.objects.create(
+            user=User.objects.create_user(username="student"), roll_no="R1", class_name="10A"
+        )
+        self.course.students.add(self.student)
+        attendance_store().bulk_mark(
+            self.course, [self.student.id], [self.student.id], date.today()
+        )
+
+    async def test_student_dashboard(self):
+        await self.async_client.aforce_login(self.student.user)
+
+        response = await self.async_client.get(reverse("student_dashboard"))
+
+        self.assertEqual(response.resolver_match.func.__name__, "student_dashboard_async")
+        row = response.context["dashboard_data"][0]
+        self.assertEqual((row["attended"], row["percentage"]), (1, 100.0))
+        # session, user with profile and student, annotated courses; counted
+        # in the thread the async ORM runs in
+        self.assertEqual(
+            registry.value("http_request_queries", view="student_dashboard").sum, 3
+        )
+
+    async def test_teacher_dashboard(self):
+        await self.async_client.aforce_login(self.teacher.user)
+
+        response = await self.async_client.get(reverse("teacher_dashboard"))
+
+        self.assertEqual(response.resolver_match.func.__name__, "teacher_dashboard_async")
+        self.assertEqual(response.context["courses"][0].student_count, 1)
+
+    async def test_admin_lists(self):
+        admin = await User.objects.acreate(username="admin")
+        await Profile.objects.filter(user=admin).aupdate(role="ADMIN")
+        await self.async_client.aforce_login(admin)
+
+        for name, text in [("student_list", "R1"), ("teacher_list", "T1"), ("course_list", "PHY")]:
+            with self.subTest(name):
+                response = await self.async_client.get(reverse(name))
+                if response.streaming:
+                    content = b"".join([chunk async for chunk in response])
+                else:
+                    content = response.content
+                self.assertIn(text.encode(), content)
+                self.assertTrue(response.resolver_match.func.__name__.endswith("_async"))
+
+    async def test_wrong_role_is_sent_to_login(self):
+        await self.async_client.aforce_login(self.student.user)
+
+        response = await self.async_client.get(reverse("course_list"))
+
+        self.assertRedirects(response, reverse("login"), fetch_redirect_response=False)
+
+    def test_asgi_application_uses_the_async_urlconf(self):
+        scope = {
+            "type": "http", "method": "GET", "path": "/students/dashboard/",
+            "query_string": b"", "headers": [],
+        }
+
+        request, _ = AsyncURLConfHandler().create_request(scope, io.BytesIO())
+
+        self.assertEqual(request.urlconf, settings.ASYNC_ROOT_URLCONF)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        user = User.objects.create_user(username="student")
+        Student.objects.create(user=user, roll_no="R1", class_name="10A")
+        self.client.force_login(user)
+
+    def test_request_is_recorded_by_url_name(self):
+        self.client.get(reverse("student_dashboard"))
+
+        queries = registry.value("http_request_queries", view="student_dashboard")
+        self.assertEqual(queries.count, 1)
+        self.assertEqual(queries.sum, 3)
+        render = registry.value("http_template_render_seconds", view="student_dashboard")
+        self.assertGreater(render.sum, 0)
+        size = registry.value("http_response_size_bytes", view="student_dashboard")
+        self.assertGreater(size.sum, 100)
+        self.assertEqual(
+            registry.value("http_requests_total", view="student_dashboard", status=200), 1
+        )
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse("student_dashboard"))
+        self.client.get(reverse("student_dashboard"))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_queries_bucket{view="student_dashboard",le="3"} 2', body)
+        self.assertIn('http_request_queries_count{view="student_dashboard"} 2', body)
+        self.assertIn('http_requests_total{status="200",view="student_dashboard"} 2', body)
+
+    def test_endpoint_is_limited_to_allowed_ips(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3")
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_QUERY_BUDGET=2)
+    def test_query_budget_warning(self):
+        with self.assertLogs("config.metrics", "WARNING") as logs:
+            self.client.get(reverse("student_dashboard"))
+
+        self.assertIn("ran 3 SQL queries, over the budget of 2", logs.output[0])
+
+    def course_list_queries(self):
+        response = self.client.get(reverse("course_list"))
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        self.assertIn(b"PHY", content)
+        return registry.value("http_request_queries", view="course_list")
+
+    def test_streamed_responses_are_recorded_once_sent(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+        Course.objects.create(name="Physics", code="PHY", total_lectures=10)
+
+        with override_settings(STREAM_LIST_PAGES=False):
+            whole = self.course_list_queries().sum
+        registry.reset()
+        streamed = self.course_list_queries()
+
+        # the course rows are read while the body is sent
+        self.assertEqual((streamed.count, streamed.sum), (1, whole))
+        size = registry.value("http_response_size_bytes", view="course_list")
+        self.assertGreater(size.sum, 100)
+
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    async def test_async_streamed_responses_are_recorded_once_sent(self):
+        admin = await sync_to_async(User.objects.create_user)(username="admin")
+        admin.profile.role = "ADMIN"
+        await admin.profile.asave()
+        await self.async_client.aforce_login(admin)
+        await Course.objects.acreate(name="Physics", code="PHY", total_lectures=10)
+
+        response = await self.async_client.get(reverse("course_list"))
+        self.assertIsNone(registry.value("http_request_queries", view="course_list"))
+        content = b"".join([chunk async for chunk in response])
+
+        self.assertIn(b"PHY", content)
+        queries = registry.value("http_request_queries", view="course_list")
+        self.assertEqual(queries.count, 1)
+        # session, user, teacher dropdown and the course rows
+        self.assertGreaterEqual(queries.sum, 4)
+
+
+@override_settings(DB_WRITE_RETRIES=3, DB_WRITE_RETRY_DELAY=0)
+class RetryOnLockedTests(SimpleTestCase):
+    def flaky(self, errors):
+        calls = []
+
+        @retry_on_locked
+        def write():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "done"
+
+        return write, calls
+
+    def test_retries_until_the_lock_clears(self):
+        locked = OperationalError("database is locked")
+        write, calls = self.flaky([locked, locked])
+
+        self.assertEqual(write(), "done")
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_the_retry_budget(self):
+        write, calls = self.flaky([OperationalError("database is locked")] * 5)
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.flaky([OperationalError("no such table: x")])
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+class RetryInsideTransactionTests(TestCase):
+    @override_settings(DB_WRITE_RETRY_DELAY=0)
+    def test_no_retry_inside_an_outer_transaction(self):
+        calls = []
+
+        @retry_on_locked
+        def write():
+            calls.append(1)
+            raise OperationalError("database is locked")
+
+        with transaction.atomic(), self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+PRODUCTION_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "config.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        settings_override = override_settings(
+            STATIC_ROOT=tmp.name, SERVE_STATIC=True, STORAGES=PRODUCTION_STORAGES
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin"])
+
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+        self.source = (settings.BASE_DIR / "static/css/style.css").read_bytes()
+
+    def stylesheet_url(self):
+        response = self.client.get(reverse("admin_dashboard"))
+        url = static("css/style.css")
+        self.assertContains(response, f'href="{url}"')
+        return url
+
+    def test_collectstatic_writes_hashed_compressed_copies(self):
+        url = self.stylesheet_url()
+
+        self.assertRegex(url, r"^/static/css/style\.[0-9a-f]{12}\.css$")
+        hashed = self.root / url.removeprefix("/static/")
+        self.assertEqual(gzip.decompress((hashed.parent / (hashed.name + ".gz")).read_bytes()),
+                         hashed.read_bytes())
+
+    def test_hashed_files_are_immutable_and_compressed(self):
+        url = self.stylesheet_url()
+
+        # nothing behind the middleware runs: no session, no queries
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={"accept-encoding": "br;q=1.0, gzip"})
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Content-Type"], "text/css; charset=utf-8")
+        self.assertEqual(
+            response["Cache-Control"], f"public, max-age={settings.STATIC_MAX_AGE}, immutable"
+        )
+        self.assertEqual(gzip.decompress(response.content), self.source)
+
+        response = self.client.get(url)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response.content, self.source)
+        self.assertEqual(response["Content-Length"], str(len(self.source)))
+
+        response = self.client.get(url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_unhashed_names_revalidate(self):
+        response = self.client.get("/static/css/style.css")
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        self.assertEqual(response.content, self.source)
+
+    def test_unknown_and_unsafe_paths_fall_through(self):
+        for path in ("/static/css/missing.css", "/static/../manage.py", "/static/css/"):
+            self.assertEqual(self.client.get(path).status_code, 404)
+
+    async def test_served_under_asgi(self):
+        url = await sync_to_async(static)("css/style.css")
+
+        response = await self.async_client.get(url, headers={"accept-encoding": "gzip"})
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.source)
+
+
+@override_settings(LIST_PAGE_SIZE=2, LIST_STREAM_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        for roll_no in ["R05", "R03", "R01", "R04", "R02"]:
+            Student.objects.create(
+                user=User.objects.create_user(username=f"user{roll_no}"),
+                roll_no=roll_no, class_name="10A",
+            )
+        self.url = reverse("student_list")
+
+    def roll_nos(self, content):
+        return re.findall(r"<td>(R\d+)</td>", content.decode())
+
+    def test_all_rows_are_streamed_in_chunks(self):
+        response = self.client.get(self.url, {"per_page": "all"})
+
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        # head, three chunks of rows, tail
+        self.assertEqual(len(chunks), 5)
+        self.assertIn(b"<tbody>", chunks[0])
+        self.assertIn(b"</html>", chunks[-1])
+        content = b"".join(chunks)
+        self.assertEqual(self.roll_nos(content), ["R01", "R02", "R03", "R04", "R05"])
+        self.assertNotIn(b"No students found", content)
+        self.assertNotIn(b"pagination", content)
+
+    def test_matches_the_page_rendered_whole(self):
+        streamed = b"".join(
+            self.client.get(self.url, {"per_page": "all"}).streaming_content
+        )
+        with override_settings(STREAM_LIST_PAGES=False):
+            response = self.client.get(self.url, {"per_page": "all"})
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(self.roll_nos(response.content), self.roll_nos(streamed))
+
+    def test_empty_list(self):
+        Student.objects.all().delete()
+
+        response = self.client.get(self.url, {"per_page": "all"})
+
+        self.assertContains(response, "No students found", count=1)
+
+    def test_paginated_pages_are_unchanged(self):
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(self.roll_nos(response.content), ["R01", "R02"])
+        self.assertContains(response, "?per_page=all")
+
+    def test_streamed_pages_are_gzipped(self):
+        response = self.client.get(
+            reverse("course_list"), headers={"accept-encoding": "gzip"}
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn(b"No courses found", content)
+
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    async def test_async_list_is_streamed(self):
+        admin = await User.objects.aget(username="admin")
+        await self.async_client.aforce_login(admin)
+
+        response = await self.async_client.get(self.url, {"per_page": "all"})
+        content = b"".join([chunk async for chunk in response])
+
+        self.assertEqual(response.resolver_match.func.__name__, "student_list_async")
+        self.assertEqual(self.roll_nos(content), ["R01", "R02", "R03", "R04", "R05"])
+
+
+class SessionTestMixin:
+    def setUp(self):
+        caches["sessions"].clear()
+        cache.clear()
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user(username="teacher"),
+            employee_id="T1", department="Science",
+        )
+        self.teacher.user.profile.role = "TEACHER"
+        self.teacher.user.profile.save()
+        self.client.force_login(self.teacher.user)
+        self.url = reverse("teacher_dashboard")
+
+    def session_queries(self):
+        """GET the dashboard; the django_session statements it ran."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"].split()[0] for q in queries if "django_session" in q["sql"]]
+
+    def row(self):
+        key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        return Session.objects.get(session_key=key).get_decoded()
+
+
+class ActivityTests(SessionTestMixin, TestCase):
+    """The default (db) profile: sessions are never written for activity."""
+
+    def test_login_records_no_activity(self):
+        self.assertNotIn(LAST_ACTIVITY_KEY, self.row())
+
+    @override_settings(SESSION_ACTIVITY_RESOLUTION=0)
+    def test_requests_only_read_the_session(self):
+        self.assertEqual(self.session_queries(), ["SELECT"])
+        self.assertEqual(self.session_queries(), ["SELECT"])
+
+    def test_anonymous_requests_are_left_alone(self):
+        self.client.logout()
+
+        self.client.get(reverse("login"))
+
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+
+@override_settings(SESSION_ENGINE="config.sessions", SESSION_CACHE_ALIAS="sessions")
+class CachedSessionTests(SessionTestMixin, TestCase):
+    def store(self):
+        return SessionStore(self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+    def test_sessions_are_read_from_the_cache(self):
+        self.assertEqual(self.session_queries(), [])
+
+        caches["sessions"].clear()
+        self.assertEqual(self.session_queries(), ["SELECT"])
+        self.assertEqual(self.session_queries(), [])
+
+    def test_login_records_activity(self):
+        self.assertAlmostEqual(self.row()[LAST_ACTIVITY_KEY], time.time(), delta=5)
+
+    def test_activity_is_recorded_once_per_resolution(self):
+        logged_in = self.store()[LAST_ACTIVITY_KEY]
+        store = self.store()
+        store[LAST_ACTIVITY_KEY] = logged_in - 1
+        store.save()
+
+        self.session_queries()
+        self.assertEqual(self.store()[LAST_ACTIVITY_KEY], logged_in - 1)
+
+        with override_settings(SESSION_ACTIVITY_RESOLUTION=0):
+            self.session_queries()
+        self.assertGreaterEqual(self.store()[LAST_ACTIVITY_KEY], logged_in)
+
+    def test_activity_is_written_behind(self):
+        logged_in = self.row()[LAST_ACTIVITY_KEY]
+        store = self.store()
+        store[LAST_ACTIVITY_KEY] = 0
+        store.save()
+        self.assertEqual(self.row()[LAST_ACTIVITY_KEY], logged_in)
+
+        # the request records fresh activity in the cache only
+        self.assertEqual(self.session_queries(), [])
+        self.assertGreater(self.store()[LAST_ACTIVITY_KEY], 0)
+        self.assertEqual(self.row()[LAST_ACTIVITY_KEY], logged_in)
+
+        # until the row is older than SESSION_WRITE_BEHIND
+        store = self.store()
+        store[LAST_ACTIVITY_KEY] = 0
+        store.save()
+        with override_settings(SESSION_WRITE_BEHIND=0):
+            self.assertIn("UPDATE", self.session_queries())
+        self.assertEqual(self.row()[LAST_ACTIVITY_KEY], self.store()[LAST_ACTIVITY_KEY])
+
+    def test_other_changes_are_written_through(self):
+        store = self.store()
+        store["course"] = 7
+        store[LAST_ACTIVITY_KEY] = 0
+        store.save()
+
+        self.assertEqual(self.row()["course"], 7)
+        self.assertEqual(self.row()[LAST_ACTIVITY_KEY], 0)
+
+    def test_logout_drops_the_cached_copy(self):
+        key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        self.client.get(reverse("logout"))
+
+        self.assertFalse(Session.objects.filter(session_key=key).exists())
+        self.assertFalse(SessionStore().exists(key))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+class CookieSessionTests(SessionTestMixin, TestCase):
+    def test_no_session_rows(self):
+        with override_settings(SESSION_ACTIVITY_RESOLUTION=0):
+            self.assertEqual(self.session_queries(), [])
+
+        self.assertFalse(Session.objects.exists())
@@ -0,0 +1,22 @@
+"""
+URL configuration for the ASGI application (config.asgi).
+
+The read-heavy dashboards and admin lists are served by async views that
+use the async ORM, so a slow query parks a coroutine instead of a worker.
+Everything else falls through to config.urls.
+"""
+from django.urls import include, path
+
+from courses import views as course_views
+from students import views as student_views
+from teachers import views as teacher_views
+
+urlpatterns = [
+    path('students/', student_views.student_list_async, name='student_list'),
+    path('students/dashboard/', student_views.student_dashboard_async, name='student_dashboard'),
+    path('teachers/', teacher_views.teacher_list_async, name='teacher_list'),
+    path('teachers/dashboard/', teacher_views.teacher_dashboard_async, name='teacher_dashboard'),
+    path('courses/', course_views.course_list_async, name='course_list'),
+
+    path('', include('config.urls')),
+]
@@ -0,0 +1,92 @@
+"""
+Set-based enrolment of whole classes into courses.
+
+``enroll_students`` adds every student of a queryset (a class, a list of
+roll numbers) to each of a set of courses with a single
+``INSERT ... SELECT`` into the ``Course.students`` through table that
+skips existing enrolments, instead of one ``students.set()`` rewrite per
+course. The pairs it is about to insert are read first, which doubles as
+the dry-run count and tells the roster signals who changed.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+
+from config.db import retry_on_locked
+from students.models import Student
+from .models import Course
+
+
+def select_students(class_name="", roll_nos=()):
+    """
+    The students of ``class_name`` plus those with the given roll numbers,
+    and the roll numbers that matched nobody.
+    """
+    roll_nos = set(roll_nos)
+    if not class_name and not roll_nos:
+        return Student.objects.none(), set()
+
+    condition = Q(roll_no__in=roll_nos)
+    if class_name:
+        condition |= Q(class_name=class_name)
+    found = set(
+        Student.objects.filter(roll_no__in=roll_nos).values_list("roll_no", flat=True)
+    )
+    return Student.objects.filter(condition), roll_nos - found
+
+
+def _pending_sql(students, course_ids):
+    """SELECT of the (course_id, student_id) pairs not enrolled yet."""
+    qn = connection.ops.quote_name
+    through = Course.students.through._meta
+    course_column = qn(through.get_field("course").column)
+    student_column = qn(through.get_field("student").column)
+
+    student_sql, student_params = students.order_by().values("id").query.sql_with_params()
+    placeholders = ", ".join(["%s"] * len(course_ids))
+    sql = (
+        f"SELECT c.id, s.id FROM {qn(Course._meta.db_table)} c "
+        f"CROSS JOIN ({student_sql}) s "
+        f"WHERE c.id IN ({placeholders}) AND NOT EXISTS ("
+        f"SELECT 1 FROM {qn(through.db_table)} e "
+        f"WHERE e.{course_column} = c.id AND e.{student_column} = s.id)"
+    )
+    return sql, (*student_params, *course_ids), (course_column, student_column)
+
+
+@retry_on_locked
+def enroll_students(students, courses, dry_run=False):
+    """
+    Enrol every student in the ``students`` queryset in each of ``courses``
+    and return ``{course_id: {student_id, ...}}`` of the new enrolments
+    (only counted, nothing written, with ``dry_run``).
+    """
+    courses = {course.id: course for course in courses}
+    pending = {course_id: set() for course_id in courses}
+    if not courses:
+        return pending
+
+    sql, params, columns = _pending_sql(students, list(courses))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for course_id, student_id in cursor.fetchall():
+            pending[course_id].add(student_id)
+        if dry_run or not any(pending.values()):
+            return pending
+
+        # the raw insert bypasses add(), so tell the roster receivers
+        # (dashboard caches) ourselves, as add() would
+        def notify(action):
+            for course_id, student_ids in pending.items():
+                if student_ids:
+                    m2m_changed.send(
+                        sender=Course.students.through, action=action,
+                        instance=courses[course_id], reverse=False, model=Student,
+                        pk_set=student_ids, using=connection.alias,
+                    )
+
+        table = connection.ops.quote_name(Course.students.through._meta.db_table)
+        notify("pre_add")
+        cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) {sql}", params)
+        notify("post_add")
+    return pending
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.enrollment import enroll_students, select_students
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Enroll every student of a class (--class-name) and/or the given "
+        "roll numbers (--roll-no) into the courses with the given codes, "
+        "skipping students already enrolled. --dry-run only counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_codes", nargs="+", metavar="course_code")
+        parser.add_argument("--class-name", default="")
+        parser.add_argument(
+            "--roll-no", action="append", default=[], dest="roll_nos",
+            help="May be repeated, or given as a comma-separated list.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, course_codes, class_name, roll_nos, dry_run, **options):
+        roll_nos = {
+            roll_no.strip()
+            for value in roll_nos for roll_no in value.split(",") if roll_no.strip()
+        }
+        if not class_name and not roll_nos:
+            raise CommandError("Give --class-name and/or --roll-no.")
+
+        courses = list(Course.objects.filter(code__in=course_codes).order_by("code"))
+        unknown = set(course_codes) - {course.code for course in courses}
+        if unknown:
+            raise CommandError(f"Unknown course codes: {', '.join(sorted(unknown))}")
+
+        students, missing = select_students(class_name, roll_nos)
+        if missing:
+            raise CommandError(f"Unknown roll numbers: {', '.join(sorted(missing))}")
+
+        selected = students.count()
+        pending = enroll_students(students, courses, dry_run=dry_run)
+        verb = "Would enroll" if dry_run else "Enrolled"
+        for course in courses:
+            new = len(pending[course.id])
+            self.stdout.write(
+                f"{course.code}: {verb.lower()} {new}, {selected - new} already enrolled"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {sum(map(len, pending.values()))} students across {len(courses)} courses."
+        ))
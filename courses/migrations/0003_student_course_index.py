@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_total_lectures'),
+    ]
+
+    # Course.students is an auto-created through table, which cannot carry
+    # Meta.indexes. (student_id, course_id) covers "courses of a student".
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX "courses_course_students_student_course_idx" '
+            'ON "courses_course_students" ("student_id", "course_id");',
+            reverse_sql='DROP INDEX "courses_course_students_student_course_idx";',
+        ),
+    ]
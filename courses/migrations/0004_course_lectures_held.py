@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_student_course_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lectures_held',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,7 +1,65 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, Exists, F, FilteredRelation, FloatField, OuterRef, Q, Value,
+    When,
+)
+from django.db.models.functions import Cast, Round
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from config.cache import invalidate_dashboards
 from teachers.models import Teacher
 from students.models import Student
 
+
+class CourseQuerySet(models.QuerySet):
+    def with_student_count(self):
+        return self.annotate(student_count=Count("students"))
+
+    def with_attendance(self, student):
+        """
+        Annotate each course with the attendance numbers of ``student``:
+        ``attended`` (present marks), ``percentage`` (of the lectures held)
+        and ``status``, all computed by the database in the same query.
+        """
+        # conditions go in the JOIN so the present-marks index is used
+        present_marks = FilteredRelation(
+            "attendance",
+            condition=Q(attendance__student=student, attendance__is_present=True),
+        )
+        return self.annotate(present_marks=present_marks).annotate(
+            attended=Count("present_marks")
+        ).annotate(
+            percentage=Case(
+                When(
+                    lectures_held__gt=0,
+                    then=Round(
+                        Cast(F("attended"), FloatField()) * 100 / F("lectures_held"),
+                        2,
+                    ),
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+            status=Case(
+                When(
+                    total_lectures__gt=0,
+                    attended__gte=F("total_lectures"),
+                    then=Value("COMPLETED"),
+                ),
+                default=Value("IN PROGRESS"),
+                output_field=models.CharField(),
+            ),
+        )
+
+    def for_student(self, student):
+        """Courses ``student`` is enrolled in, with teacher and attendance data."""
+        return (
+            self.filter(students=student)
+            .select_related("teacher__user")
+            .with_attendance(student)
+        )
+
+
 class Course(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
@@ -18,5 +76,97 @@ class Course(models.Model):
         blank=True
     )
     total_lectures = models.PositiveIntegerField(default=0)
+    # sessions with attendance taken, kept by AttendanceSession.objects.record
+    lectures_held = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CourseQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.code})"
+
+    def update_roster(self, add=(), remove=()):
+        """
+        Enrol the student ids in ``add`` and drop those in ``remove``, one
+        bulk statement each, leaving the rest of the roster untouched (and
+        unread). Unknown ids are skipped. Returns the ids actually added
+        and removed.
+        """
+        add, remove = set(add) - set(remove), set(remove)
+        enrolled = Course.students.through.objects.filter(
+            course=self, student=OuterRef("pk")
+        )
+        known = dict(
+            Student.objects.filter(id__in=add | remove)
+            .annotate(enrolled=Exists(enrolled))
+            .values_list("id", "enrolled")
+        )
+        added = {pk for pk in add if pk in known and not known[pk]}
+        removed = {pk for pk in remove if known.get(pk)}
+        if not added and not removed:
+            return added, removed
+
+        # add() / remove() rather than raw through rows: the roster
+        # signals below keep the dashboard caches right
+        with transaction.atomic():
+            if added:
+                self.students.add(*added)
+            if removed:
+                self.students.remove(*removed)
+        return added, removed
+
+
+# =====================================================
+# DASHBOARD CACHE INVALIDATION
+# =====================================================
+@receiver(pre_save, sender=Course)
+def remember_course_teacher(sender, instance, **kwargs):
+    # a reassigned course leaves its old teacher's dashboard too
+    instance._previous_teacher_id = (
+        Course.objects.filter(pk=instance.pk).values_list("teacher_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, **kwargs):
+    invalidate_dashboards(
+        "teacher", [instance.teacher_id, getattr(instance, "_previous_teacher_id", None)]
+    )
+    if not created:
+        invalidate_dashboards("student", instance.students.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    invalidate_dashboards("teacher", [instance.teacher_id])
+    invalidate_dashboards("student", instance.students.values_list("id", flat=True))
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def roster_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # pk_set is None for clear(), so read the roster before it goes
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        courses = Course.objects.filter(students=instance)
+        if pk_set is not None:
+            courses = Course.objects.filter(pk__in=pk_set)
+        student_ids = [instance.pk]
+        teacher_ids = courses.values_list("teacher_id", flat=True)
+    else:
+        student_ids = pk_set
+        if pk_set is None:
+            student_ids = instance.students.values_list("id", flat=True)
+        teacher_ids = [instance.teacher_id]
+
+    invalidate_dashboards("student", student_ids)
+    invalidate_dashboards("teacher", teacher_ids)
+
+
+@receiver(pre_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    # the cascade drops the enrolments without an m2m_changed signal
+    invalidate_dashboards(
+        "teacher", Course.objects.filter(students=instance).values_list("teacher_id", flat=True)
+    )
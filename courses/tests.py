@@ -1,3 +1,260 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from config.cache import dashboard_key
+from students.models import Student
+from teachers.models import Teacher
+from .enrollment import enroll_students, select_students
+from .models import Course
+
+
+class CourseListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        self.teachers = [
+            Teacher.objects.create(
+                user=User.objects.create_user(username=f"t{i}", first_name=name),
+                employee_id=f"E{i}", department="Science",
+            )
+            for i, name in enumerate(["Zed", "Amy"])
+        ]
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A",
+            )
+            for i in range(3)
+        ]
+
+    def add_courses(self, count):
+        for i in range(count):
+            n = Course.objects.count()
+            course = Course.objects.create(
+                name=f"Course {n}", code=f"C{n:03}",
+                teacher=self.teachers[n % 2], total_lectures=10,
+            )
+            course.students.set(self.students[: n % 4])
+
+    def test_query_count_is_flat(self):
+        # session, user with profile, courses, teachers for the filter
+        # (the courses are read as the streamed rows are sent)
+        self.add_courses(2)
+        with self.assertNumQueries(4):
+            b"".join(self.client.get(reverse("course_list")).streaming_content)
+
+        self.add_courses(30)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("course_list"))
+            content = b"".join(response.streaming_content)
+        self.assertEqual(len(response.context["courses"]), 32)
+        self.assertEqual(content.count(b"<tr>"), 33)
+
+    def test_student_counts_and_sorting(self):
+        self.add_courses(4)
+
+        response = self.client.get(reverse("course_list"), {"sort": "-students"})
+
+        counts = [course.student_count for course in response.context["courses"]]
+        self.assertEqual(counts, [3, 2, 1, 0])
+
+        response = self.client.get(reverse("course_list"), {"sort": "teacher"})
+        names = [c.teacher.user.first_name for c in response.context["courses"]]
+        self.assertEqual(names, ["Amy", "Amy", "Zed", "Zed"])
+
+    def test_filters(self):
+        self.add_courses(4)
+        Course.objects.create(name="Orphan", code="X1")
+
+        response = self.client.get(
+            reverse("course_list"), {"teacher": self.teachers[1].id}
+        )
+        self.assertEqual(
+            [c.code for c in response.context["courses"]], ["C001", "C003"]
+        )
+
+        response = self.client.get(reverse("course_list"), {"teacher": "none"})
+        self.assertEqual([c.code for c in response.context["courses"]], ["X1"])
+
+        response = self.client.get(reverse("course_list"), {"code": "c00"})
+        self.assertEqual(len(response.context["courses"]), 4)
+
+    def test_unknown_sort_falls_back_to_name(self):
+        self.add_courses(2)
+
+        response = self.client.get(reverse("course_list"), {"sort": "password"})
+
+        self.assertEqual(response.context["sort"], "name")
+
+
+class CourseRosterTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A",
+            )
+            for i in range(4)
+        ]
+        self.course = Course.objects.create(name="Maths", code="M1", total_lectures=10)
+        self.course.students.set(self.students[:2])
+        self.url = reverse("course_edit", args=[self.course.id])
+
+    def post_edit(self, **roster):
+        return self.client.post(self.url, {
+            "name": "Maths", "code": "M1", "total_lectures": 10,
+            **roster,
+        })
+
+    def enrolled(self, course=None):
+        return set((course or self.course).students.values_list("id", flat=True))
+
+    def test_add_enrolls_picked_students(self):
+        response = self.client.post(reverse("course_add"), {
+            "name": "Physics", "code": "P1", "total_lectures": 10,
+            "add": [self.students[0].id, self.students[3].id, "junk", 999],
+        })
+
+        self.assertRedirects(response, reverse("course_list"))
+        course = Course.objects.get(code="P1")
+        self.assertEqual(self.enrolled(course), {self.students[0].id, self.students[3].id})
+
+    def test_edit_applies_only_the_changes(self):
+        s0, s1, s2, s3 = self.students
+        # enrolled elsewhere after the form was rendered
+        self.course.students.add(s3)
+
+        self.post_edit(add=[s2.id], remove=[s0.id])
+
+        self.assertEqual(self.enrolled(), {s1.id, s2.id, s3.id})
+
+    def test_update_roster_statements(self):
+        s0, s1, s2, s3 = self.students
+
+        # which ids exist and are enrolled, then (in a savepoint) add()'s
+        # own duplicate check, one insert and one delete
+        with self.assertNumQueries(6):
+            added, removed = self.course.update_roster(add=[s1.id, s2.id], remove=[s0.id, s3.id])
+
+        self.assertEqual((added, removed), ({s2.id}, {s0.id}))
+        self.assertEqual(self.enrolled(), {s1.id, s2.id})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.course.update_roster(add=[s1.id]), (set(), set()))
+
+    def test_edit_page_lists_the_roster_not_every_student(self):
+        # session, user, course, teachers, roster, class names
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            [s.roll_no for s in response.context["roster"]], ["R0", "R1"]
+        )
+        self.assertNotIn("students", response.context)
+        self.assertNotContains(response, 'value="%d"' % self.students[3].id)
+
+
+class ClassEnrollmentTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f"s{i}"),
+                roll_no=f"R{i}", class_name="10A" if i < 3 else "10B",
+            )
+            for i in range(5)
+        ]
+        self.maths = Course.objects.create(name="Maths", code="M1", total_lectures=10)
+        self.physics = Course.objects.create(name="Physics", code="P1", total_lectures=10)
+        self.maths.students.add(self.students[0])
+
+    def enrolled(self, course):
+        return set(course.students.values_list("roll_no", flat=True))
+
+    def test_one_insert_skipping_existing_enrolments(self):
+        students, missing = select_students("10A", ["R4"])
+        self.assertEqual(missing, set())
+
+        with CaptureQueriesContext(connection) as queries:
+            pending = enroll_students(students, [self.maths, self.physics])
+
+        inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn("NOT EXISTS", inserts[0])
+        self.assertEqual(len(pending[self.maths.id]), 3)
+        self.assertEqual(len(pending[self.physics.id]), 4)
+        self.assertEqual(self.enrolled(self.maths), {"R0", "R1", "R2", "R4"})
+        self.assertEqual(self.enrolled(self.physics), {"R0", "R1", "R2", "R4"})
+
+        # nothing left to do the second time
+        pending = enroll_students(students, [self.maths, self.physics])
+        self.assertEqual(pending, {self.maths.id: set(), self.physics.id: set()})
+
+    def test_dry_run_writes_nothing(self):
+        students, _ = select_students("10A")
+
+        pending = enroll_students(students, [self.maths], dry_run=True)
+
+        self.assertEqual(
+            pending[self.maths.id], {self.students[1].id, self.students[2].id}
+        )
+        self.assertEqual(self.enrolled(self.maths), {"R0"})
+
+    def test_roster_signals_drop_dashboards(self):
+        key = dashboard_key("student", self.students[1].id)
+        cache.set(key, ["stale"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enroll_students(select_students("10A")[0], [self.maths])
+
+        self.assertIsNone(cache.get(key))
+
+    def test_admin_page_previews_then_enrolls(self):
+        url = reverse("course_enroll")
+        data = {"class_name": "10B", "roll_nos": "R0, R1", "courses": [self.maths.id]}
+
+        response = self.client.post(url, {**data, "action": "preview"})
+        self.assertTrue(response.context["dry_run"])
+        self.assertEqual(
+            [(course.code, new, existing) for course, new, existing in response.context["results"]],
+            [("M1", 3, 1)],
+        )
+        self.assertEqual(self.enrolled(self.maths), {"R0"})
+
+        response = self.client.post(url, {**data, "action": "enroll"})
+        self.assertFalse(response.context["dry_run"])
+        self.assertEqual(self.enrolled(self.maths), {"R0", "R1", "R3", "R4"})
+
+        response = self.client.post(url, {**data, "roll_nos": "R9", "action": "enroll"})
+        self.assertEqual(response.context["error"], "Unknown roll numbers: R9")
+
+    def test_command(self):
+        out = StringIO()
+        call_command("enroll_class", "M1", "P1", class_name="10A", dry_run=True, stdout=out)
+        self.assertIn("M1: would enroll 2, 1 already enrolled", out.getvalue())
+        self.assertEqual(self.enrolled(self.physics), set())
+
+        call_command("enroll_class", "P1", roll_nos=["R3,R4"], stdout=StringIO())
+        self.assertEqual(self.enrolled(self.physics), {"R3", "R4"})
 
-# Create your tests here.
+        with self.assertRaisesMessage(CommandError, "Unknown course codes: X1"):
+            call_command("enroll_class", "M1", "X1", class_name="10A")
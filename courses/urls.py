@@ -6,5 +6,6 @@ urlpatterns = [
     path('add/', views.course_add, name='course_add'),
     path('edit/<int:id>/', views.course_edit, name='course_edit'),
     path('delete/<int:id>/', views.course_delete, name='course_delete'),
+    path('enroll/', views.course_enroll, name='course_enroll'),
     
 ]
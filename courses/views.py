@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
+from accounts.decorators import role_required
+from config.streaming import arender_rows, render_rows
+from .enrollment import enroll_students, select_students
 from .models import Course
 from teachers.models import Teacher
 from students.models import Student
@@ -10,33 +12,109 @@ from students.models import Student
 # =====================================================
 # LIST COURSES (ADMIN ONLY)
 # =====================================================
-@login_required
+COURSE_SORTS = {
+    "name": ("name",),
+    "code": ("code",),
+    "teacher": ("teacher__user__first_name", "teacher__user__last_name"),
+    "students": ("student_count",),
+    "lectures": ("total_lectures",),
+}
+
+
+def course_list_context(request):
+    """Filtered, sorted courses and the filter form's teachers (both lazy)."""
+    courses = (
+        Course.objects
+        .select_related("teacher__user")
+        .with_student_count()
+    )
+
+    # -------------------------------
+    # FILTERS
+    # -------------------------------
+    teacher_id = request.GET.get("teacher", "")
+    code = request.GET.get("code", "").strip()
+
+    if teacher_id.isdigit():
+        courses = courses.filter(teacher_id=teacher_id)
+    elif teacher_id == "none":
+        courses = courses.filter(teacher__isnull=True)
+
+    if code:
+        courses = courses.filter(code__istartswith=code)
+
+    # -------------------------------
+    # SORTING
+    # -------------------------------
+    sort = request.GET.get("sort", "name")
+    field = sort.lstrip("-")
+    if field not in COURSE_SORTS:
+        sort = field = "name"
+
+    prefix = "-" if sort.startswith("-") else ""
+    courses = courses.order_by(
+        *(prefix + column for column in COURSE_SORTS[field]), "id"
+    )
+
+    return {
+        "courses": courses,
+        "teachers": Teacher.objects.select_related("user").order_by(
+            "user__first_name", "user__last_name"
+        ),
+        "sort": sort,
+        "teacher_id": teacher_id,
+        "code": code,
+    }
+
+
+@role_required("ADMIN")
 def course_list(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
+    # unpaginated, so the rows are streamed as they are read
+    return render_rows(
+        request, "admin/courses/list.html", "admin/courses/rows.html",
+        course_list_context(request), "courses"
+    )
 
-    courses = Course.objects.select_related("teacher").prefetch_related("students")
-    return render(request, "admin/courses/list.html", {
-        "courses": courses
-    })
+
+@role_required("ADMIN")
+async def course_list_async(request):
+    context = course_list_context(request)
+    context["teachers"] = [teacher async for teacher in context["teachers"]]
+
+    return await arender_rows(
+        request, "admin/courses/list.html", "admin/courses/rows.html",
+        context, "courses"
+    )
 
 
 # =====================================================
 # ADD COURSE (ADMIN ONLY)
 # =====================================================
-@login_required
-def course_add(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
+def roster_ids(request, key):
+    """The student ids posted under ``key``, ignoring anything malformed."""
+    return {int(value) for value in request.POST.getlist(key) if value.isdigit()}
+
 
-    teachers = Teacher.objects.all()
-    students = Student.objects.all()
+def course_form_context():
+    """
+    The teachers and class names the course form offers. Students are not
+    listed: the roster picker searches them (see students.views.student_search).
+    """
+    return {
+        "teachers": Teacher.objects.select_related("user").order_by(
+            "user__first_name", "user__last_name"
+        ),
+        "class_names": Student.objects.order_by("class_name")
+            .values_list("class_name", flat=True).distinct(),
+    }
 
+
+@role_required("ADMIN")
+def course_add(request):
     if request.method == "POST":
         name = request.POST.get("name")
         code = request.POST.get("code")
         teacher_id = request.POST.get("teacher")
-        student_ids = request.POST.getlist("students")
         total_lectures = request.POST.get("total_lectures")  # ✅ NEW
 
         # -------------------------------
@@ -60,36 +138,26 @@ def course_add(request):
             total_lectures=total_lectures  # ✅ STORED IN COURSE
         )
 
-        # MANY TO MANY
-        if student_ids:
-            course.students.set(student_ids)
+        # MANY TO MANY (students picked in the roster picker)
+        course.update_roster(add=roster_ids(request, "add"))
 
         messages.success(request, "Course added successfully.")
         return redirect("course_list")
 
-    return render(request, "admin/courses/add.html", {
-        "teachers": teachers,
-        "students": students
-    })
+    return render(request, "admin/courses/add.html", course_form_context())
 
 
 # =====================================================
 # EDIT COURSE (ADMIN ONLY)
 # =====================================================
-@login_required
+@role_required("ADMIN")
 def course_edit(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     course = get_object_or_404(Course, id=id)
-    teachers = Teacher.objects.all()
-    students = Student.objects.all()
 
     if request.method == "POST":
         name = request.POST.get("name")
         code = request.POST.get("code")
         teacher_id = request.POST.get("teacher")
-        student_ids = request.POST.getlist("students")
         total_lectures = request.POST.get("total_lectures")  # ✅ NEW
 
         # -------------------------------
@@ -112,27 +180,76 @@ def course_edit(request, id):
         course.total_lectures = total_lectures  # ✅ UPDATED
         course.save()
 
-        # UPDATE MANY TO MANY
-        course.students.set(student_ids)
+        # UPDATE MANY TO MANY: only the students picked or ticked for
+        # removal, so a concurrent edit's enrolments survive
+        course.update_roster(
+            add=roster_ids(request, "add"),
+            remove=roster_ids(request, "remove"),
+        )
 
         messages.success(request, "Course updated successfully.")
         return redirect("course_list")
 
     return render(request, "admin/courses/edit.html", {
+        **course_form_context(),
         "course": course,
-        "teachers": teachers,
-        "students": students
+        "roster": course.students.select_related("user").only(
+            "roll_no", "class_name", "user__first_name", "user__last_name"
+        ).order_by("roll_no"),
     })
 
 
+# =====================================================
+# ENROLL WHOLE CLASSES (ADMIN ONLY)
+# =====================================================
+@role_required("ADMIN")
+def course_enroll(request):
+    context = {
+        "courses": Course.objects.order_by("code").only("code", "name"),
+        "class_names": Student.objects.order_by("class_name")
+            .values_list("class_name", flat=True).distinct(),
+    }
+    if request.method != "POST":
+        return render(request, "admin/courses/enroll.html", context)
+
+    class_name = request.POST.get("class_name", "")
+    roll_nos = request.POST.get("roll_nos", "")
+    course_ids = [pk for pk in request.POST.getlist("courses") if pk.isdigit()]
+    dry_run = request.POST.get("action") != "enroll"
+    context.update({
+        "class_name": class_name,
+        "roll_nos": roll_nos,
+        "course_ids": set(map(int, course_ids)),
+    })
+
+    students, missing = select_students(class_name, roll_nos.replace(",", " ").split())
+    courses = list(Course.objects.filter(id__in=course_ids).order_by("code"))
+    if missing:
+        context["error"] = f"Unknown roll numbers: {', '.join(sorted(missing))}"
+    elif not courses or not (class_name or roll_nos.strip()):
+        context["error"] = "Choose a class or roll numbers, and at least one course."
+    if "error" in context:
+        return render(request, "admin/courses/enroll.html", context)
+
+    selected = students.count()
+    pending = enroll_students(students, courses, dry_run=dry_run)
+    context.update({
+        "dry_run": dry_run,
+        "selected": selected,
+        "results": [
+            (course, len(pending[course.id]), selected - len(pending[course.id]))
+            for course in courses
+        ],
+        "total": sum(map(len, pending.values())),
+    })
+    return render(request, "admin/courses/enroll.html", context)
+
+
 # =====================================================
 # DELETE COURSE (ADMIN ONLY)
 # =====================================================
-@login_required
+@role_required("ADMIN")
 def course_delete(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     course = get_object_or_404(Course, id=id)
     course.delete()
 
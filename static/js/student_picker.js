@@ -0,0 +1,112 @@
+/*
+ * Course roster picker: searches students as the admin types (see
+ * students.views.student_search) and adds each pick to the form as a
+ * hidden "add" input. Already enrolled students are not offered again.
+ */
+(function () {
+    "use strict";
+
+    function studentLabel(student) {
+        var name = [student.first_name, student.last_name].join(" ").trim();
+        return (name || student.username) + " (" + student.roll_no + ", " + student.class_name + ")";
+    }
+
+    function initPicker(picker) {
+        var url = picker.dataset.searchUrl;
+        var query = picker.querySelector("[data-picker-query]");
+        var className = picker.querySelector("[data-picker-class]");
+        var results = picker.querySelector("[data-picker-results]");
+        var more = picker.querySelector("[data-picker-more]");
+        var selected = picker.querySelector("[data-picker-selected]");
+        var timer = null;
+        var pending = null;
+
+        function taken(id) {
+            return picker.querySelector(
+                '[data-enrolled="' + id + '"], input[name="add"][value="' + id + '"]'
+            ) !== null;
+        }
+
+        function pick(student) {
+            var chip = document.createElement("span");
+            chip.className = "badge bg-secondary me-1 mb-1";
+            chip.textContent = studentLabel(student) + " ";
+
+            var input = document.createElement("input");
+            input.type = "hidden";
+            input.name = "add";
+            input.value = student.id;
+            chip.appendChild(input);
+
+            var drop = document.createElement("button");
+            drop.type = "button";
+            drop.className = "btn-close btn-close-white btn-sm";
+            drop.setAttribute("aria-label", "Remove");
+            drop.addEventListener("click", function () {
+                chip.remove();
+            });
+            chip.appendChild(drop);
+
+            selected.appendChild(chip);
+        }
+
+        function render(data) {
+            results.replaceChildren();
+            data.results.forEach(function (student) {
+                if (taken(student.id)) {
+                    return;
+                }
+                var item = document.createElement("button");
+                item.type = "button";
+                item.className = "list-group-item list-group-item-action";
+                item.textContent = studentLabel(student);
+                item.addEventListener("click", function () {
+                    pick(student);
+                    item.remove();
+                });
+                results.appendChild(item);
+            });
+            more.hidden = !data.more;
+        }
+
+        function search() {
+            if (!query.value.trim() && !className.value) {
+                results.replaceChildren();
+                more.hidden = true;
+                return;
+            }
+            // only the latest request's answer is shown
+            if (pending) {
+                pending.abort();
+            }
+            pending = new AbortController();
+
+            var params = new URLSearchParams({q: query.value, class_name: className.value});
+            fetch(url + "?" + params, {signal: pending.signal, credentials: "same-origin"})
+                .then(function (response) {
+                    return response.json();
+                })
+                .then(render)
+                .catch(function (error) {
+                    if (error.name !== "AbortError") {
+                        throw error;
+                    }
+                });
+        }
+
+        query.addEventListener("input", function () {
+            clearTimeout(timer);
+            timer = setTimeout(search, 250);
+        });
+        className.addEventListener("change", search);
+        // Enter searches instead of submitting the course form
+        query.addEventListener("keydown", function (event) {
+            if (event.key === "Enter") {
+                event.preventDefault();
+                search();
+            }
+        });
+    }
+
+    document.querySelectorAll("[data-student-picker]").forEach(initPicker);
+})();
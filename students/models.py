@@ -1,13 +1,33 @@
 from django.db import models
-from django.db import models
+from django.db.models.expressions import RawSQL
 from django.contrib.auth.models import User
 
+from accounts import search
+
+
+class StudentQuerySet(models.QuerySet):
+    def search(self, query):
+        """
+        Students matching every word of ``query`` as a prefix of their
+        name, username, roll number or class ("jo sm" finds John Smith),
+        looked up in the full-text ``search_index`` (accounts.search).
+        """
+        expression = search.match_expression(query)
+        if not expression:
+            return self
+        return self.filter(id__in=RawSQL(
+            "SELECT rowid / 4 FROM search_index "
+            "WHERE search_index MATCH %s AND rowid %% 4 = %s",
+            (expression, search.KINDS["student"]),
+        ))
+
+
 class Student(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     roll_no = models.CharField(max_length=20, unique=True)
-    class_name = models.CharField(max_length=50)
+    class_name = models.CharField(max_length=50, db_index=True)
+
+    objects = StudentQuerySet.as_manager()
 
     def __str__(self):
         return self.user.username
-
-
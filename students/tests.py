@@ -1,3 +1,220 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from attendance.models import Attendance
+from courses.models import Course
+from teachers.models import Teacher
+from .models import Student
+
+
+class StudentDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher_user = User.objects.create_user(username="teacher")
+        self.teacher = Teacher.objects.create(
+            user=teacher_user, employee_id="T1", department="Science"
+        )
+
+        self.user = User.objects.create_user(username="student")
+        self.student = Student.objects.create(
+            user=self.user, roll_no="R1", class_name="10A"
+        )
+        self.client.force_login(self.user)
+
+    def enroll(self, count, total_lectures=4):
+        courses = []
+        for i in range(count):
+            course = Course.objects.create(
+                name=f"Course {i}",
+                code=f"C{Course.objects.count()}",
+                teacher=self.teacher,
+                total_lectures=total_lectures,
+            )
+            course.students.add(self.student)
+            courses.append(course)
+        return courses
+
+    def test_attendance_numbers(self):
+        course, other = self.enroll(2)
+        today = date.today()
+        student_ids = [self.student.id]
+        for day in range(3):
+            Attendance.objects.bulk_mark(
+                course, student_ids, student_ids if day < 2 else [],
+                today - timedelta(days=day),
+            )
+        for day in range(4):
+            Attendance.objects.bulk_mark(
+                other, student_ids, student_ids, today - timedelta(days=day)
+            )
+
+        response = self.client.get(reverse("student_dashboard"))
+
+        # percentages are of the lectures held so far, not total_lectures
+        rows = {row["course"].id: row for row in response.context["dashboard_data"]}
+        self.assertEqual(rows[course.id]["attended"], 2)
+        self.assertEqual(rows[course.id]["held"], 3)
+        self.assertEqual(rows[course.id]["percentage"], 66.67)
+        self.assertEqual(rows[course.id]["status"], "IN PROGRESS")
+        self.assertEqual(rows[other.id]["attended"], 4)
+        self.assertEqual(rows[other.id]["percentage"], 100.0)
+        self.assertEqual(rows[other.id]["status"], "COMPLETED")
+
+    def test_zero_total_lectures(self):
+        self.enroll(1, total_lectures=0)
+
+        response = self.client.get(reverse("student_dashboard"))
+
+        row = response.context["dashboard_data"][0]
+        self.assertEqual(row["percentage"], 0)
+        self.assertEqual(row["status"], "IN PROGRESS")
+
+    @override_settings(DASHBOARD_CACHE_TIMEOUT=0)
+    def test_query_count_is_constant(self):
+        # session, user with profile and student, annotated courses
+        self.enroll(1)
+        with self.assertNumQueries(3):
+            self.client.get(reverse("student_dashboard"))
+
+        self.enroll(11)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(len(response.context["dashboard_data"]), 12)
+
+
+@override_settings(LIST_PAGE_SIZE=2, LIST_PAGE_SIZE_MAX=3)
+class StudentListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        for roll_no in ["R05", "R01", "R04", "R02", "R03"]:
+            Student.objects.create(
+                user=User.objects.create_user(username=f"user{roll_no}"),
+                roll_no=roll_no, class_name="10A",
+            )
+
+    def roll_nos(self, response):
+        return [s.roll_no for s in response.context["students"]]
+
+    def test_keyset_pages(self):
+        url = reverse("student_list")
+
+        response = self.client.get(url)
+        page = response.context["page"]
+        self.assertEqual(self.roll_nos(response), ["R01", "R02"])
+        self.assertFalse(page.has_previous)
+        self.assertEqual(page.next_cursor, "R02")
+
+        response = self.client.get(url, {"after": "R02"})
+        page = response.context["page"]
+        self.assertEqual(self.roll_nos(response), ["R03", "R04"])
+        self.assertEqual(page.previous_cursor, "R03")
+
+        response = self.client.get(url, {"after": "R04"})
+        self.assertEqual(self.roll_nos(response), ["R05"])
+        self.assertFalse(response.context["page"].has_next)
+
+        response = self.client.get(url, {"before": "R03"})
+        page = response.context["page"]
+        self.assertEqual(self.roll_nos(response), ["R01", "R02"])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse("student_list"), {"per_page": "1000"})
+
+        self.assertEqual(len(response.context["students"]), 3)
+
+    def test_only_listed_columns_are_fetched(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("student_list"))
+
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"students_student"."roll_no"', sql)
+        self.assertNotIn('"auth_user"."password"', sql)
+        self.assertIn("LIMIT 3", sql)
+
+
+@override_settings(STUDENT_SEARCH_LIMIT=2, STUDENT_SEARCH_LIMIT_MAX=3)
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        for roll_no, first, last, class_name in [
+            ("R01", "John", "Smith", "10A"),
+            ("R02", "Joan", "Smart", "10B"),
+            ("R03", "Mary", "Jones", "10A"),
+            ("R04", "Mark", "Johnson", "10B"),
+            ("X01", "Zoe", "Adams", "10A"),
+        ]:
+            Student.objects.create(
+                user=User.objects.create_user(
+                    username=f"user{roll_no}", first_name=first, last_name=last
+                ),
+                roll_no=roll_no, class_name=class_name,
+            )
+
+    def search(self, **params):
+        response = self.client.get(reverse("student_search"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def roll_nos(self, data):
+        return [row["roll_no"] for row in data["results"]]
+
+    def test_prefix_on_roll_no_username_and_name(self):
+        self.assertEqual(self.roll_nos(self.search(q="x0")), ["X01"])
+        self.assertEqual(self.roll_nos(self.search(q="userR03")), ["R03"])
+        self.assertEqual(self.roll_nos(self.search(q="sm", limit=3)), ["R01", "R02"])
+        # every word has to match
+        self.assertEqual(self.roll_nos(self.search(q="jo sm")), ["R01", "R02"])
+        self.assertEqual(self.roll_nos(self.search(q="joh sm")), ["R01"])
+        # prefixes, not substrings
+        self.assertEqual(self.roll_nos(self.search(q="ohn")), [])
+        # class names are indexed too
+        self.assertEqual(self.roll_nos(self.search(q="10b jo")), ["R02", "R04"])
+
+    def test_renamed_students_are_found_by_their_new_name(self):
+        user = User.objects.get(username="userX01")
+        user.first_name = "Yara"
+        user.save()
+
+        self.assertEqual(self.roll_nos(self.search(q="yar")), ["X01"])
+        self.assertEqual(self.roll_nos(self.search(q="zoe")), [])
+
+    def test_class_filter_and_limit(self):
+        data = self.search(q="jo")
+        self.assertEqual(self.roll_nos(data), ["R01", "R02"])
+        self.assertTrue(data["more"])
+
+        data = self.search(q="jo", limit=100)
+        self.assertEqual(self.roll_nos(data), ["R01", "R02", "R03"])
+        self.assertTrue(data["more"])
+
+        data = self.search(q="jo", class_name="10B")
+        self.assertEqual(self.roll_nos(data), ["R02", "R04"])
+        self.assertFalse(data["more"])
+        self.assertEqual(data["results"][0], {
+            "id": Student.objects.get(roll_no="R02").id, "roll_no": "R02",
+            "class_name": "10B", "username": "userR02",
+            "first_name": "Joan", "last_name": "Smart",
+        })
+
+    def test_admin_only(self):
+        self.client.force_login(User.objects.get(username="userR01"))
+
+        response = self.client.get(reverse("student_search"), {"q": "R"})
+
+        self.assertRedirects(response, reverse("login"), fetch_redirect_response=False)
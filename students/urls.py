@@ -7,5 +7,6 @@ urlpatterns = [
     path('edit/<int:id>/', views.student_edit, name='student_edit'),
     path('delete/<int:id>/', views.student_delete, name='student_delete'),
     path('dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('search/', views.student_search, name='student_search'),
     
 ]
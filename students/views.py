@@ -1,33 +1,102 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-
+from django.db.models import F
+from django.http import JsonResponse
+
+from accounts.decorators import role_required
+from accounts.services import create_account
+from config.cache import acached_dashboard, cached_dashboard
+from config.pagination import akeyset_paginate, keyset_paginate
+from config.streaming import arender_rows, render_rows
 from .models import Student
 from courses.models import Course
-from attendance.models import Attendance
+from attendance.models import AttendanceBitmap
 
 
 # =====================================================
 # ADMIN: LIST STUDENTS
 # =====================================================
+STUDENT_LIST_FIELDS = (
+    "roll_no", "class_name",
+    "user__username", "user__first_name", "user__last_name",
+)
+
+
+@role_required("ADMIN")
 def student_list(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
+    students = Student.objects.select_related("user").only(*STUDENT_LIST_FIELDS)
+    if request.GET.get("per_page") == "all":
+        # the whole list, streamed as it is read
+        return render_rows(
+            request, "admin/students/list.html", "admin/students/rows.html",
+            {"students": students.order_by("roll_no")}, "students"
+        )
+    page = keyset_paginate(request, students, "roll_no")
+
+    return render(request, "admin/students/list.html", {
+        "students": page,
+        "page": page
+    })
+
+
+@role_required("ADMIN")
+async def student_list_async(request):
+    students = Student.objects.select_related("user").only(*STUDENT_LIST_FIELDS)
+    if request.GET.get("per_page") == "all":
+        # the whole list, streamed as it is read
+        return await arender_rows(
+            request, "admin/students/list.html", "admin/students/rows.html",
+            {"students": students.order_by("roll_no")}, "students"
+        )
+    page = await akeyset_paginate(request, students, "roll_no")
 
-    students = Student.objects.select_related("user").all()
     return render(request, "admin/students/list.html", {
-        "students": students
+        "students": page,
+        "page": page
+    })
+
+
+# =====================================================
+# ADMIN: STUDENT SEARCH (JSON, for the course roster picker)
+# =====================================================
+@role_required("ADMIN")
+def student_search(request):
+    query = request.GET.get("q", "").strip()
+    class_name = request.GET.get("class_name", "").strip()
+
+    limit = request.GET.get("limit", "")
+    if not limit.isdigit() or int(limit) < 1:
+        limit = settings.STUDENT_SEARCH_LIMIT
+    limit = min(int(limit), settings.STUDENT_SEARCH_LIMIT_MAX)
+
+    students = Student.objects.search(query)
+    if class_name:
+        students = students.filter(class_name=class_name)
+
+    # one extra row tells the picker there is more to narrow down
+    rows = list(
+        students.order_by("roll_no").values(
+            "id", "roll_no", "class_name",
+            username=F("user__username"),
+            first_name=F("user__first_name"),
+            last_name=F("user__last_name"),
+        )[:limit + 1]
+    )
+
+    return JsonResponse({
+        "results": rows[:limit],
+        "more": len(rows) > limit
     })
 
 
 # =====================================================
 # ADMIN: ADD STUDENT
 # =====================================================
+@role_required("ADMIN")
 def student_add(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     if request.method == "POST":
         # READ INPUTS
         username = request.POST.get("username")
@@ -47,18 +116,13 @@ def student_add(request):
             messages.error(request, "Roll number already exists.")
             return redirect("student_add")
 
-        # CREATE USER
-        user = User.objects.create_user(
+        # CREATE USER + PROFILE + STUDENT (one transaction)
+        create_account(
+            "STUDENT",
             username=username,
             password=password,
-        )
-        user.first_name = first_name
-        user.last_name = last_name
-        user.save()
-
-        # CREATE STUDENT
-        Student.objects.create(
-            user=user,
+            first_name=first_name,
+            last_name=last_name,
             roll_no=roll_no,
             class_name=class_name
         )
@@ -72,10 +136,8 @@ def student_add(request):
 # =====================================================
 # ADMIN: EDIT STUDENT
 # =====================================================
+@role_required("ADMIN")
 def student_edit(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     student = get_object_or_404(Student, id=id)
     user = student.user
 
@@ -123,10 +185,8 @@ def student_edit(request, id):
 # =====================================================
 # ADMIN: DELETE STUDENT
 # =====================================================
+@role_required("ADMIN")
 def student_delete(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     student = get_object_or_404(Student, id=id)
 
     # Deleting user auto-deletes student
@@ -138,45 +198,59 @@ def student_delete(request, id):
 # =====================================================
 # STUDENT DASHBOARD (STUDENT ONLY)
 # =====================================================
-@login_required
-def student_dashboard(request):
-    if request.user.profile.role != "STUDENT":
-        return redirect("login")
+def dashboard_rows(courses):
+    return [
+        {
+            "course": course,
+            "total": course.total_lectures,
+            "held": course.lectures_held,
+            "attended": course.attended,
+            "percentage": course.percentage,
+            "status": course.status
+        }
+        for course in courses
+    ]
 
-    student = request.user.student
 
-    # Courses student is enrolled in
-    courses = Course.objects.filter(students=student)
+@role_required("STUDENT")
+def student_dashboard(request):
+    student = request.user.student
 
-    dashboard_data = []
+    def build():
+        # One query: enrolled courses annotated with attended / percentage / status
+        if settings.ATTENDANCE_STORAGE == "bitmap":
+            courses = AttendanceBitmap.objects.annotate_courses(
+                Course.objects.filter(students=student).select_related("teacher__user"),
+                student
+            )
+        else:
+            courses = Course.objects.for_student(student)
+        return dashboard_rows(courses)
 
-    for course in courses:
-        total_lectures = course.total_lectures
+    # cached per student, dropped by signals when marks or enrolment change
+    dashboard_data = cached_dashboard("student", student.id, build)
 
-        attended_lectures = Attendance.objects.filter(
-            course=course,
-            student=student,
-            is_present=True
-        ).count()
+    return render(request, "student/dashboard.html", {
+        "dashboard_data": dashboard_data
+    })
 
-        attendance_percentage = (
-            (attended_lectures / total_lectures) * 100
-            if total_lectures > 0 else 0
-        )
 
-        status = (
-            "COMPLETED"
-            if total_lectures > 0 and attended_lectures >= total_lectures
-            else "IN PROGRESS"
-        )
+@role_required("STUDENT")
+async def student_dashboard_async(request):
+    student = request.user.student
 
-        dashboard_data.append({
-            "course": course,
-            "total": total_lectures,
-            "attended": attended_lectures,
-            "percentage": round(attendance_percentage, 2),
-            "status": status
-        })
+    async def build():
+        if settings.ATTENDANCE_STORAGE == "bitmap":
+            # register decoding is sync-only, run it off the event loop
+            courses = await sync_to_async(AttendanceBitmap.objects.annotate_courses)(
+                Course.objects.filter(students=student).select_related("teacher__user"),
+                student
+            )
+        else:
+            courses = [course async for course in Course.objects.for_student(student)]
+        return dashboard_rows(courses)
+
+    dashboard_data = await acached_dashboard("student", student.id, build)
 
     return render(request, "student/dashboard.html", {
         "dashboard_data": dashboard_data
@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Teacher
+
+
+@override_settings(LIST_PAGE_SIZE=2)
+class TeacherListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        for employee_id in ["E3", "E1", "E2"]:
+            Teacher.objects.create(
+                user=User.objects.create_user(username=f"user{employee_id}"),
+                employee_id=employee_id, department="Science",
+            )
+
+    def test_keyset_pages_by_employee_id(self):
+        response = self.client.get(reverse("teacher_list"))
+        self.assertEqual(
+            [t.employee_id for t in response.context["teachers"]], ["E1", "E2"]
+        )
+        self.assertContains(response, "?after=E2")
+
+        response = self.client.get(reverse("teacher_list"), {"after": "E2"})
+        self.assertEqual(
+            [t.employee_id for t in response.context["teachers"]], ["E3"]
+        )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TeacherAddTests(TestCase):
+    def test_add_teacher(self):
+        admin = User.objects.create_user(username="admin")
+        admin.profile.role = "ADMIN"
+        admin.profile.save()
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse("teacher_add"), {
+            "username": "tess", "password": "pw", "first_name": "Tess",
+            "last_name": "T", "employee_id": "E9", "department": "Maths",
+        })
+
+        self.assertRedirects(response, reverse("teacher_list"))
+        teacher = Teacher.objects.select_related("user__profile").get(employee_id="E9")
+        self.assertEqual(teacher.user.profile.role, "TEACHER")
+        self.assertEqual(teacher.user.first_name, "Tess")
@@ -1,34 +1,63 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
 from courses.models import Course
-from accounts.models import Profile
+from accounts.decorators import role_required
+from accounts.services import create_account
+from config.cache import acached_dashboard, cached_dashboard
+from config.pagination import akeyset_paginate, keyset_paginate
+from config.streaming import arender_rows, render_rows
 from .models import Teacher
 
 
 # =====================================================
 # LIST TEACHERS (ADMIN ONLY)
 # =====================================================
-@login_required
+TEACHER_LIST_FIELDS = (
+    "employee_id", "department",
+    "user__username", "user__first_name", "user__last_name",
+)
+
+
+@role_required("ADMIN")
 def teacher_list(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
+    teachers = Teacher.objects.select_related("user").only(*TEACHER_LIST_FIELDS)
+    if request.GET.get("per_page") == "all":
+        # the whole list, streamed as it is read
+        return render_rows(
+            request, "admin/teachers/list.html", "admin/teachers/rows.html",
+            {"teachers": teachers.order_by("employee_id")}, "teachers"
+        )
+    page = keyset_paginate(request, teachers, "employee_id")
+
+    return render(request, "admin/teachers/list.html", {
+        "teachers": page,
+        "page": page
+    })
+
+
+@role_required("ADMIN")
+async def teacher_list_async(request):
+    teachers = Teacher.objects.select_related("user").only(*TEACHER_LIST_FIELDS)
+    if request.GET.get("per_page") == "all":
+        # the whole list, streamed as it is read
+        return await arender_rows(
+            request, "admin/teachers/list.html", "admin/teachers/rows.html",
+            {"teachers": teachers.order_by("employee_id")}, "teachers"
+        )
+    page = await akeyset_paginate(request, teachers, "employee_id")
 
-    teachers = Teacher.objects.select_related("user").all()
     return render(request, "admin/teachers/list.html", {
-        "teachers": teachers
+        "teachers": page,
+        "page": page
     })
 
 
 # =====================================================
 # ADD TEACHER (ADMIN ONLY)
 # =====================================================
-@login_required
+@role_required("ADMIN")
 def teacher_add(request):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     if request.method == "POST":
         # READ INPUTS
         username = request.POST.get("username")
@@ -50,28 +79,14 @@ def teacher_add(request):
             return redirect("teacher_add")
 
         # -------------------------------
-        # CREATE USER
+        # CREATE USER + PROFILE + TEACHER (one transaction)
         # -------------------------------
-        user = User.objects.create_user(
+        create_account(
+            "TEACHER",
             username=username,
-            password=password
-        )
-        user.first_name = first_name
-        user.last_name = last_name
-        user.save()
-
-        # -------------------------------
-        # CREATE / UPDATE PROFILE (SAFE)
-        # -------------------------------
-        profile, created = Profile.objects.get_or_create(user=user)
-        profile.role = "TEACHER"
-        profile.save()
-
-        # -------------------------------
-        # CREATE TEACHER
-        # -------------------------------
-        Teacher.objects.create(
-            user=user,
+            password=password,
+            first_name=first_name,
+            last_name=last_name,
             employee_id=employee_id,
             department=department
         )
@@ -85,11 +100,8 @@ def teacher_add(request):
 # =====================================================
 # EDIT TEACHER (ADMIN ONLY)
 # =====================================================
-@login_required
+@role_required("ADMIN")
 def teacher_edit(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     teacher = get_object_or_404(Teacher, id=id)
     user = teacher.user
 
@@ -134,24 +146,39 @@ def teacher_edit(request, id):
 # =====================================================
 # DELETE TEACHER (ADMIN ONLY)
 # =====================================================
-@login_required
+@role_required("ADMIN")
 def teacher_delete(request, id):
-    if request.user.profile.role != "ADMIN":
-        return redirect("login")
-
     teacher = get_object_or_404(Teacher, id=id)
     teacher.user.delete()
 
     messages.success(request, "Teacher deleted successfully.")
     return redirect("teacher_list")
-@login_required
+@role_required("TEACHER")
 def teacher_dashboard(request):
-    if request.user.profile.role != "TEACHER":
-        return redirect("login")
+    teacher = request.user.teacher
+
+    # cached per teacher, dropped by signals when courses or rosters change
+    courses = cached_dashboard(
+        "teacher", teacher.id,
+        lambda: list(Course.objects.filter(teacher=teacher).with_student_count()),
+    )
 
+    return render(request, "teacher/dashboard.html", {
+        "courses": courses
+    })
+
+@role_required("TEACHER")
+async def teacher_dashboard_async(request):
     teacher = request.user.teacher
-    courses = Course.objects.filter(teacher=teacher)
+
+    async def build():
+        return [
+            course async for course in
+            Course.objects.filter(teacher=teacher).with_student_count()
+        ]
+
+    courses = await acached_dashboard("teacher", teacher.id, build)
 
     return render(request, "teacher/dashboard.html", {
         "courses": courses
-    })
\ No newline at end of file
+    })